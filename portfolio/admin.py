@@ -1,10 +1,97 @@
-from django.contrib import admin
-from django.utils.translation import gettext_lazy as _
+import csv
+
+from django.conf import settings
+from django.contrib import admin, messages
+from django.db import transaction
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _, ngettext
+from .archive import restore_segment
+from .cache import bump_model_version
+from .outbox import queue_contact_notifications, schedule_delivery
+from .pagination import EstimatedCountPaginator
+from .search import matching_pks
+from .signals import VERSIONED_MODELS
+from .streaming import chunked, streaming_response
 from .models import (
     Profile, Education, Experience, Skill, 
-    Certification, Project, Contact, SiteSettings
+    Certification, Project, Contact, ContactArchive, ContactNotification, SiteSettings, Technology
 )
 
+# Columns of the contact CSV export
+CONTACT_CSV_FIELDS = ('id', 'created_at', 'name', 'email', 'subject', 'message', 'is_read', 'is_replied', 'is_spam')
+
+def chunked_pks(queryset, size=None):
+    """Primary keys of ``queryset`` in lists of ADMIN_BULK_CHUNK_SIZE, each read with a seek on the key"""
+    size = size or settings.ADMIN_BULK_CHUNK_SIZE
+    pks = queryset.prefetch_related(None).order_by('pk').values_list('pk', flat=True)
+    last = None
+    while True:
+        chunk = list((pks if last is None else pks.filter(pk__gt=last))[:size])
+        if not chunk:
+            return
+        yield chunk
+        last = chunk[-1]
+
+class CSVBuffer:
+    """File-like object handing back what csv.writer writes"""
+    def write(self, value):
+        return value
+
+# Spreadsheets run cells starting with these as formulas
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+def csv_safe(value):
+    """Cell value with a leading quote when a spreadsheet would read it as a formula"""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Changelist for tables too big to count or LIKE-scan on every load
+
+    Counts are estimated past ADMIN_EXACT_COUNT_LIMIT rows, searches go
+    through the full-text index when the model has one, and bulk changes run
+    in chunks of ADMIN_BULK_CHUNK_SIZE rows, each in its own short transaction
+    so the site keeps writing contacts meanwhile.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        pks = matching_pks(self.model, search_term) if search_term else None
+        if pks is None:
+            return super().get_search_results(request, queryset, search_term)
+        return queryset.filter(pk__in=pks), False
+
+    def update_in_chunks(self, request, queryset, **values):
+        """Apply ``values`` with one UPDATE per chunk; returns the number of rows changed
+
+        UPDATE sends no post_save: for the models shown on the site, this moves
+        ``updated_at`` and bumps the version stamps itself, so cached pages and
+        ETags change. Search documents are not reindexed, so ``values`` must
+        not touch indexed text.
+        """
+        versioned = self.model in VERSIONED_MODELS
+        if versioned:
+            values = {'updated_at': timezone.now(), **values}
+        updated = 0
+        for chunk in chunked_pks(queryset):
+            with transaction.atomic():
+                updated += self.model.objects.filter(pk__in=chunk).update(**values)
+            if versioned:
+                for pk in chunk:
+                    bump_model_version(self.model, pk)
+        self.message_user(request, ngettext(
+            '%(count)d ligne modifiée.', '%(count)d lignes modifiées.', updated,
+        ) % {'count': updated}, messages.SUCCESS)
+        return updated
+
+    def delete_queryset(self, request, queryset):
+        # delete_selected, after its confirmation page
+        for chunk in chunked_pks(queryset):
+            with transaction.atomic():
+                self.model.objects.filter(pk__in=chunk).delete()
+
 @admin.register(Profile)
 class ProfileAdmin(admin.ModelAdmin):
     list_display = ('name', 'title', 'email', 'updated_at')
@@ -30,6 +117,12 @@ class ProfileAdmin(admin.ModelAdmin):
         }),
     )
 
+@admin.register(Technology)
+class TechnologyAdmin(admin.ModelAdmin):
+    list_display = ('name', 'slug')
+    search_fields = ('name',)
+    prepopulated_fields = {'slug': ('name',)}
+
 @admin.register(Education)
 class EducationAdmin(admin.ModelAdmin):
     list_display = ('degree', 'field_of_study', 'institution', 'start_date', 'is_current')
@@ -38,11 +131,12 @@ class EducationAdmin(admin.ModelAdmin):
     date_hierarchy = 'start_date'
 
 @admin.register(Experience)
-class ExperienceAdmin(admin.ModelAdmin):
+class ExperienceAdmin(LargeTableAdmin):
     list_display = ('title', 'company', 'job_type', 'start_date', 'is_current')
     list_filter = ('job_type', 'is_current', 'start_date')
     search_fields = ('title', 'company', 'description')
     date_hierarchy = 'start_date'
+    filter_horizontal = ('technologies',)
 
 @admin.register(Skill)
 class SkillAdmin(admin.ModelAdmin):
@@ -58,30 +152,127 @@ class CertificationAdmin(admin.ModelAdmin):
     date_hierarchy = 'issue_date'
 
 @admin.register(Project)
-class ProjectAdmin(admin.ModelAdmin):
+class ProjectAdmin(LargeTableAdmin):
     list_display = ('title', 'status', 'start_date', 'is_featured')
     list_filter = ('status', 'is_featured', 'start_date')
-    search_fields = ('title', 'description', 'technologies')
+    search_fields = ('title', 'description', 'technologies__name')
     date_hierarchy = 'start_date'
+    filter_horizontal = ('technologies',)
+
+class ContactNotificationInline(admin.TabularInline):
+    model = ContactNotification
+    fields = ('status', 'attempts', 'next_attempt_at', 'sent_at', 'last_error')
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
 
 @admin.register(Contact)
-class ContactAdmin(admin.ModelAdmin):
-    list_display = ('name', 'email', 'subject', 'created_at', 'is_read', 'is_replied')
-    list_filter = ('is_read', 'is_replied', 'created_at')
+class ContactAdmin(LargeTableAdmin):
+    list_display = ('name', 'email', 'subject', 'created_at', 'is_read', 'is_replied', 'is_spam', 'notification_status')
+    list_filter = ('is_spam', 'is_read', 'is_replied', 'notifications__status', 'created_at')
     search_fields = ('name', 'email', 'subject')
-    readonly_fields = ('created_at',)
-    date_hierarchy = 'created_at'
+    readonly_fields = ('created_at', 'spam_reasons')
+    # No date_hierarchy: its links come from a SELECT DISTINCT over every row's date.
+    # The created_at filter (today, 7 days, this month...) is a range on the index.
+    inlines = [ContactNotificationInline]
     
-    actions = ['mark_as_read', 'mark_as_replied']
+    actions = [
+        'mark_as_read', 'mark_as_unread', 'mark_as_replied', 'mark_as_spam', 'mark_as_not_spam',
+        'retry_notifications', 'export_csv',
+    ]
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related('notifications')
+
+    @admin.display(description=_("Notification"))
+    def notification_status(self, obj):
+        notifications = obj.notifications.all()
+        if not notifications:
+            return '-'
+        return ', '.join(n.get_status_display() for n in notifications)
+
+    def retry_notifications(self, request, queryset):
+        for chunk in chunked_pks(queryset):
+            ContactNotification.objects.filter(contact__in=chunk, status='failed').update(
+                status='pending', attempts=0, next_attempt_at=timezone.now()
+            )
+        schedule_delivery()
+    retry_notifications.short_description = _("Renvoyer les notifications en échec")
     
     def mark_as_read(self, request, queryset):
-        queryset.update(is_read=True)
+        self.update_in_chunks(request, queryset.filter(is_read=False), is_read=True)
     mark_as_read.short_description = _("Marquer comme lu")
+
+    def mark_as_unread(self, request, queryset):
+        self.update_in_chunks(request, queryset.filter(is_read=True), is_read=False)
+    mark_as_unread.short_description = _("Marquer comme non lu")
     
     def mark_as_replied(self, request, queryset):
-        queryset.update(is_replied=True)
+        self.update_in_chunks(request, queryset.filter(is_replied=False), is_replied=True)
     mark_as_replied.short_description = _("Marquer comme répondu")
 
+    def mark_as_spam(self, request, queryset):
+        # Their notifications, unless already sent, are dropped with the verdict
+        for chunk in chunked_pks(queryset.filter(is_spam=False)):
+            with transaction.atomic():
+                Contact.objects.filter(pk__in=chunk).update(is_spam=True)
+                ContactNotification.objects.filter(contact__in=chunk, status='pending').delete()
+        self.message_user(
+            request, _("Messages marqués comme spam : leurs notifications en attente sont annulées."), messages.SUCCESS,
+        )
+    mark_as_spam.short_description = _("Marquer comme spam")
+
+    def mark_as_not_spam(self, request, queryset):
+        # Quarantined messages never got their notification: send it now
+        for chunk in chunked_pks(queryset.filter(is_spam=True)):
+            with transaction.atomic():
+                Contact.objects.filter(pk__in=chunk).update(is_spam=False)
+                queue_contact_notifications(Contact.objects.filter(pk__in=chunk, notifications__isnull=True))
+        self.message_user(request, _("Messages sortis du spam : leurs notifications vont partir."), messages.SUCCESS)
+    mark_as_not_spam.short_description = _("Ce n'est pas du spam")
+
+    def export_csv(self, request, queryset):
+        """Stream the selection as CSV, reading it in chunks (in a worker thread under ASGI)"""
+        writer = csv.writer(CSVBuffer())
+        rows = queryset.prefetch_related(None).order_by('pk').values_list(*CONTACT_CSV_FIELDS)
+
+        def lines():
+            yield writer.writerow(CONTACT_CSV_FIELDS)
+            for row in rows.iterator(chunk_size=settings.ADMIN_BULK_CHUNK_SIZE):
+                # Name, subject and message come from the public form
+                yield writer.writerow([csv_safe(value) for value in row])
+
+        response = streaming_response(request, chunked(lines()), 'text/csv; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="contacts-{timezone.now():%Y%m%d-%H%M}.csv"'
+        return response
+    export_csv.short_description = _("Exporter en CSV")
+
+@admin.register(ContactArchive)
+class ContactArchiveAdmin(admin.ModelAdmin):
+    """Segments written by archive_contacts; read-only, since each row describes a file"""
+    list_display = ('period', 'path', 'message_count', 'read_count', 'replied_count', 'size', 'archived_at')
+    date_hierarchy = 'period'
+    actions = ['restore']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    def restore(self, request, queryset):
+        restored = sum(restore_segment(segment) for segment in queryset.order_by('first_created_at'))
+        self.message_user(request, ngettext(
+            '%(count)d message restauré.', '%(count)d messages restaurés.', restored,
+        ) % {'count': restored}, messages.SUCCESS)
+    restore.short_description = _("Restaurer les messages")
+
 @admin.register(SiteSettings)
 class SiteSettingsAdmin(admin.ModelAdmin):
     def has_add_permission(self, request):
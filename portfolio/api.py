@@ -0,0 +1,172 @@
+"""Read-only JSON API over the portfolio content.
+
+``/api/<resource>/`` lists projects, experiences, educations, skills and
+certifications straight from ``values()``: rows are never turned into model
+instances, and a page's technologies are fetched with one extra query.
+
+- ``?fields=id,title`` selects the fields (all public fields by default).
+- ``?cursor=`` pages through the rows in primary key order by seeking past
+  the last key, so every page costs the same and rows added meanwhile are not
+  skipped; ``next`` links to the following page.
+- ``?format=ndjson`` (or ``Accept: application/x-ndjson``) streams every row,
+  one JSON object per line, reading the table in chunks: the export runs in
+  constant memory whatever the table size.
+
+Pages carry an ETag built from the resource's models, and are kept in the
+cache under their version stamps like the HTML pages.
+"""
+import json
+from collections import defaultdict
+
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Certification, Education, Experience, Project, Skill, Technology
+from .pagination import decode_pk_cursor, encode_pk_cursor
+
+# Rows read per query while streaming NDJSON
+EXPORT_CHUNK_SIZE = 500
+
+
+class Resource:
+    name = None
+    model = None
+    # Public fields, in output order
+    fields = ()
+    # File fields, output as URLs
+    file_fields = ()
+    # Many-to-many field -> field of the related model listed instead of its rows
+    related_lists = {}
+
+    def dependencies(self):
+        """Models whose edits change the output"""
+        return (self.model,) + ((Technology,) if self.related_lists else ())
+
+    def parse_fields(self, value):
+        """The requested fields, in output order (all of them when none is named); ValueError on an unknown one"""
+        requested = {name.strip() for name in value.split(',') if name.strip()}
+        if not requested:
+            return list(self.fields)
+        unknown = requested - set(self.fields)
+        if unknown:
+            raise ValueError(', '.join(sorted(unknown)))
+        return [name for name in self.fields if name in requested]
+
+    def rows(self, fields, after=None, limit=None, chunk_size=EXPORT_CHUNK_SIZE):
+        """Dicts of ``fields`` for the rows past primary key ``after``, in primary key order"""
+        columns = [name for name in fields if name != 'id' and name not in self.related_lists]
+        related = [name for name in fields if name in self.related_lists]
+        queryset = self.model.objects.order_by('pk').values('pk', *columns)
+        if after is not None:
+            queryset = queryset.filter(pk__gt=after)
+        if limit is not None:
+            queryset = queryset[:limit]
+
+        chunk = []
+        for row in queryset.iterator(chunk_size=chunk_size):
+            chunk.append(row)
+            if len(chunk) == chunk_size:
+                yield from self.complete(chunk, fields, related)
+                chunk = []
+        if chunk:
+            yield from self.complete(chunk, fields, related)
+
+    def complete(self, chunk, fields, related):
+        """Output dicts of a chunk of ``values()`` rows"""
+        lists = {name: self.related_values(name, [row['pk'] for row in chunk]) for name in related}
+        for row in chunk:
+            for name in self.file_fields:
+                if name in row:
+                    row[name] = default_storage.url(row[name]) if row[name] else None
+            for name in related:
+                row[name] = lists[name].get(row['pk'], [])
+            row['id'] = row.pop('pk')
+            yield {name: row[name] for name in fields}
+
+    def related_values(self, name, pks):
+        """``{pk: [values]}`` of a many-to-many field for some rows, in one query"""
+        field = self.model._meta.get_field(name)
+        source, target = field.m2m_field_name(), f'{field.m2m_reverse_field_name()}__{self.related_lists[name]}'
+        pairs = field.remote_field.through.objects.filter(**{f'{source}__in': pks}).order_by(target)
+        values = defaultdict(list)
+        for pk, value in pairs.values_list(source, target):
+            values[pk].append(value)
+        return values
+
+
+class ProjectResource(Resource):
+    name = 'projects'
+    model = Project
+    fields = (
+        'id', 'title', 'description', 'detailed_description', 'status', 'start_date', 'end_date',
+        'project_url', 'github_url', 'image', 'is_featured', 'technologies', 'updated_at',
+    )
+    file_fields = ('image',)
+    related_lists = {'technologies': 'slug'}
+
+
+class ExperienceResource(Resource):
+    name = 'experiences'
+    model = Experience
+    fields = (
+        'id', 'title', 'company', 'location', 'job_type', 'start_date', 'end_date', 'is_current',
+        'description', 'achievements', 'technologies', 'updated_at',
+    )
+    related_lists = {'technologies': 'slug'}
+
+
+class EducationResource(Resource):
+    name = 'educations'
+    model = Education
+    fields = (
+        'id', 'degree', 'field_of_study', 'institution', 'location', 'start_date', 'end_date', 'is_current',
+        'description', 'grade', 'updated_at',
+    )
+
+
+class SkillResource(Resource):
+    name = 'skills'
+    model = Skill
+    fields = ('id', 'name', 'category', 'proficiency', 'years_of_experience', 'is_featured', 'updated_at')
+
+
+class CertificationResource(Resource):
+    name = 'certifications'
+    model = Certification
+    fields = (
+        'id', 'name', 'issuing_organization', 'issue_date', 'expiration_date', 'credential_id',
+        'credential_url', 'certificate_file', 'updated_at',
+    )
+    file_fields = ('certificate_file',)
+
+
+RESOURCES = {
+    resource.name: resource
+    for resource in (ProjectResource(), ExperienceResource(), EducationResource(), SkillResource(),
+                     CertificationResource())
+}
+
+
+def page(resource, fields, cursor, limit):
+    """``(rows, next cursor)`` of one page; ValueError on a malformed cursor"""
+    after = None
+    if cursor:
+        after = decode_pk_cursor(cursor)
+        if after is None:
+            raise ValueError(cursor)
+    # One more row tells whether a next page exists; the key is needed to point at it
+    rows = list(resource.rows(list(dict.fromkeys(['id', *fields])), after, limit + 1, chunk_size=limit + 1))
+    next_cursor = encode_pk_cursor(rows[limit - 1]['id']) if len(rows) > limit else None
+    if 'id' not in fields:
+        for row in rows:
+            del row['id']
+    return rows[:limit], next_cursor
+
+
+def dumps(value):
+    return json.dumps(value, cls=DjangoJSONEncoder, ensure_ascii=False, separators=(',', ':'))
+
+
+def ndjson_lines(resource, fields):
+    for row in resource.rows(fields):
+        yield dumps(row) + '\n'
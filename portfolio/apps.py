@@ -0,0 +1,24 @@
+from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_migrate
+
+
+def populate_search_index(sender, **kwargs):
+    """Index existing rows the first time the search table appears, and restore the contact index triggers"""
+    from .search import ensure_contact_triggers, index_is_empty, rebuild_index, reset_search_enabled, search_enabled
+
+    reset_search_enabled()
+    if search_enabled() and index_is_empty():
+        rebuild_index()
+    ensure_contact_triggers()
+
+
+class PortfolioConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'portfolio'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .database import configure_connection
+        post_migrate.connect(populate_search_index, sender=self)
+        connection_created.connect(configure_connection)
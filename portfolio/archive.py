@@ -0,0 +1,233 @@
+"""Retention of contact messages.
+
+The contact table shares the database with the content tables, so it should
+not grow forever. ``manage.py archive_contacts`` moves messages older than
+CONTACT_RETENTION_DAYS into gzip-compressed JSON Lines segments under
+CONTACT_ARCHIVE_ROOT, with one directory per month (``2024/03/``). It works
+in batches of CONTACT_ARCHIVE_BATCH_SIZE messages:
+
+1. each batch is written as one segment per month it covers, and the files
+   are synced to disk;
+2. one transaction then deletes the batch's rows and records a
+   ``ContactArchive`` row per segment. That row holds the message, read and
+   replied counts, the id range and the date range.
+
+If the transaction fails, its files are removed. After a crash between the
+two steps, the file is orphaned: no ``ContactArchive`` row points to it, so
+restores ignore it. The next run rewrites it under the same name, since a
+segment is named after its first and last messages (numbered when a
+recorded segment already has that name). Messages whose
+notification has not been delivered yet are kept until it is.
+
+``manage.py restore_contacts`` copies segments back into the contact table on
+demand: whole months, single segments, or only the messages of one sender.
+Restored messages are still older than the retention period, so the next
+archive run moves them out again.
+"""
+import gzip
+import json
+import os
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Contact, ContactArchive
+
+# Columns stored per message, in JSON key order
+FIELDS = (
+    'id', 'created_at', 'name', 'email', 'subject', 'message', 'is_read', 'is_replied', 'is_spam', 'spam_reasons',
+)
+
+
+def retention_cutoff(days=None):
+    """Messages created before this moment are due for archiving"""
+    days = settings.CONTACT_RETENTION_DAYS if days is None else days
+    return timezone.now() - timedelta(days=days)
+
+
+def archivable(before):
+    return Contact.objects.filter(created_at__lt=before).exclude(notifications__status='pending')
+
+
+def segment_path(period, rows):
+    """Name of a new segment: after its first and last rows, numbered past the segments already recorded
+
+    A partial restore leaves a segment whose range a later batch can cover
+    again, so a recorded file is never reused. Files no ``ContactArchive`` row
+    owns are orphans of an interrupted run and are overwritten.
+    """
+    base = f"{period:%Y/%m}/contacts-{rows[0]['id']:010d}-{rows[-1]['id']:010d}"
+    taken = set(ContactArchive.objects.filter(path__startswith=base).values_list('path', flat=True))
+    path, number = f'{base}.jsonl.gz', 1
+    while path in taken:
+        number += 1
+        path = f'{base}-{number}.jsonl.gz'
+    return path
+
+
+def full_path(path):
+    return os.path.join(settings.CONTACT_ARCHIVE_ROOT, path)
+
+
+def write_segment(path, rows):
+    """Write ``rows`` to ``path`` atomically and durably; returns the file size"""
+    target = full_path(path)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    temporary = f'{target}.tmp'
+    with open(temporary, 'wb') as raw:
+        with gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=9, mtime=0) as stream:
+            for row in rows:
+                stream.write(json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False).encode() + b'\n')
+        raw.flush()
+        os.fsync(raw.fileno())
+    os.replace(temporary, target)
+    return os.path.getsize(target)
+
+
+def read_segment(path):
+    with gzip.open(full_path(path), 'rt', encoding='utf-8') as stream:
+        for line in stream:
+            row = json.loads(line)
+            row['created_at'] = parse_datetime(row['created_at'])
+            yield row
+
+
+def remove_file(path):
+    try:
+        os.remove(full_path(path))
+    except FileNotFoundError:
+        pass
+
+
+def batches(before, batch_size):
+    """Rows due for archiving, oldest first, in lists of ``batch_size`` read with a seek on (created_at, id)"""
+    rows = archivable(before).order_by('created_at', 'pk').values(*FIELDS)
+    last = None
+    while True:
+        page = rows if last is None else rows.filter(
+            Q(created_at__gt=last['created_at']) | Q(created_at=last['created_at'], pk__gt=last['id'])
+        )
+        batch = list(page[:batch_size])
+        if not batch:
+            return
+        yield batch
+        last = batch[-1]
+
+
+def archive_batch(rows):
+    """Move one batch out of the contact table; returns its ``ContactArchive`` rows"""
+    by_period = defaultdict(list)
+    for row in rows:
+        by_period[timezone.localtime(row['created_at']).date().replace(day=1)].append(row)
+
+    segments = []
+    try:
+        for period, segment_rows in sorted(by_period.items()):
+            path = segment_path(period, segment_rows)
+            segments.append(ContactArchive(
+                path=path,
+                period=period,
+                first_contact_id=min(row['id'] for row in segment_rows),
+                last_contact_id=max(row['id'] for row in segment_rows),
+                first_created_at=segment_rows[0]['created_at'],
+                last_created_at=segment_rows[-1]['created_at'],
+                message_count=len(segment_rows),
+                read_count=sum(row['is_read'] for row in segment_rows),
+                replied_count=sum(row['is_replied'] for row in segment_rows),
+                size=write_segment(path, segment_rows),
+            ))
+        with transaction.atomic():
+            Contact.objects.filter(pk__in=[row['id'] for row in rows]).delete()
+            ContactArchive.objects.bulk_create(segments)
+    except BaseException:
+        for segment in segments:
+            remove_file(segment.path)
+        raise
+    return segments
+
+
+def archive_contacts(before, batch_size=None):
+    """Archive every message created before ``before``; yields the segments as they are written"""
+    batch_size = batch_size or settings.CONTACT_ARCHIVE_BATCH_SIZE
+    for rows in batches(before, batch_size):
+        yield from archive_batch(rows)
+
+
+def restore_segment(segment, email=None):
+    """Copy a segment's messages (only ``email``'s if given) back into the contact table; returns how many
+
+    Messages still in the contact table are skipped. The segment keeps the
+    messages that were not restored and disappears once it has none left.
+    """
+    rows = list(read_segment(segment.path))
+    if email is None:
+        selected, remaining = rows, []
+    else:
+        email = email.lower()
+        selected = [row for row in rows if row['email'].lower() == email]
+        remaining = [row for row in rows if row['email'].lower() != email]
+    if not selected:
+        return 0
+    live = set(Contact.objects.filter(pk__in=[row['id'] for row in selected]).values_list('pk', flat=True))
+    contacts = [Contact(**row) for row in selected if row['id'] not in live]
+    created_at = {contact.pk: contact.created_at for contact in contacts}
+
+    # The remaining rows go to a new file that replaces the segment once the restore is committed
+    replacement = f'{segment.path}.remaining' if remaining else None
+    size = write_segment(replacement, remaining) if remaining else 0
+    try:
+        with transaction.atomic():
+            Contact.objects.bulk_create(contacts, batch_size=settings.CONTACT_ARCHIVE_BATCH_SIZE)
+            # auto_now_add stamped them with the current time
+            for contact in contacts:
+                contact.created_at = created_at[contact.pk]
+            Contact.objects.bulk_update(contacts, ['created_at'], batch_size=settings.CONTACT_ARCHIVE_BATCH_SIZE)
+            if remaining:
+                ContactArchive.objects.filter(pk=segment.pk).update(
+                    first_contact_id=min(row['id'] for row in remaining),
+                    last_contact_id=max(row['id'] for row in remaining),
+                    first_created_at=remaining[0]['created_at'],
+                    last_created_at=remaining[-1]['created_at'],
+                    message_count=len(remaining),
+                    read_count=sum(row['is_read'] for row in remaining),
+                    replied_count=sum(row['is_replied'] for row in remaining),
+                    size=size,
+                )
+            else:
+                ContactArchive.objects.filter(pk=segment.pk).delete()
+    except BaseException:
+        if replacement:
+            remove_file(replacement)
+        raise
+    if replacement:
+        os.replace(full_path(replacement), full_path(segment.path))
+    else:
+        remove_file(segment.path)
+    return len(contacts)
+
+
+def summary():
+    """Archived messages per month: segments, messages, read, replied and bytes"""
+    return (
+        ContactArchive.objects.values('period').order_by('period')
+        .annotate(
+            segments=Count('pk'), messages=Sum('message_count'), read=Sum('read_count'),
+            replied=Sum('replied_count'), size=Sum('size'),
+        )
+    )
+
+
+def reclaim_space(using='default'):
+    """Give the pages freed by archiving back to the filesystem (SQLite only; PostgreSQL has autovacuum)"""
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('VACUUM')
+    return True
@@ -0,0 +1,142 @@
+"""Async variants of the public views, served under ASGI.
+
+``portfolio.urls`` routes to these classes when ASYNC_VIEWS is on, which
+portfolio_project/asgi.py does by default. They render the same templates
+with the same page cache and conditional GETs as their sync parents; only the
+data loading differs: each page gathers its independent queries with the
+async ORM (``afirst``, ``aiterator``, ``async for``), and cache and session
+lookups run in a worker thread, so the event loop keeps serving other
+requests meanwhile.
+
+Django 4.2 still runs async ORM calls through one thread per request, so
+gathered queries overlap with each other's Python work and with other
+requests rather than executing simultaneously in the database.
+
+The project list and the search pages stay sync: Django runs them in a
+thread under ASGI.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import Http404
+from django.views.generic import View
+
+from .cache import get_profile, get_site_settings
+from .ingestion import contact_buffer
+from .metrics import record_cache
+from .views import (
+    AcademicView, CertificationView, ContactAPIView, ExperienceView, HomeView, ProjectDetailView,
+)
+
+
+async def alist(queryset):
+    """Evaluate a queryset, prefetches included"""
+    return [obj async for obj in queryset]
+
+
+async def aiterate(queryset):
+    """Stream a queryset without prefetches in chunks"""
+    return [obj async for obj in queryset.aiterator(chunk_size=500)]
+
+
+class AsyncPageMixin:
+    """Async ``get`` and ``dispatch`` for CachedPageMixin views
+
+    The context (profile and site settings excluded) comes from
+    ``aget_page_data``, which by default evaluates the querysets of the sync
+    view's ``get_page_querysets``, so both variants render the same data.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        # View.dispatch (not super()): the sync CachedPageMixin.dispatch is next in the MRO
+        if request.method not in ('GET', 'HEAD') or await sync_to_async(self.has_pending_messages)():
+            return await View.dispatch(self, request, *args, **kwargs)
+
+        etag, last_modified = await sync_to_async(self.get_page_validators)()
+        response = self.get_not_modified_response(etag, last_modified)
+        if response is None:
+            response = await self.aget_cached_response(request, *args, **kwargs)
+        return self.add_validators(response, etag, last_modified)
+
+    async def aget_cached_response(self, request, *args, **kwargs):
+        if not settings.PAGE_CACHE_ENABLED:
+            return await View.dispatch(self, request, *args, **kwargs)
+
+        key = await sync_to_async(self.get_page_cache_key)()
+        entry = await cache.aget(key)
+        record_cache(hit=entry is not None)
+        if entry is not None:
+            return self.response_from_cache(entry)
+        return self.cache_after_render(key, await View.dispatch(self, request, *args, **kwargs))
+
+    async def get(self, request, *args, **kwargs):
+        profile, site_settings, data = await asyncio.gather(
+            sync_to_async(get_profile)(), sync_to_async(get_site_settings)(), self.aget_page_data(),
+        )
+        context = {'view': self, 'profile': profile, 'site_settings': site_settings, **data, **kwargs}
+        # TemplateResponse: the ASGI handler renders it in a thread
+        return self.render_to_response(context)
+
+    async def aget_page_data(self):
+        """The sync view's ``get_page_querysets``, evaluated concurrently"""
+        querysets = self.get_page_querysets()
+        results = await asyncio.gather(*(
+            # aiterator() does not run prefetches
+            alist(queryset) if queryset._prefetch_related_lookups else aiterate(queryset)
+            for queryset in querysets.values()
+        ))
+        return dict(zip(querysets, results))
+
+
+class AsyncHomeView(AsyncPageMixin, HomeView):
+    pass
+
+
+class AsyncAcademicView(AsyncPageMixin, AcademicView):
+    pass
+
+
+class AsyncExperienceView(AsyncPageMixin, ExperienceView):
+    pass
+
+
+class AsyncCertificationView(AsyncPageMixin, CertificationView):
+    pass
+
+
+class AsyncProjectDetailView(AsyncPageMixin, ProjectDetailView):
+    async def aget_page_data(self):
+        project = await self.get_queryset().filter(pk=self.kwargs['pk']).afirst()
+        if project is None:
+            raise Http404
+        self.object = project
+        return {'object': project, 'project': project}
+
+
+class AsyncContactAPIView(ContactAPIView):
+    """ContactAPIView without blocking the event loop
+
+    ``accept`` (rate limit, validation, duplicate check and spam score) and the
+    buffer (whose flush writes to the database) run in a worker thread; the
+    email itself is sent by the outbox, never by the request.
+    """
+
+    async def post(self, request, *args, **kwargs):
+        contact, response = await sync_to_async(self.accept)(request)
+        if contact is None:
+            return response
+        await sync_to_async(contact_buffer.add)(contact)
+        return self.accepted()
+
+
+# Sync view -> async variant, used by portfolio.urls when ASYNC_VIEWS is on
+VARIANTS = {
+    HomeView: AsyncHomeView,
+    AcademicView: AsyncAcademicView,
+    ExperienceView: AsyncExperienceView,
+    CertificationView: AsyncCertificationView,
+    ProjectDetailView: AsyncProjectDetailView,
+    ContactAPIView: AsyncContactAPIView,
+}
@@ -0,0 +1,177 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError
+from django.db.models import Count, Max
+from django.utils.translation import get_language
+
+from .metrics import record_cache
+
+VERSION_KEY = 'portfolio:version:{}'
+SINGLETON_KEY = 'portfolio:singleton:{}:{}'
+PAGE_KEY = 'portfolio:page:{}:{}'
+VALIDATORS_KEY = 'portfolio:validators:{}'
+FRAGMENT_KEY = 'portfolio:fragment:{}:{}'
+
+# Sentinel distinguishing "not cached" from a cached ``None`` (no row yet)
+_MISSING = object()
+
+# Per-process copies of the singleton rows: label -> (version, instance)
+_local_singletons = {}
+
+# Backends whose entries only the current process sees
+PROCESS_LOCAL_BACKENDS = {'django.core.cache.backends.locmem.LocMemCache'}
+
+
+def _label(model):
+    return model._meta.label_lower
+
+
+def _stamp_timeout():
+    """Timeout of version stamps and of what is stored under them
+
+    A shared backend keeps them until the next edit. A per-process one never
+    hears of the edits made through another worker, so its stamps expire after
+    CACHE_LOCAL_TIMEOUT seconds and the next request picks a new one.
+    """
+    if settings.CACHES['default']['BACKEND'] in PROCESS_LOCAL_BACKENDS:
+        return settings.CACHE_LOCAL_TIMEOUT
+    return None
+
+
+def dependency_name(dependency):
+    """Name of a cache dependency: a model class or a ``(model, pk)`` pair"""
+    if isinstance(dependency, tuple):
+        model, pk = dependency
+        return f'{_label(model)}:{pk}'
+    return _label(dependency)
+
+
+def get_versions(dependencies):
+    """Return ``{name: stamp}`` for the given dependencies in one cache round trip"""
+    names = [dependency_name(dependency) for dependency in dependencies]
+    keys = {VERSION_KEY.format(name): name for name in names}
+    found = cache.get_many(keys)
+    for key in keys.keys() - found.keys():
+        # A fresh stamp (never a counter) so an evicted or expired key cannot
+        # come back with a value some worker still holds in memory.
+        cache.add(key, time.time_ns(), _stamp_timeout())
+        found[key] = cache.get(key)
+    return {keys[key]: found[key] for key in keys}
+
+
+def get_model_version(model):
+    """Return the current version stamp of a model, shared by all workers"""
+    return get_versions([model])[_label(model)]
+
+
+def bump_model_version(model, pk=None):
+    """Invalidate everything cached against a model (and one of its rows)"""
+    stamp = time.time_ns()
+    stamps = {VERSION_KEY.format(_label(model)): stamp}
+    if pk is not None:
+        stamps[VERSION_KEY.format(dependency_name((model, pk)))] = stamp
+    cache.set_many(stamps, _stamp_timeout())
+    _local_singletons.pop(_label(model), None)
+
+
+def versions_digest(dependencies):
+    """Short digest of the current stamps of several dependencies"""
+    versions = get_versions(dependencies)
+    raw = ';'.join(f'{name}={versions[name]}' for name in sorted(versions))
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def get_singleton(model):
+    """Return the first row of a model, cached per process and in the cache backend"""
+    label = _label(model)
+    version = get_model_version(model)
+
+    local = _local_singletons.get(label)
+    if local is not None and local[0] == version:
+        record_cache(hit=True)
+        return local[1]
+
+    key = SINGLETON_KEY.format(label, version)
+    instance = cache.get(key, _MISSING)
+    record_cache(hit=instance is not _MISSING)
+    if instance is _MISSING:
+        try:
+            instance = model.objects.first()
+        except DatabaseError:
+            # Tables not created yet (fresh checkout, before migrate)
+            return None
+        cache.set(key, instance, _stamp_timeout())
+
+    _local_singletons[label] = (version, instance)
+    return instance
+
+
+def get_profile():
+    from .models import Profile
+    return get_singleton(Profile)
+
+
+def get_site_settings():
+    from .models import SiteSettings
+    return get_singleton(SiteSettings)
+
+
+def page_cache_key(parts, dependencies):
+    """Cache key of a rendered page; changes as soon as a dependency is edited"""
+    raw = ':'.join(str(part) for part in parts)
+    return PAGE_KEY.format(raw, versions_digest(dependencies))
+
+
+def fragment_cache_key(name, vary_on, dependencies):
+    """Cache key of a template fragment, per language; changes when a dependency is edited"""
+    vary = hashlib.md5(':'.join(str(value) for value in vary_on).encode()).hexdigest()
+    return FRAGMENT_KEY.format(f'{name}:{get_language()}:{vary}', versions_digest(dependencies))
+
+
+def cached_fragment(name, vary_on, dependencies, render, timeout=None):
+    """Return a rendered fragment from the cache, calling ``render()`` on a miss"""
+    if not settings.FRAGMENT_CACHE_ENABLED:
+        return render()
+    key = fragment_cache_key(name, vary_on, dependencies)
+    content = cache.get(key)
+    record_cache(hit=content is not None)
+    if content is None:
+        content = render()
+        cache.set(key, content, settings.FRAGMENT_CACHE_TIMEOUT if timeout is None else timeout)
+    return content
+
+
+def _dependency_state(dependency):
+    """Return ``(last update, row count)`` of a model or of a single row"""
+    if isinstance(dependency, tuple):
+        model, pk = dependency
+        updated = model.objects.filter(pk=pk).values_list('updated_at', flat=True).first()
+        return updated, int(updated is not None)
+    state = dependency.objects.aggregate(last=Max('updated_at'), count=Count('pk'))
+    return state['last'], state['count']
+
+
+def get_validators(dependencies):
+    """Return ``(etag, last_modified)`` for content built from the given dependencies
+
+    Computed from ``updated_at`` timestamps and row counts (so deletions change
+    the ETag too) and memoized under the dependencies' version stamps, which
+    makes it free on a warm cache. Returns ``(None, None)`` when a single-row
+    dependency does not exist.
+    """
+    key = VALIDATORS_KEY.format(versions_digest(dependencies))
+    validators = cache.get(key)
+    record_cache(hit=validators is not None)
+    if validators is None:
+        states = [_dependency_state(dependency) for dependency in dependencies]
+        if any(isinstance(dep, tuple) and not count for dep, (_, count) in zip(dependencies, states)):
+            return None, None
+        timestamps = [last for last, _ in states if last is not None]
+        last_modified = max(timestamps) if timestamps else None
+        raw = ';'.join(f'{last and last.timestamp()}/{count}' for last, count in states)
+        validators = (hashlib.md5(raw.encode()).hexdigest(), last_modified)
+        cache.set(key, validators, _stamp_timeout())
+    return validators
@@ -0,0 +1,170 @@
+"""Response compression.
+
+``CompressionMiddleware`` (portfolio.middleware) compresses text responses
+with the best encoding the client accepts: brotli when the brotli package is
+installed, gzip otherwise. Bodies under COMPRESSION_MIN_SIZE are sent as is,
+streamed responses are compressed chunk by chunk.
+
+Pages served from the page cache are compressed once, when they are stored:
+``compress_entry`` keeps one body per encoding next to the plain one. Cached
+pages hold a placeholder where each visitor's CSRF token goes, so their gzip
+body is stored as independently compressed deflate segments around the
+placeholders; ``gzip_with_tokens`` splices the compressed token in between and
+only adds the header and checksum per request. A brotli stream cannot be
+spliced that way: pages with a placeholder are stored in gzip only, and
+brotli clients get that gzip body rather than a per-request recompression.
+
+CSRF tokens are masked with a new random value on each request, which keeps
+them out of reach of BREACH-style guessing through the compressed size.
+"""
+import struct
+import zlib
+from time import perf_counter
+
+from django.conf import settings
+
+from .metrics import current
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    'text/', 'application/json', 'application/javascript', 'application/xml', 'application/x-ndjson',
+    'application/manifest+json', 'image/svg+xml',
+)
+# gzip member header: no file name, no mtime (same bytes for the same content), unknown OS
+GZIP_HEADER = b'\x1f\x8b\x08\x00\x00\x00\x00\x00\x00\xff'
+# Final, empty deflate block (fixed Huffman codes, end-of-block only)
+DEFLATE_END = b'\x03\x00'
+
+
+def encodings():
+    """Encodings this server produces, preferred first"""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def accepted_encodings(header):
+    """``{encoding: q}`` of an Accept-Encoding header"""
+    accepted = {}
+    for item in header.split(','):
+        name, _semicolon, params = item.strip().partition(';')
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            accepted[name.strip().lower()] = q
+    return accepted
+
+
+def negotiate(header, available=None):
+    """The encoding to answer with, among ``available`` (default: every one this server produces)"""
+    accepted = accepted_encodings(header or '')
+    best, best_q = None, 0.0
+    for encoding in available or encodings():
+        q = accepted.get(encoding, accepted.get('*', 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def is_compressible(response):
+    return response.get('Content-Type', '').startswith(COMPRESSIBLE_TYPES)
+
+
+def timed(function):
+    """Add the call's duration to the current request's compression time"""
+    def wrapper(*args, **kwargs):
+        start = perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            metrics = current.get()
+            if metrics is not None:
+                metrics.compress_time += perf_counter() - start
+    return wrapper
+
+
+def _compress(content, encoding):
+    if encoding == 'br':
+        return brotli.compress(content, quality=settings.COMPRESSION_BROTLI_QUALITY)
+    compressor = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress(content) + compressor.flush()
+
+
+compress = timed(_compress)
+
+
+class StreamCompressor:
+    """Compress a stream chunk by chunk, flushing each one so clients render as it arrives"""
+
+    def __init__(self, encoding):
+        if encoding == 'br':
+            compressor = brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+            self.process, self.flush, self.finish = compressor.process, compressor.flush, timed(compressor.finish)
+        else:
+            compressor = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            self.process, self.finish = compressor.compress, timed(compressor.flush)
+            self.flush = lambda: compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    @timed
+    def compress(self, chunk):
+        return self.process(chunk) + self.flush()
+
+
+def compress_stream(chunks, encoding):
+    compressor = StreamCompressor(encoding)
+    for chunk in chunks:
+        if chunk:
+            yield compressor.compress(chunk)
+    yield compressor.finish()
+
+
+async def acompress_stream(chunks, encoding):
+    compressor = StreamCompressor(encoding)
+    async for chunk in chunks:
+        if chunk:
+            yield compressor.compress(chunk)
+    yield compressor.finish()
+
+
+def deflate_segment(data):
+    """Raw deflate of ``data`` that any other segment can follow (byte-aligned, history reset)"""
+    compressor = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, -zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush(zlib.Z_FULL_FLUSH)
+
+
+@timed
+def compress_entry(content, placeholder):
+    """``{encoding: stored body}`` of a page about to be cached; empty under the size threshold"""
+    if len(content) < settings.COMPRESSION_MIN_SIZE:
+        return {}
+    if placeholder in content:
+        return {'gzip-segments': [deflate_segment(part) for part in content.split(placeholder)]}
+    return {encoding: _compress(content, encoding) for encoding in encodings()}
+
+
+def gzip_with_tokens(segments, token, content):
+    """gzip body of the stored segments joined by ``token``; ``content`` is the resulting plain text"""
+    body = deflate_segment(token).join(segments)
+    trailer = struct.pack('<II', zlib.crc32(content), len(content) & 0xFFFFFFFF)
+    return GZIP_HEADER + body + DEFLATE_END + trailer
+
+
+@timed
+def cached_body(encoded, content, token, accept_encoding):
+    """``(body, encoding)`` of a cached page for this client; encoding is None for the plain ``content``"""
+    available = [encoding for encoding in encodings() if encoding in encoded]
+    if 'gzip-segments' in encoded:
+        available.append('gzip')
+    encoding = negotiate(accept_encoding, available) if available else None
+    if encoding is None:
+        return content, None
+    if encoding in encoded:
+        return encoded[encoding], encoding
+    return gzip_with_tokens(encoded['gzip-segments'], token or b'', content), encoding
@@ -1,15 +1,15 @@
-from .models import SiteSettings, Profile
+from django.conf import settings
+from django.urls import translate_url
+
+from .cache import get_profile, get_site_settings
 
 def site_context(request):
     """Add site-wide context variables"""
-    try:
-        site_settings = SiteSettings.objects.first()
-        profile = Profile.objects.first()
-    except:
-        site_settings = None
-        profile = None
-    
     return {
-        'site_settings': site_settings,
-        'profile': profile,
-    }
\ No newline at end of file
+        'site_settings': get_site_settings(),
+        'profile': get_profile(),
+        # Plain links rather than set_language forms, so pages hold no CSRF token
+        'language_links': [
+            (code, name, translate_url(request.get_full_path(), code)) for code, name in settings.LANGUAGES
+        ],
+    }
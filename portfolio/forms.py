@@ -1,8 +1,16 @@
 from django import forms
 from django.utils.translation import gettext_lazy as _
 from .models import Contact
+from .spam import TIMESTAMP_FIELD, rendered_at_token
 
 class ContactForm(forms.ModelForm):
+    # Read by portfolio.spam: a field left empty by people, and when the form was displayed
+    website = forms.CharField(label=_("Site web (laisser vide)"), required=False, widget=forms.TextInput(attrs={
+        'tabindex': '-1',
+        'autocomplete': 'off',
+    }))
+    rendered_at = forms.CharField(required=False, widget=forms.HiddenInput)
+
     class Meta:
         model = Contact
         fields = ['name', 'email', 'subject', 'message']
@@ -33,4 +41,6 @@ class ContactForm(forms.ModelForm):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         for field in self.fields.values():
-            field.widget.attrs.update({'class': 'form-control'})
\ No newline at end of file
+            field.widget.attrs.update({'class': 'form-control'})
+        if not self.is_bound:
+            self.fields[TIMESTAMP_FIELD].initial = rendered_at_token()
\ No newline at end of file
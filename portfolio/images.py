@@ -0,0 +1,142 @@
+"""Responsive variants of the uploaded images.
+
+Each source image is re-encoded at every IMAGE_VARIANT_WIDTHS width up to its
+own, in every IMAGE_VARIANT_FORMATS format Pillow can write. AVIF needs a
+Pillow build or the pillow-avif-plugin package and is skipped otherwise.
+EXIF/XMP metadata is dropped once the orientation tag has been applied; the
+ICC profile is kept so colours don't shift.
+
+The result is stored in the ``<field>_variants`` JSONField of the row:
+
+    {"source": "projects/photo.jpg", "width": 3024, "height": 4032,
+     "sources": {"image/webp": [[320, "projects/variants/photo-320w.webp"], ...], ...}}
+
+and rendered by the ``responsive_image`` template tag.
+"""
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from PIL import ExifTags, Image, ImageOps
+
+from .cache import bump_model_version
+from .models import Profile, Project
+
+try:
+    import pillow_avif  # noqa: F401  (registers the AVIF codec on Pillow < 11.3)
+except ImportError:
+    pillow_avif = None
+
+# (model, image field) pairs that get variants
+IMAGE_FIELDS = ((Profile, 'profile_image'), (Project, 'image'))
+
+MIME_TYPES = {'avif': 'image/avif', 'webp': 'image/webp', 'jpeg': 'image/jpeg', 'png': 'image/png'}
+EXTENSIONS = {'avif': 'avif', 'webp': 'webp', 'jpeg': 'jpg', 'png': 'png'}
+# EXIF orientations that swap width and height
+TRANSPOSED_ORIENTATIONS = {5, 6, 7, 8}
+
+
+def variants_field(field_name):
+    return f'{field_name}_variants'
+
+
+def writable_formats(has_alpha=False):
+    """Configured formats Pillow can encode, PNG replacing JPEG for transparent images"""
+    Image.init()
+    formats = []
+    for image_format in settings.IMAGE_VARIANT_FORMATS:
+        if image_format == 'jpeg' and has_alpha:
+            image_format = 'png'
+        if image_format.upper() in Image.SAVE and image_format in MIME_TYPES:
+            formats.append(image_format)
+    return formats
+
+
+def variant_widths(width):
+    """Configured widths narrower than the source, plus the source width if it is small"""
+    configured = sorted(settings.IMAGE_VARIANT_WIDTHS)
+    widths = [w for w in configured if w < width]
+    if width <= configured[-1]:
+        widths.append(width)
+    return widths
+
+
+def _encode(image, image_format, icc_profile):
+    buffer = BytesIO()
+    options = {'quality': settings.IMAGE_VARIANT_QUALITY}
+    if image_format == 'jpeg':
+        options.update(optimize=True, progressive=True)
+    elif image_format == 'png':
+        options = {'optimize': True}
+    if icc_profile:
+        options['icc_profile'] = icc_profile
+    # No exif= argument: Pillow writes no EXIF/XMP unless asked to
+    image.save(buffer, image_format.upper(), **options)
+    return buffer.getvalue()
+
+
+def generate_variants(name):
+    """Write the variants of the stored image ``name`` and return their description
+
+    Only touches the storage, never the database, so it can run in a worker process.
+    """
+    with default_storage.open(name) as file:
+        image = Image.open(file)
+        width, height = image.size
+        if image.getexif().get(ExifTags.Base.Orientation) in TRANSPOSED_ORIENTATIONS:
+            width, height = height, width
+        widths = variant_widths(width)
+        # Lets the JPEG decoder downscale while decoding (1/2, 1/4, 1/8), far cheaper
+        # than decoding a full-size photo only to shrink it
+        image.draft('RGB', (widths[-1], widths[-1]))
+        icc_profile = image.info.get('icc_profile')
+        image = ImageOps.exif_transpose(image)
+        has_alpha = image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+
+    stem = os.path.splitext(os.path.basename(name))[0]
+    directory = os.path.join(os.path.dirname(name), 'variants')
+    formats = writable_formats(has_alpha)
+    sources = {MIME_TYPES[image_format]: [] for image_format in formats}
+    for target in widths:
+        size = (target, max(1, round(image.height * target / image.width)))
+        resized = image if size == image.size else image.resize(size, Image.LANCZOS, reducing_gap=3.0)
+        for image_format in formats:
+            path = os.path.join(directory, f'{stem}-{target}w.{EXTENSIONS[image_format]}')
+            if default_storage.exists(path):
+                default_storage.delete(path)
+            stored = default_storage.save(path, ContentFile(_encode(resized, image_format, icc_profile)))
+            sources[MIME_TYPES[image_format]].append([target, stored])
+    return {'source': name, 'width': width, 'height': height, 'sources': sources}
+
+
+def variant_names(variants):
+    return {name for entries in (variants or {}).get('sources', {}).values() for _width, name in entries}
+
+
+def delete_variants(variants, keep=()):
+    for name in variant_names(variants) - set(keep):
+        default_storage.delete(name)
+
+
+def save_variants(model, pk, field_name, variants, previous=None):
+    """Store ``variants`` on the row and delete the files of ``previous`` it no longer uses"""
+    # update() skips auto_now and post_save: move updated_at (ETags) and the stamps here
+    model.objects.filter(pk=pk).update(**{variants_field(field_name): variants}, updated_at=timezone.now())
+    bump_model_version(model, pk)
+    delete_variants(previous, keep=variant_names(variants))
+
+
+def refresh_variants(instance, field_name, force=False):
+    """Regenerate the variants of ``instance.<field_name>`` if the file changed"""
+    file = getattr(instance, field_name)
+    previous = getattr(instance, variants_field(field_name)) or {}
+    if not force and (file.name or None) == previous.get('source'):
+        return False
+    variants = generate_variants(file.name) if file else {}
+    save_variants(type(instance), instance.pk, field_name, variants, previous)
+    setattr(instance, variants_field(field_name), variants)
+    return True
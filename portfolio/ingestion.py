@@ -0,0 +1,181 @@
+"""Ingestion pipeline of the public contact API.
+
+Each submission goes through, in order: a per-IP rate limit (sliding-window
+counters updated with the cache's atomic ``incr``, so it is shared by workers
+using a shared backend), a content-hash duplicate check, and an in-memory
+buffer that is written with ``bulk_create`` once it holds
+``CONTACT_BUFFER_SIZE`` messages or its oldest message is
+``CONTACT_BUFFER_MAX_DELAY`` seconds old.
+
+Buffered messages live in the worker's memory until the flush; a failed
+flush keeps them for the next one, and they are flushed at exit, but a
+killed worker loses them. Their duplicate check only holds for a short
+claim until they are written, so the senders' retries are accepted then.
+Set ``CONTACT_BUFFER_SIZE`` to 1 to write every message immediately.
+"""
+import atexit
+import hashlib
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, transaction
+
+from .models import Contact
+from .outbox import queue_contact_notifications
+
+logger = logging.getLogger(__name__)
+
+RATE_KEY = 'portfolio:contact-rate:{}:{}'
+DEDUP_KEY = 'portfolio:contact-hash:{}'
+
+
+def client_ip(request):
+    """Address of the client; behind proxies, the entry the outermost trusted proxy added to X-Forwarded-For"""
+    if settings.USE_X_FORWARDED_FOR:
+        forwarded = [entry.strip() for entry in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',')]
+        forwarded = [entry for entry in forwarded if entry]
+        if forwarded:
+            # Each proxy appends the address it received the request from;
+            # whatever comes before the entries of our own proxies is up to the client
+            return forwarded[-min(settings.X_FORWARDED_FOR_PROXIES, len(forwarded))]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def take_token(ip, now=None):
+    """Count one request of the IP; return 0 or the seconds to wait
+
+    Allows CONTACT_API_BURST requests per window of BURST / RATE seconds,
+    weighing the previous window's count by the share of it still inside a
+    sliding window. Counters only change with ``incr``/``decr``, so concurrent
+    requests cannot overwrite each other's count.
+    """
+    now = time.time() if now is None else now
+    capacity = settings.CONTACT_API_BURST
+    window = capacity / (settings.CONTACT_API_RATE_PER_MINUTE / 60)
+    slot, elapsed = divmod(now, window)
+    key = RATE_KEY.format(ip, int(slot))
+
+    cache.add(key, 0, int(2 * window) + 1)
+    try:
+        count = cache.incr(key)
+    except ValueError:
+        # Evicted between add and incr
+        cache.add(key, 0, int(2 * window) + 1)
+        count = cache.incr(key)
+    previous = cache.get(RATE_KEY.format(ip, int(slot) - 1), 0)
+    excess = previous * (1 - elapsed / window) + count - capacity
+    if excess <= 0:
+        return 0
+    # Refused requests do not count
+    cache.decr(key)
+    if count - 1 < capacity and previous:
+        # The previous window's weight drains by previous / window per second
+        return excess * window / previous
+    return window - elapsed
+
+
+def dedup_key(email, subject, message):
+    normalized = '\x1f'.join(' '.join(str(value or '').lower().split()) for value in (email, subject, message))
+    return DEDUP_KEY.format(hashlib.sha256(normalized.encode()).hexdigest())
+
+
+def claim_timeout():
+    """Seconds a message is claimed while buffered: until the next flush, with room for a slow one"""
+    return int(settings.CONTACT_BUFFER_MAX_DELAY) + 30
+
+
+def is_duplicate(data):
+    """True if the same message was accepted within CONTACT_DEDUP_WINDOW seconds, or is still buffered
+
+    The message is only claimed for ``claim_timeout()`` seconds here: if its
+    worker dies before writing it, the sender's retry is accepted. The buffer
+    extends the claim to the full window once the message is saved.
+    """
+    key = dedup_key(data.get('email'), data.get('subject'), data.get('message'))
+    # cache.add is atomic on every backend: only the first submission wins
+    return not cache.add(key, 1, claim_timeout())
+
+
+def _dedup_keys(contacts):
+    return [dedup_key(contact.email, contact.subject, contact.message) for contact in contacts]
+
+
+class ContactBuffer:
+    """Accumulates accepted contacts and writes them in batches"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = []
+        self.timer = None
+
+    def add(self, contact):
+        with self.lock:
+            self.pending.append(contact)
+            full = len(self.pending) >= settings.CONTACT_BUFFER_SIZE
+            if not full and self.timer is None:
+                self.timer = threading.Timer(settings.CONTACT_BUFFER_MAX_DELAY, self._flush_from_timer)
+                self.timer.daemon = True
+                self.timer.start()
+        if full:
+            self.flush()
+
+    def _flush_from_timer(self):
+        try:
+            self.flush()
+        finally:
+            close_old_connections()
+
+    def flush(self):
+        """Write every buffered contact (and its notification); return how many"""
+        with self.lock:
+            batch, self.pending = self.pending, []
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+        if not batch:
+            return 0
+        try:
+            with transaction.atomic():
+                contacts = Contact.objects.bulk_create(batch)
+                queue_contact_notifications([contact for contact in contacts if not contact.is_spam])
+        except Exception:
+            logger.exception('Could not write %s buffered contacts, keeping them for the next flush', len(batch))
+            self.keep(batch)
+            return 0
+        cache.set_many(dict.fromkeys(_dedup_keys(contacts), 1), settings.CONTACT_DEDUP_WINDOW)
+        return len(contacts)
+
+    def keep(self, batch):
+        """Put back a batch whose write was rolled back, ahead of newer contacts, and retry it later"""
+        for contact in batch:
+            # bulk_create may have set primary keys the rollback discarded
+            contact.pk = None
+            contact._state.adding = True
+        # Still claimed until the retry
+        cache.set_many(dict.fromkeys(_dedup_keys(batch), 1), claim_timeout())
+        with self.lock:
+            self.pending[:0] = batch
+            if self.timer is None:
+                self.timer = threading.Timer(settings.CONTACT_BUFFER_MAX_DELAY, self._flush_from_timer)
+                self.timer.daemon = True
+                self.timer.start()
+
+
+    def close(self):
+        """Flush at exit; a batch that still cannot be written is lost, its senders may send it again"""
+        self.flush()
+        with self.lock:
+            batch, self.pending = self.pending, []
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+        if batch:
+            logger.error('Dropping %s buffered contacts at exit', len(batch))
+            cache.delete_many(_dedup_keys(batch))
+
+
+contact_buffer = ContactBuffer()
+atexit.register(contact_buffer.close)
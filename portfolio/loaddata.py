@@ -0,0 +1,184 @@
+"""Synthetic portfolio data at any volume, for load tests and query budgets.
+
+``generate(scale)`` writes ``scale`` times the per-unit volumes below with
+``bulk_create`` in batches, so a million rows cost minutes, not hours. The
+content is deterministic for a given seed, so benchmark runs compare like
+with like.
+"""
+import datetime
+import random
+
+from django.db import transaction
+
+from .cache import bump_model_version
+from .models import (
+    Certification, Contact, ContactNotification, Education, Experience,
+    Profile, Project, SiteSettings, Skill, Technology,
+)
+from .search import rebuild_index
+
+# Rows per unit of scale
+VOLUMES = {
+    'projects': 100,
+    'experiences': 40,
+    'skills': 60,
+    'educations': 8,
+    'certifications': 20,
+    'contacts': 200,
+}
+MAX_TECHNOLOGIES = 300
+TECHNOLOGIES_PER_UNIT = 12
+
+WORDS = (
+    "plateforme api rest django react tableau de bord temps réel données analyse "
+    "déploiement continu supervision tests performance sécurité cloud microservices "
+    "recherche indexation cache utilisateurs paiement notifications mobile"
+).split()
+START = datetime.date(2010, 1, 1)
+
+
+def _text(rng, sentences):
+    """Markdown-ish paragraphs, like the descriptions written in the admin"""
+    paragraphs = []
+    for _p in range(max(1, sentences // 4)):
+        words = [rng.choice(WORDS) for _w in range(rng.randint(40, 80))]
+        words[0] = f'**{words[0].capitalize()}**'
+        words[5] = f'*{words[5]}*'
+        paragraphs.append(' '.join(words) + '.')
+    return '\n\n'.join(paragraphs)
+
+
+def _day(rng, span_days=5000):
+    return START + datetime.timedelta(days=rng.randrange(span_days))
+
+
+def _batches(rows, batch_size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def volumes(scale=1, **overrides):
+    counts = {name: count * scale for name, count in VOLUMES.items()}
+    counts['technologies'] = min(MAX_TECHNOLOGIES, TECHNOLOGIES_PER_UNIT * scale)
+    counts.update(overrides)
+    return counts
+
+
+def generate(scale=1, batch_size=1000, seed=0, stdout=None, **overrides):
+    """Write a synthetic portfolio; return the row counts per model
+
+    ``overrides`` replace single volumes (``projects=500``...).
+    """
+    rng = random.Random(seed)
+    counts = volumes(scale, **overrides)
+
+    def log(message):
+        if stdout is not None:
+            stdout.write(message)
+
+    with transaction.atomic():
+        if not Profile.objects.exists():
+            Profile.objects.create(
+                name='Load Test', title='Développeur Full Stack', bio=_text(rng, 8), email='load@example.com',
+            )
+        if not SiteSettings.objects.exists():
+            SiteSettings.objects.create(site_title='Portfolio', site_description='Données de charge')
+
+        offset = Technology.objects.count()
+        technologies = Technology.objects.bulk_create(
+            (Technology(name=f'Tech {offset + n}', slug=f'tech-{offset + n}') for n in range(counts['technologies'])),
+            batch_size=batch_size,
+        ) or list(Technology.objects.all())
+        log(f"{len(technologies)} technologies")
+
+        def link(owners, through, owner_field, per_owner):
+            through.objects.bulk_create(
+                (
+                    through(**{owner_field: owner.pk, 'technology_id': technology.pk})
+                    for owner in owners
+                    for technology in rng.sample(technologies, min(per_owner, len(technologies)))
+                ),
+                batch_size=batch_size,
+            )
+
+        projects = (
+            Project(
+                title=f'Projet {n} {rng.choice(WORDS)}', description=_text(rng, 3), detailed_description=_text(rng, 16),
+                status=rng.choice(('completed', 'completed', 'in_progress', 'planned')),
+                is_featured=rng.random() < 0.05, start_date=_day(rng),
+            )
+            for n in range(counts['projects'])
+        )
+        for batch in _batches(projects, batch_size):
+            link(Project.objects.bulk_create(batch), Project.technologies.through, 'project_id', rng.randint(2, 6))
+        log(f"{counts['projects']} projects")
+
+        experiences = (
+            Experience(
+                title=f'Poste {n}', company=f'Entreprise {rng.randrange(counts["experiences"] // 2 + 1)}',
+                job_type=rng.choice(('full_time', 'part_time', 'contract', 'internship', 'freelance')),
+                start_date=_day(rng), description=_text(rng, 6), achievements=_text(rng, 4),
+            )
+            for n in range(counts['experiences'])
+        )
+        for batch in _batches(experiences, batch_size):
+            link(Experience.objects.bulk_create(batch), Experience.technologies.through, 'experience_id', rng.randint(2, 5))
+        log(f"{counts['experiences']} experiences")
+
+        Skill.objects.bulk_create(
+            (
+                Skill(
+                    name=f'Compétence {n}', category=rng.choice(('technical', 'soft', 'language', 'tool')),
+                    proficiency=rng.choice(('beginner', 'intermediate', 'advanced', 'expert')),
+                    years_of_experience=rng.randrange(15), is_featured=rng.random() < 0.05,
+                )
+                for n in range(counts['skills'])
+            ),
+            batch_size=batch_size,
+        )
+        Education.objects.bulk_create(
+            (
+                Education(
+                    degree=rng.choice(('bachelor', 'master', 'phd', 'diploma', 'certificate')),
+                    field_of_study=f'Domaine {n}', institution=f'Université {n % 50}',
+                    start_date=_day(rng), description=_text(rng, 4),
+                )
+                for n in range(counts['educations'])
+            ),
+            batch_size=batch_size,
+        )
+        Certification.objects.bulk_create(
+            (
+                Certification(
+                    name=f'Certification {n}', issuing_organization=f'Organisme {n % 20}',
+                    issue_date=_day(rng), credential_id=f'CRED-{n:06}',
+                )
+                for n in range(counts['certifications'])
+            ),
+            batch_size=batch_size,
+        )
+        contacts = (
+            Contact(
+                name=f'Visiteur {n}', email=f'visiteur{n}@example.com', subject=f'Demande {n}',
+                message=_text(rng, 2), is_read=rng.random() < 0.7,
+            )
+            for n in range(counts['contacts'])
+        )
+        for batch in _batches(contacts, batch_size):
+            ContactNotification.objects.bulk_create(
+                ContactNotification(contact_id=contact.pk, status='sent') for contact in Contact.objects.bulk_create(batch)
+            )
+        log(f"{counts['skills']} skills, {counts['educations']} educations, "
+            f"{counts['certifications']} certifications, {counts['contacts']} contacts")
+
+    # bulk_create sends no signals: refresh what they would have
+    for model in (Profile, SiteSettings, Technology, Project, Experience, Skill, Education, Certification):
+        bump_model_version(model)
+    rebuild_index()
+    return counts
@@ -0,0 +1,48 @@
+from time import perf_counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from portfolio.archive import archivable, archive_contacts, reclaim_space, retention_cutoff, summary
+
+class Command(BaseCommand):
+    help = ('Move contact messages older than CONTACT_RETENTION_DAYS out of the database, into compressed '
+            'JSONL segments under CONTACT_ARCHIVE_ROOT (see portfolio.archive)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.CONTACT_RETENTION_DAYS,
+                            help='Archive messages older than this many days')
+        parser.add_argument('--batch-size', type=int, default=settings.CONTACT_ARCHIVE_BATCH_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help='Only count the messages due for archiving')
+        parser.add_argument('--vacuum', action='store_true', help='Rebuild the SQLite file afterwards to shrink it')
+        parser.add_argument('--summary', action='store_true', help='List the archived messages per month and exit')
+
+    def handle(self, *args, **options):
+        if options['summary']:
+            for month in summary():
+                self.stdout.write(
+                    f"{month['period']:%Y-%m}: {month['messages']} messages ({month['read']} read, "
+                    f"{month['replied']} replied) in {month['segments']} segments, {month['size'] / 1024:.1f} KiB"
+                )
+            return
+
+        before = retention_cutoff(options['days'])
+        if options['dry_run']:
+            self.stdout.write(f'{archivable(before).count()} messages created before {before:%Y-%m-%d %H:%M} to archive')
+            return
+
+        start = perf_counter()
+        messages = segments = size = 0
+        for segment in archive_contacts(before, options['batch_size']):
+            messages += segment.message_count
+            segments += 1
+            size += segment.size
+            if options['verbosity'] > 1:
+                self.stdout.write(f'{segment.path}: {segment.message_count} messages')
+        self.stdout.write(self.style.SUCCESS(
+            f'{messages} messages archived in {segments} segments ({size / 1024:.1f} KiB) '
+            f'in {perf_counter() - start:.1f} s'
+        ))
+        if options['vacuum'] and messages:
+            start = perf_counter()
+            if reclaim_space():
+                self.stdout.write(f'Database vacuumed in {perf_counter() - start:.1f} s')
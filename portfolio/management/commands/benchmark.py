@@ -0,0 +1,310 @@
+import asyncio
+import json
+import logging
+import os
+import platform
+import re
+import subprocess
+import sys
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from io import BytesIO
+from time import perf_counter
+from wsgiref.util import setup_testing_defaults
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from django.urls import URLPattern, reverse
+from django.utils import translation
+from portfolio import urls as portfolio_urls
+from portfolio.metrics import quantile
+from portfolio.models import (
+    Certification, Contact, Education, Experience, Project, Skill, Technology,
+)
+from portfolio_project.wsgi import application
+
+PERCENTILES = (50, 95, 99)
+# Query strings of the routes that need one to do real work
+QUERY_STRINGS = {'search': 'q=plateforme', 'search_api': 'q=projet'}
+# URL arguments of the routes that take some, besides project_detail's pk
+ROUTE_KWARGS = {'content_api': {'resource': 'projects'}}
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+class Command(BaseCommand):
+    help = ('Benchmark every public route in-process through the WSGI or ASGI application: throughput and '
+            'latency percentiles per concurrency level, memory, bytes saved by compression and its cost per '
+            'request, saved as JSON for comparison between commits (or interfaces: run with ASYNC_VIEWS=True '
+            'for the async views under ASGI)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Requests per route and concurrency level')
+        parser.add_argument('--concurrency', default='1,4,16', help='Comma-separated numbers of concurrent clients')
+        parser.add_argument('--interface', choices=('wsgi', 'asgi'), default='wsgi',
+                            help='wsgi: one client per thread; asgi: one client per task of an event loop')
+        parser.add_argument('--routes', default='', help='Comma-separated route names (default: every GET route)')
+        parser.add_argument('--languages', default=settings.LANGUAGE_CODE, help='Comma-separated language codes')
+        parser.add_argument('--no-page-cache', action='store_true', help='Render every request (PAGE_CACHE_ENABLED=False)')
+        parser.add_argument('--output', help='JSON report path (default: benchmarks/<time>-<commit>.json)')
+        parser.add_argument('--compare', help='Previous JSON report to print the differences against')
+
+    def handle(self, *args, **options):
+        levels = [int(level) for level in options['concurrency'].split(',') if level]
+        self.interface = options['interface']
+        if self.interface == 'asgi':
+            from portfolio_project.asgi import application as asgi_application
+
+            self.asgi_application = asgi_application
+            self.loop = asyncio.new_event_loop()
+            if not settings.ASYNC_VIEWS:
+                self.stdout.write(self.style.WARNING('ASYNC_VIEWS is off: the sync views run in threads'))
+        project = Project.objects.order_by('-start_date', '-id').first()
+        if project is None:
+            raise CommandError('No project: run generate_load_data first')
+        targets = self.targets(project, options['routes'], options['languages'].split(','))
+
+        # One INFO line per request otherwise
+        performance_logger = logging.getLogger('portfolio.performance')
+        previous_level = performance_logger.level
+        performance_logger.setLevel(logging.WARNING)
+        # Server-Timing carries the compression time of each request
+        overrides = {'SERVER_TIMING': True}
+        if options['no_page_cache']:
+            overrides['PAGE_CACHE_ENABLED'] = False
+        try:
+            with override_settings(**overrides):
+                results = {}
+                for label, path, query in targets:
+                    status = self.call(path, query)[0]
+                    if status >= 400:
+                        raise CommandError(f'{label} answered {status}')
+                    results[label] = {
+                        'path': f'{path}?{query}' if query else path,
+                        'memory': self.measure_memory(path, query),
+                        'compression': self.measure_compression(path, query),
+                        'levels': {
+                            str(level): self.run_level(path, query, level, options['requests']) for level in levels
+                        },
+                    }
+                    self.print_route(label, results[label])
+        finally:
+            performance_logger.setLevel(previous_level)
+
+        report = {'metadata': self.metadata(options), 'routes': results}
+        output = options['output'] or os.path.join(
+            settings.BASE_DIR, 'benchmarks',
+            f'{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{report["metadata"]["commit"]}-{self.interface}.json',
+        )
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, 'w') as file:
+            json.dump(report, file, indent=2)
+        self.stdout.write(self.style.SUCCESS(f'Report written to {output}'))
+        if options['compare']:
+            self.compare(options['compare'], report)
+
+    def targets(self, project, only, languages):
+        """``[(label, path, query string)]`` of the routes to request"""
+        names = [
+            pattern.name for pattern in portfolio_urls.urlpatterns
+            if isinstance(pattern, URLPattern) and hasattr(getattr(pattern.callback, 'view_class', None), 'get')
+        ]
+        if only:
+            unknown = set(only.split(',')) - set(names) - {'sitemap'}
+            if unknown:
+                raise CommandError(f'Unknown routes: {", ".join(sorted(unknown))}')
+            names = [name for name in names if name in only.split(',')]
+        targets = []
+        for language in languages:
+            with translation.override(language):
+                for name in names:
+                    kwargs = {'pk': project.pk} if name == 'project_detail' else ROUTE_KWARGS.get(name)
+                    path = reverse(f'{portfolio_urls.app_name}:{name}', kwargs=kwargs)
+                    targets.append((f'{name}[{language}]', path, QUERY_STRINGS.get(name, '')))
+        if not only or 'sitemap' in only.split(','):
+            targets.append(('sitemap', reverse('sitemap'), ''))
+        return targets
+
+    def call(self, path, query):
+        """Run one GET through the application; ``(status, seconds)``"""
+        status, seconds, _headers, _size = self.request(path, query)
+        return status, seconds
+
+    def request(self, path, query, accept_encoding='gzip, br'):
+        """Run one GET; ``(status, seconds, {lowercase header: value}, body bytes)``"""
+        if self.interface == 'asgi':
+            return self.loop.run_until_complete(self.acall(path, query, accept_encoding))
+        environ = {
+            'PATH_INFO': path, 'QUERY_STRING': query, 'HTTP_ACCEPT_ENCODING': accept_encoding, 'wsgi.input': BytesIO(),
+        }
+        setup_testing_defaults(environ)
+        started = []
+        size = 0
+        start = perf_counter()
+        response = application(environ, lambda line, headers, exc_info=None: started.append((line, headers)))
+        try:
+            for chunk in response:
+                size += len(chunk)
+        finally:
+            if hasattr(response, 'close'):
+                response.close()
+        line, headers = started[0]
+        return int(line.split()[0]), perf_counter() - start, {name.lower(): value for name, value in headers}, size
+
+    async def acall(self, path, query, accept_encoding='gzip, br'):
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+            'path': path, 'raw_path': path.encode(), 'query_string': query.encode(), 'root_path': '',
+            'headers': [(b'host', b'localhost'), (b'accept-encoding', accept_encoding.encode())],
+            'client': ('127.0.0.1', 50000), 'server': ('localhost', 80),
+        }
+        done = asyncio.Event()
+        started = []
+        size = 0
+        requested = False
+
+        async def receive():
+            nonlocal requested
+            if not requested:
+                requested = True
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+            await done.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            nonlocal size
+            if message['type'] == 'http.response.start':
+                started.append(message)
+            else:
+                size += len(message.get('body', b''))
+                if not message.get('more_body'):
+                    done.set()
+
+        start = perf_counter()
+        await self.asgi_application(scope, receive, send)
+        headers = {name.decode().lower(): value.decode() for name, value in started[0]['headers']}
+        return started[0]['status'], perf_counter() - start, headers, size
+
+    async def arun_level(self, path, query, concurrency, requests):
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def client():
+            async with semaphore:
+                status, seconds, _headers, _size = await self.acall(path, query)
+                return status, seconds
+
+        return await asyncio.gather(*(client() for _n in range(requests)))
+
+    def run_level(self, path, query, concurrency, requests):
+        start = perf_counter()
+        if self.interface == 'asgi':
+            calls = self.loop.run_until_complete(self.arun_level(path, query, concurrency, requests))
+        else:
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                calls = list(pool.map(lambda _n: self.call(path, query), range(requests)))
+        wall = perf_counter() - start
+        latencies = sorted(seconds * 1000 for _status, seconds in calls)
+        return {
+            'requests': requests,
+            'errors': sum(status >= 400 for status, _seconds in calls),
+            'throughput_rps': round(requests / wall, 1),
+            'mean_ms': round(sum(latencies) / len(latencies), 3),
+            **{f'p{percent}_ms': round(quantile(latencies, percent / 100), 3) for percent in PERCENTILES},
+        }
+
+    def measure_memory(self, path, query, requests=20):
+        """Peak traced memory of a request, and the blocks it leaves allocated, averaged"""
+        peaks = []
+        tracemalloc.start()
+        try:
+            # tracemalloc keeps its traces outside pymalloc: they don't count as blocks
+            blocks = sys.getallocatedblocks()
+            for _n in range(requests):
+                tracemalloc.reset_peak()
+                baseline = tracemalloc.get_traced_memory()[0]
+                self.call(path, query)
+                peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+            blocks = sys.getallocatedblocks() - blocks
+        finally:
+            tracemalloc.stop()
+        return {
+            'peak_kib': round(sum(peaks) / len(peaks) / 1024, 1),
+            'retained_blocks': round(blocks / requests, 1),
+        }
+
+    def measure_compression(self, path, query, requests=20):
+        """Bytes sent with and without Accept-Encoding, and the compression time per request"""
+        identity = self.request(path, query, accept_encoding='identity')[3]
+        timings = []
+        for _n in range(requests):
+            _status, _seconds, headers, size = self.request(path, query)
+            match = re.search(r'compress;dur=([0-9.]+)', headers.get('server-timing', ''))
+            timings.append(float(match.group(1)) if match else 0.0)
+        return {
+            'encoding': headers.get('content-encoding'),
+            'identity_bytes': identity,
+            'encoded_bytes': size,
+            'saved_pct': round((1 - size / identity) * 100, 1) if identity else 0.0,
+            'compress_ms': round(sum(timings) / len(timings), 3),
+        }
+
+    def metadata(self, options):
+        return {
+            'commit': git_commit(),
+            'interface': self.interface,
+            'async_views': settings.ASYNC_VIEWS,
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'platform': platform.platform(),
+            'database': settings.DATABASES['default']['ENGINE'],
+            'page_cache': settings.PAGE_CACHE_ENABLED and not options['no_page_cache'],
+            'compression': settings.COMPRESSION_ENABLED,
+            'requests': options['requests'],
+            'rows': {
+                model._meta.model_name: model.objects.count()
+                for model in (Project, Experience, Skill, Education, Certification, Technology, Contact)
+            },
+        }
+
+    def print_route(self, label, result):
+        memory = result['memory']
+        compression = result['compression']
+        self.stdout.write(f'{label} {result["path"]}  peak {memory["peak_kib"]} KiB/request, '
+                          f'{memory["retained_blocks"]} blocks retained/request')
+        self.stdout.write(
+            f'  {compression["encoding"] or "identity"} {compression["identity_bytes"]} -> '
+            f'{compression["encoded_bytes"]} bytes ({compression["saved_pct"]:.1f}% saved), '
+            f'{compression["compress_ms"]:.3f} ms compressing/request'
+        )
+        for level, stats in result['levels'].items():
+            self.stdout.write(
+                f'  c={level:>3} {stats["throughput_rps"]:9.1f} req/s  '
+                f'p50 {stats["p50_ms"]:8.2f}  p95 {stats["p95_ms"]:8.2f}  p99 {stats["p99_ms"]:8.2f} ms'
+                f'{"  " + str(stats["errors"]) + " errors" if stats["errors"] else ""}'
+            )
+
+    def compare(self, path, report):
+        with open(path) as file:
+            previous = json.load(file)
+        self.stdout.write(f'\nAgainst {previous["metadata"]["commit"]} ({previous["metadata"]["timestamp"]}):')
+        for label, result in report['routes'].items():
+            before = previous['routes'].get(label)
+            if before is None:
+                continue
+            for level, stats in result['levels'].items():
+                old = before['levels'].get(level)
+                if old is None:
+                    continue
+                throughput = (stats['throughput_rps'] / old['throughput_rps'] - 1) * 100
+                p95 = (stats['p95_ms'] / old['p95_ms'] - 1) * 100
+                self.stdout.write(f'  {label} c={level}: throughput {throughput:+.1f}%, p95 {p95:+.1f}%')
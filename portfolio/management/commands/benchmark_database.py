@@ -0,0 +1,123 @@
+import json
+import threading
+from time import perf_counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection, connections, transaction
+from django.test.utils import override_settings
+from portfolio.metrics import quantile
+from portfolio.models import Contact, ContactNotification, Project
+
+# Rows written by the benchmark, deleted afterwards
+SUBJECT = 'benchmark_database'
+
+# SQLite profiles: what Django does out of the box, and settings.SQLITE_PRAGMAS
+SQLITE_DEFAULTS = {'journal_mode': 'DELETE', 'synchronous': 'FULL', 'mmap_size': 0, 'cache_size': -2000}
+
+class Command(BaseCommand):
+    help = ('Measure read throughput and latency while writers submit contacts concurrently, on the database '
+            'of DATABASE_URL; SQLite is measured with its default pragmas and with SQLITE_PRAGMAS')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=8, help='Reader threads')
+        parser.add_argument('--writers', type=int, default=2, help='Writer threads')
+        parser.add_argument('--duration', type=float, default=5, help='Seconds per profile')
+        parser.add_argument('--output', help='Also write the results as JSON to this file')
+
+    def handle(self, *args, **options):
+        if not Project.objects.exists():
+            raise CommandError('No project: run generate_load_data first')
+        if connection.vendor == 'sqlite':
+            profiles = {'sqlite-default': SQLITE_DEFAULTS, 'sqlite-tuned': settings.SQLITE_PRAGMAS}
+        else:
+            profiles = {connection.vendor: None}
+
+        results = {}
+        try:
+            for name, pragmas in profiles.items():
+                # New connections pick the pragmas up; journal_mode changes need the only connection
+                connections.close_all()
+                with override_settings(**({'SQLITE_PRAGMAS': pragmas} if pragmas is not None else {})):
+                    connection.ensure_connection()
+                    results[name] = self.run(options['readers'], options['writers'], options['duration'])
+                    connection.close()
+                self.print_profile(name, results[name])
+        finally:
+            Contact.objects.filter(subject=SUBJECT).delete()
+
+        if options['output']:
+            report = {
+                'vendor': connection.vendor,
+                'conn_max_age': settings.DATABASES['default']['CONN_MAX_AGE'],
+                'readers': options['readers'],
+                'writers': options['writers'],
+                'duration': options['duration'],
+                'profiles': results,
+            }
+            with open(options['output'], 'w') as file:
+                json.dump(report, file, indent=2)
+            self.stdout.write(f'Results written to {options["output"]}')
+
+    def run(self, readers, writers, duration):
+        deadline = perf_counter() + duration
+        reads, writes = [], []
+        errors = {'read': 0, 'write': 0}
+        lock = threading.Lock()
+
+        def loop(operation, latencies, kind):
+            own, failed = [], 0
+            try:
+                while perf_counter() < deadline:
+                    start = perf_counter()
+                    try:
+                        operation()
+                    except DatabaseError:
+                        failed += 1
+                        continue
+                    own.append((perf_counter() - start) * 1000)
+            finally:
+                connection.close()
+            with lock:
+                latencies.extend(own)
+                errors[kind] += failed
+
+        threads = [threading.Thread(target=loop, args=(self.read, reads, 'read')) for _n in range(readers)]
+        threads += [threading.Thread(target=loop, args=(self.write, writes, 'write')) for _n in range(writers)]
+        start = perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = perf_counter() - start
+        return {'read': self.summary(reads, errors['read'], elapsed), 'write': self.summary(writes, errors['write'], elapsed)}
+
+    def read(self):
+        # What the project list does on a page-cache miss
+        list(Project.objects.order_by('-start_date', '-id').values_list('pk', 'title', 'status')[:12])
+        Project.objects.filter(status='completed').count()
+
+    def write(self):
+        # What flushing the contact buffer does, one submission at a time
+        with transaction.atomic():
+            contact = Contact.objects.create(
+                name='Benchmark', email='benchmark@example.com', subject=SUBJECT, message='x' * 500,
+            )
+            ContactNotification.objects.create(contact=contact)
+
+    def summary(self, latencies, errors, elapsed):
+        latencies.sort()
+        summary = {'operations': len(latencies), 'per_second': round(len(latencies) / elapsed, 1), 'errors': errors}
+        if latencies:
+            summary.update({f'p{round(q * 100)}_ms': round(quantile(latencies, q), 2) for q in (0.5, 0.95, 0.99)})
+        return summary
+
+    def print_profile(self, name, result):
+        self.stdout.write(name)
+        for kind in ('read', 'write'):
+            stats = result[kind]
+            percentiles = '  '.join(f'{key[:-3]} {value:7.2f}' for key, value in stats.items() if key.endswith('_ms'))
+            self.stdout.write(
+                f'  {kind:5} {stats["per_second"]:9.1f}/s  {percentiles} ms'
+                f'{"  " + str(stats["errors"]) + " errors" if stats["errors"] else ""}'
+            )
@@ -0,0 +1,55 @@
+import re
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils.safestring import mark_safe
+from portfolio import markdown
+
+SAMPLE = '''**Fonctionnalités principales :**
+- Calcul *automatique* de l'empreinte carbone, voir [la démo](https://example.com/demo)
+- Recommandations personnalisées par IA <script>alert(1)</script> & co
+
+'''
+
+def legacy_markdown_to_html(value):
+    """The markdown_to_html filter as it was before portfolio.markdown"""
+    if not value:
+        return value
+    value = re.sub(r'\*\*(.*?)\*\*', r'<strong>\1</strong>', value)
+    value = re.sub(r'\*(.*?)\*', r'<em>\1</em>', value)
+    value = re.sub(r'\[([^\]]+)\]\(([^)]+)\)', r'<a href="\2" target="_blank">\1</a>', value)
+    value = value.replace('\n', '<br>')
+    return mark_safe(value)
+
+class Command(BaseCommand):
+    help = 'Compare the legacy markdown filter with portfolio.markdown over large descriptions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=50_000, help='Approximate description size in characters')
+        parser.add_argument('--documents', type=int, default=20, help='Distinct descriptions per round')
+        parser.add_argument('--rounds', type=int, default=20, help='Renders of each description (page views)')
+
+    def handle(self, *args, **options):
+        documents = [
+            f'Projet {n}\n\n' + SAMPLE * (options['size'] // len(SAMPLE))
+            for n in range(options['documents'])
+        ]
+        renders = len(documents) * options['rounds']
+
+        legacy = self.time(legacy_markdown_to_html, documents, options['rounds'])
+        markdown._render.cache_clear()
+        cold = self.time(markdown.render_markdown, documents, 1)
+        warm = self.time(markdown.render_markdown, documents, options['rounds'])
+
+        self.stdout.write(f'{len(documents)} descriptions of ~{options["size"]} chars, {options["rounds"]} renders each')
+        self.stdout.write(f'legacy filter          {legacy / renders * 1e6:10.1f} us/render')
+        self.stdout.write(f'new renderer (uncached) {cold / len(documents) * 1e6:9.1f} us/render')
+        self.stdout.write(f'new renderer (cached)  {warm / renders * 1e6:10.1f} us/render')
+        self.stdout.write(self.style.SUCCESS(f'speed-up on repeated renders: x{legacy / warm:.0f}'))
+
+    def time(self, render, documents, rounds):
+        start = time.perf_counter()
+        for _round in range(rounds):
+            for document in documents:
+                render(document)
+        return time.perf_counter() - start
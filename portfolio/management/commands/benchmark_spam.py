@@ -0,0 +1,69 @@
+import logging
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from portfolio import spam
+from portfolio.metrics import quantile
+
+LETTERS = 'abcdefghijklmnopqrstuvwxyzéè'
+PITCH = ('Boost your rankings with our SEO backlinks package, guaranteed first page on Google in two weeks, '
+         'visit https://example.com/offer and https://example.com/prices today')
+
+class Command(BaseCommand):
+    help = 'Time each check of the contact spam filter (portfolio.spam) over synthetic messages'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=5000)
+        parser.add_argument('--words', type=int, default=120, help='Words per legitimate message')
+        parser.add_argument('--spam-ratio', type=float, default=0.3, help='Share of near-duplicate pitches')
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        vocabulary = [''.join(rng.choices(LETTERS, k=rng.randint(2, 10))) for _word in range(5000)]
+        spam.recent_senders.clear()
+        spam.fingerprint_index().clear()
+        now = time.time()
+        token = spam.rendered_at_token(now - 30)
+        messages = []
+        for n in range(options['messages']):
+            # (data, is a pitch)
+            if rng.random() < options['spam_ratio']:
+                words = PITCH.split()
+                words[rng.randrange(len(words))] = rng.choice(vocabulary)
+                data = {'email': f'bot{n % 50}@example.net', 'subject': 'Offer', 'message': ' '.join(words)}
+                messages.append((dict(data, name='Bot', rendered_at=token), True))
+            else:
+                text = ' '.join(rng.choices(vocabulary, k=options['words']))
+                data = {'email': f'visitor{n}@example.com', 'subject': 'Projet', 'message': text}
+                messages.append((dict(data, name='Visiteur', rendered_at=token), False))
+
+        # One log line per quarantined message otherwise
+        logging.getLogger('portfolio.spam').setLevel(logging.WARNING)
+        timings = {name: [] for name, _check in spam.CHECKS}
+        totals = []
+        caught = flagged = 0
+        for n, (data, pitch) in enumerate(messages):
+            start = time.perf_counter()
+            verdict = spam.check_message(data, ip=f'10.0.{n % 200}.1', from_form=True, now=now + n)
+            totals.append(time.perf_counter() - start)
+            if pitch:
+                caught += verdict.is_spam
+            else:
+                flagged += verdict.is_spam
+            for name, value in verdict.timings.items():
+                timings[name].append(value)
+
+        pitches = sum(pitch for _data, pitch in messages)
+        self.stdout.write(
+            f'{len(messages)} messages: {caught}/{pitches} pitches quarantined, '
+            f'{flagged}/{len(messages) - pitches} legitimate messages quarantined'
+        )
+        for name, values in [*timings.items(), ('total', totals)]:
+            values.sort()
+            self.stdout.write(
+                f'{name:12} p50 {quantile(values, 0.5) * 1e6:7.1f} us   p99 {quantile(values, 0.99) * 1e6:7.1f} us'
+            )
+        p99 = quantile(totals, 0.99)
+        style = self.style.SUCCESS if p99 < 0.001 else self.style.ERROR
+        self.stdout.write(style(f'p99 per message: {p99 * 1000:.3f} ms (budget: 1 ms)'))
@@ -0,0 +1,193 @@
+import hashlib
+import json
+import math
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, RequestFactory
+from django.urls import resolve, reverse
+from django.utils import translation
+from portfolio.cache import get_validators
+from portfolio.models import Profile, Project, SiteSettings
+from portfolio.storage import COMPRESSIBLE, is_hashed, precompressed
+from portfolio.views import ProjectListView
+
+MANIFEST_NAME = '.build-manifest.json'
+
+# Pages rendered from portfolio.urls: every route except the POST-only API and
+# the contact form, whose CSRF and render-time tokens must be fresh per visitor
+STATIC_PAGES = [
+    'portfolio:home',
+    'portfolio:academic',
+    'portfolio:experience',
+    'portfolio:certifications',
+    'portfolio:projects',
+    'portfolio:contact_success',
+]
+
+# Per-visitor values that must never be written to a shared file
+FORM_TOKENS = ('csrfmiddlewaretoken', 'name="rendered_at"')
+
+class Command(BaseCommand):
+    help = (
+        'Pre-render every portfolio page in every language into a directory nginx can '
+        'serve without Python. Paginated project lists are written to projects/page/<n>/ '
+        '(map ?page=<n> there), /media/ is not copied. The static site takes no POST: the '
+        'contact page is left out, proxy it (and /api/) to Django. Writes .gz siblings, and '
+        '.br ones when the brotli package is installed.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default=str(settings.BASE_DIR / 'build'), help='Output directory')
+        parser.add_argument('--incremental', action='store_true', help='Only re-render pages whose models changed since the last build')
+        parser.add_argument('--host', default='localhost', help='Host name the pages are rendered for')
+
+    def handle(self, *args, **options):
+        self.output = Path(options['output'])
+        self.output.mkdir(parents=True, exist_ok=True)
+        self.client = Client(HTTP_HOST=options['host'])
+        self.hashed_names = {}
+
+        manifest_path = self.output / MANIFEST_NAME
+        previous = {}
+        if options['incremental'] and manifest_path.exists():
+            previous = json.loads(manifest_path.read_text())
+            if previous.get('templates') != self.templates_fingerprint():
+                self.stdout.write('Templates changed since the last build, rendering everything')
+                previous = {}
+
+        pages = {}
+        assets = set()
+        rendered = skipped = 0
+        for language, _name in settings.LANGUAGES:
+            with translation.override(language):
+                for path in self.page_paths():
+                    etag = self.page_etag(path)
+                    target = self.page_target(path)
+                    old = previous.get('pages', {}).get(path)
+                    if old and old['etag'] == etag and (self.output / target).exists():
+                        pages[path] = old
+                        assets.update(old['assets'])
+                        skipped += 1
+                        continue
+                    page_assets = self.render_page(path, target)
+                    pages[path] = {'etag': etag, 'target': target, 'assets': sorted(page_assets)}
+                    assets.update(page_assets)
+                    rendered += 1
+
+        # The service worker precaches the hashed assets of this build
+        assets.update(self.render_page(reverse('service_worker'), 'sw.js'))
+
+        # Pages that no longer exist (deleted projects, fewer list pages)
+        for path, old in previous.get('pages', {}).items():
+            if path not in pages:
+                for suffix in ('', '.gz', '.br'):
+                    (self.output / (old['target'] + suffix)).unlink(missing_ok=True)
+
+        manifest_path.write_text(json.dumps({
+            'templates': self.templates_fingerprint(),
+            'assets': self.write_assets(assets),
+            'pages': pages,
+        }, indent=2))
+        self.stdout.write(self.style.SUCCESS(
+            f'Rendered {rendered} pages, {skipped} unchanged, {len(assets)} assets into {self.output}'
+        ))
+
+    def page_paths(self):
+        """URL paths of every page, for the active language"""
+        paths = [reverse(name) for name in STATIC_PAGES]
+        projects = reverse('portfolio:projects')
+        num_pages = math.ceil(Project.objects.count() / ProjectListView.paginate_by)
+        paths += [f'{projects}?page={number}' for number in range(2, num_pages + 1)]
+        paths += [project.get_absolute_url() for project in Project.objects.only('pk').order_by('pk')]
+        return paths
+
+    def page_target(self, path):
+        path, _sep, query = path.partition('?')
+        if query:
+            path += 'page/{}/'.format(query.split('=', 1)[1])
+        return path.lstrip('/') + 'index.html'
+
+    def page_etag(self, path):
+        """Validator of the models the page renders (see CachedPageMixin)"""
+        url = path.partition('?')[0]
+        match = resolve(url)
+        view = match.func.view_class()
+        view.setup(RequestFactory().get(path), *match.args, **match.kwargs)
+        if hasattr(view, 'get_cache_dependencies'):
+            dependencies = view.get_cache_dependencies()
+        else:
+            dependencies = (Profile, SiteSettings)
+        return get_validators(dependencies)[0]
+
+    def render_page(self, path, target):
+        response = self.client.get(path)
+        if response.status_code != 200:
+            raise CommandError(f'{path} returned HTTP {response.status_code}')
+        html = response.content.decode(response.charset)
+        for token in FORM_TOKENS:
+            if token in html:
+                raise CommandError(f'{path} contains a form token ({token}) and cannot be served statically')
+        assets = set(re.findall(re.escape(settings.STATIC_URL) + r'([^"\'\s)?#]+)', html))
+        for asset in assets:
+            html = html.replace(settings.STATIC_URL + asset, settings.STATIC_URL + self.hashed_name(asset))
+        self.write(self.output / target, html.encode(response.charset))
+        return assets
+
+    def source_path(self, asset):
+        """Source file of an asset URL; hashed names come from collectstatic's output"""
+        if is_hashed(asset) and staticfiles_storage.exists(asset):
+            return staticfiles_storage.path(asset)
+        return finders.find(asset)
+
+    def hashed_name(self, asset):
+        """``css/style.css`` -> ``css/style.<hash>.css``"""
+        if asset not in self.hashed_names:
+            source = self.source_path(asset)
+            if source is None or is_hashed(asset):
+                self.hashed_names[asset] = asset
+            else:
+                digest = hashlib.md5(Path(source).read_bytes()).hexdigest()[:12]
+                stem, dot, ext = asset.rpartition('.')
+                self.hashed_names[asset] = f'{stem}.{digest}.{ext}' if dot else f'{asset}.{digest}'
+        return self.hashed_names[asset]
+
+    def write_assets(self, assets):
+        static_root = self.output / settings.STATIC_URL.strip('/')
+        written = {}
+        for asset in sorted(assets):
+            source = self.source_path(asset)
+            if source is None:
+                self.stderr.write(f'Static file not found: {asset}')
+                continue
+            hashed = self.hashed_name(asset)
+            target = static_root / hashed
+            if not target.exists():
+                self.write(target, Path(source).read_bytes())
+            written[asset] = hashed
+        return written
+
+    def write(self, target, content):
+        """Write ``content`` and its precompressed siblings"""
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(content)
+        if target.suffix not in COMPRESSIBLE:
+            return
+        for suffix, compressed in precompressed(content).items():
+            target.with_name(target.name + suffix).write_bytes(compressed)
+
+    def templates_fingerprint(self):
+        """Hash of every template and static source: a deploy invalidates all pages"""
+        digest = hashlib.md5()
+        roots = [Path(directory) for directory in settings.TEMPLATES[0]['DIRS']]
+        roots += [Path(directory) for directory in settings.STATICFILES_DIRS]
+        for root in roots:
+            for path in sorted(root.rglob('*')):
+                if path.is_file():
+                    digest.update(str(path.relative_to(root)).encode())
+                    digest.update(path.read_bytes())
+        return digest.hexdigest()
@@ -2,7 +2,7 @@ from django.core.management.base import BaseCommand
 from django.contrib.auth.models import User
 from portfolio.models import (
     Profile, Education, Experience, Skill, 
-    Certification, Project, SiteSettings
+    Certification, Project, SiteSettings, Technology
 )
 from datetime import date, timedelta
 import random
@@ -103,11 +103,14 @@ class Command(BaseCommand):
         ]
         
         for exp_data in experiences:
-            Experience.objects.get_or_create(
+            technologies = exp_data.pop('technologies')
+            experience, created = Experience.objects.get_or_create(
                 title=exp_data['title'],
                 company=exp_data['company'],
                 defaults=exp_data
             )
+            if created:
+                experience.technologies.set(Technology.from_csv(technologies))
         self.stdout.write(self.style.SUCCESS('Created experience records'))
 
         # Create Skills
@@ -278,10 +281,13 @@ Déployé dans 5 hôpitaux, réduction de 30% du temps d'attente aux urgences.''
         ]
         
         for proj_data in projects:
-            Project.objects.get_or_create(
+            technologies = proj_data.pop('technologies')
+            project, created = Project.objects.get_or_create(
                 title=proj_data['title'],
                 defaults=proj_data
             )
+            if created:
+                project.technologies.set(Technology.from_csv(technologies))
         self.stdout.write(self.style.SUCCESS('Created project records'))
 
         # Create Site Settings
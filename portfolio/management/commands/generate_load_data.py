@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from portfolio import loaddata
+from portfolio.models import (
+    Certification, Contact, Education, Experience, Profile, Project, SiteSettings, Skill, Technology,
+)
+
+class Command(BaseCommand):
+    help = 'Bulk-create a synthetic portfolio for load tests: --scale 1 is about 430 rows, --scale 1000 about 430k'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=int, default=1, help='Multiplier of the per-unit volumes of portfolio.loaddata')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per INSERT')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed; the same seed gives the same content')
+        parser.add_argument('--flush', action='store_true', help='Delete the portfolio content first')
+
+    def handle(self, *args, **options):
+        if options['flush']:
+            with transaction.atomic():
+                for model in (Contact, Project, Experience, Skill, Education, Certification, Technology, Profile, SiteSettings):
+                    model.objects.all().delete()
+            self.stdout.write('Existing content deleted')
+
+        planned = loaddata.volumes(options['scale'])
+        self.stdout.write(f'Generating {sum(planned.values())} rows (scale {options["scale"]})...')
+        start = time.perf_counter()
+        counts = loaddata.generate(
+            scale=options['scale'], batch_size=options['batch_size'], seed=options['seed'], stdout=self.stdout,
+        )
+        elapsed = time.perf_counter() - start
+        rows = sum(counts.values())
+        self.stdout.write(self.style.SUCCESS(f'{rows} rows in {elapsed:.1f} s ({rows / elapsed:.0f} rows/s)'))
@@ -0,0 +1,42 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from portfolio.images import IMAGE_FIELDS, generate_variants, save_variants, variants_field
+
+class Command(BaseCommand):
+    help = 'Generate the responsive variants of the images already uploaded, in parallel'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Worker processes')
+        parser.add_argument('--force', action='store_true', help='Regenerate variants that are up to date')
+
+    def handle(self, *args, **options):
+        jobs = []
+        for model, field_name in IMAGE_FIELDS:
+            rows = model.objects.exclude(**{field_name: ''}).values_list('pk', field_name, variants_field(field_name))
+            for pk, name, variants in rows:
+                if options['force'] or (variants or {}).get('source') != name:
+                    jobs.append((model, field_name, pk, name, variants))
+        if not jobs:
+            self.stdout.write('All images are up to date')
+            return
+
+        # Workers only read and write media files; the database stays in this process,
+        # and no connection must be inherited by the forked workers
+        connections.close_all()
+        done = failed = 0
+        with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+            futures = {pool.submit(generate_variants, job[3]): job for job in jobs}
+            for future in as_completed(futures):
+                model, field_name, pk, name, previous = futures[future]
+                try:
+                    variants = future.result()
+                except (OSError, ValueError) as error:
+                    failed += 1
+                    self.stderr.write(f'{name}: {error}')
+                    continue
+                save_variants(model, pk, field_name, variants, previous)
+                done += 1
+        self.stdout.write(self.style.SUCCESS(f'{done} images processed, {failed} failed'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from portfolio.search import contact_search_enabled, rebuild_contact_index, rebuild_index, search_enabled
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search indexes (site search and admin contact search) from the database'
+
+    def handle(self, *args, **options):
+        if not search_enabled():
+            self.stdout.write(self.style.WARNING('No FTS5 index on this database: search uses LIKE scans'))
+            return
+        count = rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f'{count} documents indexed'))
+        if contact_search_enabled():
+            self.stdout.write(self.style.SUCCESS(f'{rebuild_contact_index()} contacts indexed'))
@@ -0,0 +1,36 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from portfolio.archive import restore_segment
+from portfolio.models import ContactArchive
+
+class Command(BaseCommand):
+    help = 'Copy archived contact messages back into the database (see archive_contacts)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--month', action='append', default=[], help='Month to restore, as YYYY-MM (repeatable)')
+        parser.add_argument('--segment', action='append', default=[], help='Segment file to restore (repeatable)')
+        parser.add_argument('--all', action='store_true', help='Restore every archived message')
+        parser.add_argument('--email', help='Only restore the messages sent from this address')
+
+    def handle(self, *args, **options):
+        segments = ContactArchive.objects.order_by('first_created_at')
+        if not options['all']:
+            if not options['month'] and not options['segment'] and not options['email']:
+                raise CommandError('Choose what to restore: --month, --segment, --email or --all')
+            try:
+                months = [datetime.strptime(month, '%Y-%m').date() for month in options['month']]
+            except ValueError as error:
+                raise CommandError(f'Invalid month: {error}')
+            if months:
+                segments = segments.filter(period__in=months)
+            if options['segment']:
+                segments = segments.filter(path__in=options['segment'])
+
+        restored = 0
+        for segment in segments:
+            count = restore_segment(segment, options['email'])
+            restored += count
+            if count and options['verbosity'] > 1:
+                self.stdout.write(f'{segment.path}: {count} messages')
+        self.stdout.write(self.style.SUCCESS(f'{restored} messages restored'))
@@ -0,0 +1,45 @@
+"""Minimal markdown renderer for the long text fields.
+
+Supports **bold**, *italic*, [links](https://...), line breaks and blank-line
+separated paragraphs. The text is HTML-escaped before any markup is added and
+link targets are restricted to http(s), mailto and site-relative URLs.
+Rendered HTML is kept in a per-process LRU keyed by the text itself, so a
+description is only parsed once per worker until it is edited.
+"""
+import re
+from functools import lru_cache
+
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+BOLD_RE = re.compile(r'\*\*(.+?)\*\*')
+ITALIC_RE = re.compile(r'\*([^*\n]+)\*')
+LINK_RE = re.compile(r'\[([^\]\n]+)\]\(([^)\s]+)\)')
+PARAGRAPH_RE = re.compile(r'\n{2,}')
+SAFE_URL_RE = re.compile(r'^(https?://|mailto:|/)', re.IGNORECASE)
+
+CACHE_SIZE = 1024
+
+
+def _link(match):
+    text, url = match.groups()
+    if not SAFE_URL_RE.match(url):
+        return text
+    return f'<a href="{url}" target="_blank" rel="noopener">{text}</a>'
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _render(text):
+    html = escape(text.replace('\r\n', '\n').strip())
+    html = BOLD_RE.sub(r'<strong>\1</strong>', html)
+    html = ITALIC_RE.sub(r'<em>\1</em>', html)
+    html = LINK_RE.sub(_link, html)
+    paragraphs = PARAGRAPH_RE.split(html)
+    return '\n\n'.join('<p>%s</p>' % p.strip().replace('\n', '<br>') for p in paragraphs if p.strip())
+
+
+def render_markdown(text):
+    """Return safe HTML for ``text``"""
+    if not text:
+        return ''
+    return mark_safe(_render(str(text)))
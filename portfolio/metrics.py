@@ -0,0 +1,205 @@
+"""Per-request performance metrics.
+
+``PerformanceMiddleware`` (portfolio.middleware) collects a ``RequestMetrics``
+for every request. Code that reads from the cache reports hits and misses with
+``record_cache``. Finished requests feed per-view rolling windows, which
+``/metrics`` exports in the Prometheus text format.
+
+Windows live in the worker process: with several workers each one reports its
+own traffic, so scrape them individually or read the percentiles as a sample.
+"""
+import threading
+from collections import Counter, deque
+from contextvars import ContextVar
+from time import perf_counter
+
+from django.conf import settings
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Metrics of the request being handled in this thread / task
+current = ContextVar('portfolio_request_metrics', default=None)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.compress_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # SQL text (parameters still as placeholders) -> executions
+        self.statements = Counter()
+
+    def wrap_query(self, execute, sql, params, many, context):
+        """``connection.execute_wrapper`` hook"""
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += perf_counter() - start
+            self.queries += 1
+            self.statements[sql] += 1
+
+    def repeated_queries(self, threshold):
+        """``[(sql, count)]`` of the statements run at least ``threshold`` times"""
+        return [
+            (sql, count) for sql, count in self.statements.most_common()
+            if count >= threshold and not sql.startswith(('SAVEPOINT', 'RELEASE SAVEPOINT'))
+        ]
+
+    def server_timing(self, total):
+        """Value of the Server-Timing header"""
+        return ', '.join([
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.queries} queries"',
+            f'tpl;dur={self.template_time * 1000:.1f};desc="templates"',
+            f'compress;dur={self.compress_time * 1000:.2f}',
+            f'cache;desc="{self.cache_hits} hits, {self.cache_misses} misses"',
+            f'total;dur={total * 1000:.1f}',
+        ])
+
+    def as_dict(self, total):
+        return {
+            'total_ms': round(total * 1000, 2),
+            'db_ms': round(self.db_time * 1000, 2),
+            'queries': self.queries,
+            'template_ms': round(self.template_time * 1000, 2),
+            'compress_ms': round(self.compress_time * 1000, 2),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+        }
+
+
+def record_cache(hit):
+    """Count a cache lookup against the current request, if any"""
+    metrics = current.get()
+    if metrics is None:
+        return
+    if hit:
+        metrics.cache_hits += 1
+    else:
+        metrics.cache_misses += 1
+
+
+def quantile(ordered, q):
+    """Nearest-rank quantile of an already sorted, non-empty list"""
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class Window:
+    """The last ``size`` samples of a series, plus its all-time count and sum"""
+
+    def __init__(self, size):
+        self.samples = deque(maxlen=size)
+        self.count = 0
+        self.sum = 0.0
+
+    def add(self, value):
+        self.samples.append(value)
+        self.count += 1
+        self.sum += value
+
+    def quantiles(self):
+        ordered = sorted(self.samples)
+        if not ordered:
+            return {}
+        return {q: quantile(ordered, q) for q in QUANTILES}
+
+
+# Summaries kept per view: name -> help text
+SUMMARIES = {
+    'portfolio_request_duration_seconds': 'Total time spent handling the request',
+    'portfolio_request_db_seconds': 'Time spent in SQL queries',
+    'portfolio_request_db_queries': 'SQL queries per request',
+    'portfolio_request_template_seconds': 'Time spent rendering templates',
+    'portfolio_spam_check_seconds': 'Time spent in each check of the contact spam filter',
+}
+# Label of the series of each summary (per view by default)
+SUMMARY_LABELS = {
+    'portfolio_spam_check_seconds': 'check',
+}
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format(value):
+    return repr(float(value))
+
+
+class Registry:
+    """Rolling windows per (summary, view) and request/cache counters"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.windows = {}
+        self.requests = Counter()
+        self.cache = Counter()
+
+    def observe(self, view, metrics, duration, status):
+        values = {
+            'portfolio_request_duration_seconds': duration,
+            'portfolio_request_db_seconds': metrics.db_time,
+            'portfolio_request_db_queries': metrics.queries,
+            'portfolio_request_template_seconds': metrics.template_time,
+        }
+        with self.lock:
+            for name, value in values.items():
+                window = self.windows.get((name, view))
+                if window is None:
+                    window = self.windows[(name, view)] = Window(settings.METRICS_WINDOW_SIZE)
+                window.add(value)
+            self.requests[(view, status)] += 1
+            self.cache['hit'] += metrics.cache_hits
+            self.cache['miss'] += metrics.cache_misses
+
+    def observe_checks(self, timings):
+        """Durations of the spam filter's checks for one message: ``{check: seconds}``"""
+        with self.lock:
+            for check, value in timings.items():
+                key = ('portfolio_spam_check_seconds', check)
+                window = self.windows.get(key)
+                if window is None:
+                    window = self.windows[key] = Window(settings.METRICS_WINDOW_SIZE)
+                window.add(value)
+
+    def percentiles(self, view, name='portfolio_request_duration_seconds'):
+        with self.lock:
+            window = self.windows.get((name, view))
+            return window.quantiles() if window else {}
+
+    def export(self):
+        """Everything in the Prometheus text exposition format"""
+        lines = []
+        with self.lock:
+            for name, description in SUMMARIES.items():
+                lines += [f'# HELP {name} {description}', f'# TYPE {name} summary']
+                for (series, view), window in sorted(self.windows.items()):
+                    if series != name:
+                        continue
+                    label = f'{SUMMARY_LABELS.get(name, "view")}="{_escape(view)}"'
+                    for quantile, value in window.quantiles().items():
+                        lines.append(f'{name}{{{label},quantile="{quantile}"}} {_format(value)}')
+                    lines.append(f'{name}_sum{{{label}}} {_format(window.sum)}')
+                    lines.append(f'{name}_count{{{label}}} {window.count}')
+
+            lines += ['# HELP portfolio_requests_total Requests handled', '# TYPE portfolio_requests_total counter']
+            for (view, status), count in sorted(self.requests.items()):
+                lines.append(f'portfolio_requests_total{{view="{_escape(view)}",status="{status}"}} {count}')
+
+            lines += ['# HELP portfolio_cache_lookups_total Cache lookups made while handling requests',
+                      '# TYPE portfolio_cache_lookups_total counter']
+            for result in ('hit', 'miss'):
+                lines.append(f'portfolio_cache_lookups_total{{result="{result}"}} {self.cache[result]}')
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        with self.lock:
+            self.windows.clear()
+            self.requests.clear()
+            self.cache.clear()
+
+
+registry = Registry()
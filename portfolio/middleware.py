@@ -0,0 +1,147 @@
+import json
+import logging
+from contextlib import ExitStack
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+from .compression import acompress_stream, compress, compress_stream, is_compressible, negotiate
+from .metrics import RequestMetrics, current, registry
+
+logger = logging.getLogger('portfolio.performance')
+
+
+class PerformanceMiddleware:
+    """Measure SQL, template and cache work of each request
+
+    Adds a Server-Timing header, logs one JSON line per request, feeds the
+    per-view windows of ``/metrics`` and warns about repeated identical
+    queries (the N+1 pattern). Keep it first in MIDDLEWARE so the total
+    covers the other middleware too.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = current.set(metrics)
+        start = perf_counter()
+        try:
+            with self.wrap_queries(metrics):
+                response = self.get_response(request)
+        finally:
+            current.reset(token)
+        return self.finish(request, response, metrics, perf_counter() - start)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = current.set(metrics)
+        start = perf_counter()
+        # Connections are per thread and the ORM runs in the request's sync_to_async
+        # thread: wrap them there (the metrics follow through the context)
+        stack = await sync_to_async(self.wrap_queries)(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+            current.reset(token)
+        return self.finish(request, response, metrics, perf_counter() - start)
+
+    def wrap_queries(self, metrics):
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(metrics.wrap_query))
+        return stack
+
+    def finish(self, request, response, metrics, total):
+        match = request.resolver_match
+        view = match.view_name if match else 'unmatched'
+        registry.observe(view, metrics, total, response.status_code)
+        if settings.SERVER_TIMING:
+            response['Server-Timing'] = metrics.server_timing(total)
+        self.check_repeated_queries(request, view, metrics)
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'view': view,
+            'status': response.status_code,
+            **metrics.as_dict(total),
+        }))
+        return response
+
+    def process_template_response(self, request, response):
+        # The handler renders TemplateResponses after this hook: time that call
+        metrics = current.get()
+        if metrics is None:
+            return response
+        render = response.render
+
+        def timed_render():
+            start = perf_counter()
+            try:
+                return render()
+            finally:
+                metrics.template_time += perf_counter() - start
+
+        response.render = timed_render
+        return response
+
+    def check_repeated_queries(self, request, view, metrics):
+        threshold = settings.N_PLUS_ONE_THRESHOLD
+        if not threshold:
+            return
+        for sql, count in metrics.repeated_queries(threshold):
+            logger.warning('Possible N+1 in %s (%s): %s identical queries: %s', view, request.path, count, sql)
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Compress text responses with brotli or gzip, see portfolio.compression
+
+    Put it right after PerformanceMiddleware: the middleware below it must see
+    the uncompressed body. Responses that already carry a Content-Encoding,
+    such as pages precompressed in the page cache, are left alone.
+    """
+
+    def process_response(self, request, response):
+        if not settings.COMPRESSION_ENABLED or not is_compressible(response):
+            return response
+        patch_vary_headers(response, ['Accept-Encoding'])
+        if response.has_header('Content-Encoding'):
+            return response
+        encoding = negotiate(request.headers.get('Accept-Encoding', ''))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = acompress_stream(response.streaming_content, encoding)
+            else:
+                response.streaming_content = compress_stream(response.streaming_content, encoding)
+            del response['Content-Length']
+        else:
+            if len(response.content) < settings.COMPRESSION_MIN_SIZE:
+                return response
+            compressed = compress(response.content, encoding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+
+        # A strong ETag describes the uncompressed bytes
+        etag = response.get('ETag', '')
+        if etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
@@ -0,0 +1,46 @@
+from django.db import migrations
+from django.utils.text import slugify
+
+
+def technology_slug(name):
+    # Frozen copy of portfolio.models.technology_slug
+    return slugify(name.replace('+', 'plus').replace('#', 'sharp'))
+
+
+def csv_to_tags(apps, schema_editor):
+    Technology = apps.get_model('portfolio', 'Technology')
+    technologies = {}
+    for model_name in ('Project', 'Experience'):
+        model = apps.get_model('portfolio', model_name)
+        for obj in model.objects.exclude(technologies='').only('pk', 'technologies'):
+            tags = []
+            for name in obj.technologies.split(','):
+                name = name.strip()
+                if not name:
+                    continue
+                slug = technology_slug(name)
+                if slug not in technologies:
+                    technologies[slug], _created = Technology.objects.get_or_create(
+                        slug=slug, defaults={'name': name}
+                    )
+                tags.append(technologies[slug])
+            obj.technology_tags.set(tags)
+
+
+def tags_to_csv(apps, schema_editor):
+    for model_name in ('Project', 'Experience'):
+        model = apps.get_model('portfolio', model_name)
+        for obj in model.objects.prefetch_related('technology_tags'):
+            obj.technologies = ', '.join(tag.name for tag in obj.technology_tags.all())
+            obj.save(update_fields=['technologies'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0004_technology'),
+    ]
+
+    operations = [
+        migrations.RunPython(csv_to_tags, tags_to_csv),
+    ]
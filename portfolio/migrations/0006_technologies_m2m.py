@@ -0,0 +1,50 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0005_technologies_from_csv'),
+    ]
+
+    operations = [
+        # Give the CSV columns a default first so the migration can be reversed
+        migrations.AlterField(
+            model_name='experience',
+            name='technologies',
+            field=models.CharField(blank=True, default='', max_length=500, verbose_name='Technologies utilisées'),
+        ),
+        migrations.AlterField(
+            model_name='project',
+            name='technologies',
+            field=models.CharField(blank=True, default='', max_length=500, verbose_name='Technologies'),
+        ),
+        migrations.RemoveField(
+            model_name='experience',
+            name='technologies',
+        ),
+        migrations.RemoveField(
+            model_name='project',
+            name='technologies',
+        ),
+        migrations.RenameField(
+            model_name='experience',
+            old_name='technology_tags',
+            new_name='technologies',
+        ),
+        migrations.RenameField(
+            model_name='project',
+            old_name='technology_tags',
+            new_name='technologies',
+        ),
+        migrations.AlterField(
+            model_name='experience',
+            name='technologies',
+            field=models.ManyToManyField(blank=True, related_name='experiences', to='portfolio.technology', verbose_name='Technologies utilisées'),
+        ),
+        migrations.AlterField(
+            model_name='project',
+            name='technologies',
+            field=models.ManyToManyField(blank=True, related_name='projects', to='portfolio.technology', verbose_name='Technologies'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-18 11:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0006_technologies_m2m'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='project',
+            options={'ordering': ['-start_date', '-id'], 'verbose_name': 'Projet', 'verbose_name_plural': 'Projets'},
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['-start_date', '-id'], name='project_start_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['status', '-start_date'], name='project_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['is_featured', '-start_date'], name='project_featured_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+from django.db import OperationalError, migrations
+
+TABLE = 'portfolio_search'
+
+
+def create_search_index(apps, schema_editor):
+    # FTS5 is SQLite-only; other backends use portfolio.search's LIKE fallback
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    try:
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5("
+            "title, body, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+    except OperationalError:
+        # SQLite built without FTS5
+        pass
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0007_project_indexes'),
+    ]
+
+    operations = [
+        # Filled by the post_migrate handler, then kept in sync by portfolio.signals
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
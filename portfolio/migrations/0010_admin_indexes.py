@@ -0,0 +1,58 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:14
+
+from django.db import OperationalError, migrations, models
+
+TABLE = 'portfolio_contact_search'
+COLUMNS = 'name, email, subject'
+
+
+def create_contact_search_index(apps, schema_editor):
+    # External content: the index stores no copy of the text. Its triggers (bulk
+    # inserts included) are created after every migrate by the post_migrate
+    # handler (portfolio.search.ensure_contact_triggers), because SQLite drops
+    # them each time a later migration rebuilds portfolio_contact. Other
+    # backends keep the admin's LIKE search
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    try:
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5({COLUMNS}, content='portfolio_contact', "
+            "content_rowid='id', tokenize = 'unicode61 remove_diacritics 2')"
+        )
+    except OperationalError:
+        # SQLite built without FTS5
+        pass
+
+
+def drop_contact_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for trigger in ('insert', 'delete', 'update'):
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS {TABLE}_{trigger}")
+        schema_editor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0009_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contact',
+            index=models.Index(fields=['-created_at'], name='contact_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contact',
+            index=models.Index(fields=['is_read', '-created_at'], name='contact_read_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contact',
+            index=models.Index(fields=['is_replied', '-created_at'], name='contact_replied_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='experience',
+            index=models.Index(fields=['-start_date'], name='experience_start_date_idx'),
+        ),
+        migrations.RunPython(create_contact_search_index, drop_contact_search_index),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0010_admin_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContactArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(max_length=255, unique=True, verbose_name='Fichier')),
+                ('period', models.DateField(verbose_name='Mois')),
+                ('first_contact_id', models.BigIntegerField(verbose_name='Premier message')),
+                ('last_contact_id', models.BigIntegerField(verbose_name='Dernier message')),
+                ('first_created_at', models.DateTimeField(verbose_name='Du')),
+                ('last_created_at', models.DateTimeField(verbose_name='Au')),
+                ('message_count', models.PositiveIntegerField(verbose_name='Messages')),
+                ('read_count', models.PositiveIntegerField(verbose_name='Lus')),
+                ('replied_count', models.PositiveIntegerField(verbose_name='Répondus')),
+                ('size', models.PositiveIntegerField(verbose_name='Taille (octets)')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name="Date d'archivage")),
+            ],
+            options={
+                'verbose_name': 'Archive de contacts',
+                'verbose_name_plural': 'Archives de contacts',
+                'ordering': ['-first_created_at'],
+                'indexes': [models.Index(fields=['period'], name='portfolio_c_period_a48567_idx')],
+            },
+        ),
+    ]
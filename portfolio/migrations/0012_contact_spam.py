@@ -0,0 +1,27 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0011_contactarchive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contact',
+            name='is_spam',
+            field=models.BooleanField(default=False, verbose_name='Spam'),
+        ),
+        migrations.AddField(
+            model_name='contact',
+            name='spam_reasons',
+            field=models.CharField(blank=True, max_length=255, verbose_name='Raisons du filtrage'),
+        ),
+        migrations.AddIndex(
+            model_name='contact',
+            index=models.Index(fields=['is_spam', '-created_at'], name='contact_spam_idx'),
+        ),
+    ]
@@ -2,6 +2,8 @@ from django.db import models
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import EmailValidator
 from django.urls import reverse
+from django.utils import timezone
+from django.utils.text import slugify
 
 class Profile(models.Model):
     name = models.CharField(_("Nom"), max_length=100)
@@ -14,6 +16,8 @@ class Profile(models.Model):
     github = models.URLField(_("GitHub"), blank=True)
     website = models.URLField(_("Site Web"), blank=True)
     profile_image = models.ImageField(_("Photo de profil"), upload_to='profile/', blank=True)
+    # Tailles et formats générés par portfolio.images
+    profile_image_variants = models.JSONField(_("Variantes de la photo"), default=dict, blank=True, editable=False)
     cv_file = models.FileField(_("CV"), upload_to='cv/', blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -25,6 +29,41 @@ class Profile(models.Model):
     def __str__(self):
         return self.name
 
+def technology_slug(name):
+    """Slug of a technology name, keeping C++/C# apart from C"""
+    return slugify(name.replace('+', 'plus').replace('#', 'sharp'))
+
+class Technology(models.Model):
+    name = models.CharField(_("Nom"), max_length=100, unique=True)
+    slug = models.SlugField(_("Slug"), max_length=100, unique=True)
+    updated_at = models.DateTimeField(_("Dernière modification"), auto_now=True)
+
+    class Meta:
+        verbose_name = _("Technologie")
+        verbose_name_plural = _("Technologies")
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+    def save(self, *args, **kwargs):
+        if not self.slug:
+            self.slug = technology_slug(self.name)
+        return super().save(*args, **kwargs)
+
+    @classmethod
+    def from_csv(cls, value):
+        """Return the technologies named in a comma-separated string, creating missing ones"""
+        technologies = {}
+        for name in (value or '').split(','):
+            name = name.strip()
+            if name and technology_slug(name) not in technologies:
+                technology, _created = cls.objects.get_or_create(
+                    slug=technology_slug(name), defaults={'name': name}
+                )
+                technologies[technology.slug] = technology
+        return list(technologies.values())
+
 class Education(models.Model):
     DEGREE_CHOICES = [
         ('bachelor', _('Licence')),
@@ -43,6 +82,7 @@ class Education(models.Model):
     is_current = models.BooleanField(_("En cours"), default=False)
     description = models.TextField(_("Description"), blank=True)
     grade = models.CharField(_("Note/Mention"), max_length=50, blank=True)
+    updated_at = models.DateTimeField(_("Dernière modification"), auto_now=True)
     
     class Meta:
         verbose_name = _("Formation")
@@ -70,12 +110,16 @@ class Experience(models.Model):
     is_current = models.BooleanField(_("Poste actuel"), default=False)
     description = models.TextField(_("Description"))
     achievements = models.TextField(_("Réalisations"), blank=True)
-    technologies = models.CharField(_("Technologies utilisées"), max_length=500, blank=True)
+    technologies = models.ManyToManyField(Technology, verbose_name=_("Technologies utilisées"), related_name='experiences', blank=True)
+    updated_at = models.DateTimeField(_("Dernière modification"), auto_now=True)
     
     class Meta:
         verbose_name = _("Expérience")
         verbose_name_plural = _("Expériences")
         ordering = ['-start_date']
+        indexes = [
+            models.Index(fields=['-start_date'], name='experience_start_date_idx'),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.company}"
@@ -100,6 +144,7 @@ class Skill(models.Model):
     proficiency = models.CharField(_("Niveau"), max_length=20, choices=PROFICIENCY_LEVELS)
     years_of_experience = models.PositiveIntegerField(_("Années d'expérience"), default=0)
     is_featured = models.BooleanField(_("Compétence principale"), default=False)
+    updated_at = models.DateTimeField(_("Dernière modification"), auto_now=True)
     
     class Meta:
         verbose_name = _("Compétence")
@@ -117,6 +162,7 @@ class Certification(models.Model):
     credential_id = models.CharField(_("ID de certification"), max_length=100, blank=True)
     credential_url = models.URLField(_("URL de vérification"), blank=True)
     certificate_file = models.FileField(_("Fichier certificat"), upload_to='certificates/', blank=True)
+    updated_at = models.DateTimeField(_("Dernière modification"), auto_now=True)
     
     class Meta:
         verbose_name = _("Certification")
@@ -136,19 +182,27 @@ class Project(models.Model):
     title = models.CharField(_("Titre"), max_length=200)
     description = models.TextField(_("Description"))
     detailed_description = models.TextField(_("Description détaillée"), blank=True)
-    technologies = models.CharField(_("Technologies"), max_length=500)
+    technologies = models.ManyToManyField(Technology, verbose_name=_("Technologies"), related_name='projects', blank=True)
     status = models.CharField(_("Statut"), max_length=20, choices=PROJECT_STATUS, default='completed')
     start_date = models.DateField(_("Date de début"))
     end_date = models.DateField(_("Date de fin"), null=True, blank=True)
     project_url = models.URLField(_("URL du projet"), blank=True)
     github_url = models.URLField(_("GitHub"), blank=True)
     image = models.ImageField(_("Image"), upload_to='projects/', blank=True)
+    image_variants = models.JSONField(_("Variantes de l'image"), default=dict, blank=True, editable=False)
     is_featured = models.BooleanField(_("Projet vedette"), default=False)
+    updated_at = models.DateTimeField(_("Dernière modification"), auto_now=True)
     
     class Meta:
         verbose_name = _("Projet")
         verbose_name_plural = _("Projets")
-        ordering = ['-start_date']
+        # -id rend l'ordre total : nécessaire pour la pagination par curseur
+        ordering = ['-start_date', '-id']
+        indexes = [
+            models.Index(fields=['-start_date', '-id'], name='project_start_date_idx'),
+            models.Index(fields=['status', '-start_date'], name='project_status_idx'),
+            models.Index(fields=['is_featured', '-start_date'], name='project_featured_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -164,21 +218,84 @@ class Contact(models.Model):
     created_at = models.DateTimeField(_("Date de création"), auto_now_add=True)
     is_read = models.BooleanField(_("Lu"), default=False)
     is_replied = models.BooleanField(_("Répondu"), default=False)
+    # Set by portfolio.spam: kept for review, no notification sent
+    is_spam = models.BooleanField(_("Spam"), default=False)
+    spam_reasons = models.CharField(_("Raisons du filtrage"), max_length=255, blank=True)
     
     class Meta:
         verbose_name = _("Contact")
         verbose_name_plural = _("Contacts")
         ordering = ['-created_at']
+        # The admin inbox: newest first, filtered by read / replied / spam, drilled down by date
+        indexes = [
+            models.Index(fields=['-created_at'], name='contact_created_idx'),
+            models.Index(fields=['is_read', '-created_at'], name='contact_read_idx'),
+            models.Index(fields=['is_replied', '-created_at'], name='contact_replied_idx'),
+            models.Index(fields=['is_spam', '-created_at'], name='contact_spam_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} - {self.subject}"
 
+class ContactNotification(models.Model):
+    """Email telling the site owner about a contact message, delivered by portfolio.outbox"""
+    STATUS_CHOICES = [
+        ('pending', _('En attente')),
+        ('sent', _('Envoyé')),
+        ('failed', _('Échec')),
+    ]
+
+    contact = models.ForeignKey(Contact, on_delete=models.CASCADE, related_name='notifications', verbose_name=_("Contact"))
+    status = models.CharField(_("Statut"), max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(_("Tentatives"), default=0)
+    next_attempt_at = models.DateTimeField(_("Prochaine tentative"), default=timezone.now)
+    last_error = models.TextField(_("Dernière erreur"), blank=True)
+    created_at = models.DateTimeField(_("Date de création"), auto_now_add=True)
+    sent_at = models.DateTimeField(_("Date d'envoi"), null=True, blank=True)
+
+    class Meta:
+        verbose_name = _("Notification email")
+        verbose_name_plural = _("Notifications email")
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.contact} ({self.get_status_display()})"
+
+class ContactArchive(models.Model):
+    """Compressed JSONL segment of contact messages moved out of the database by portfolio.archive"""
+    path = models.CharField(_("Fichier"), max_length=255, unique=True)
+    period = models.DateField(_("Mois"))
+    first_contact_id = models.BigIntegerField(_("Premier message"))
+    last_contact_id = models.BigIntegerField(_("Dernier message"))
+    first_created_at = models.DateTimeField(_("Du"))
+    last_created_at = models.DateTimeField(_("Au"))
+    message_count = models.PositiveIntegerField(_("Messages"))
+    read_count = models.PositiveIntegerField(_("Lus"))
+    replied_count = models.PositiveIntegerField(_("Répondus"))
+    size = models.PositiveIntegerField(_("Taille (octets)"))
+    archived_at = models.DateTimeField(_("Date d'archivage"), auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("Archive de contacts")
+        verbose_name_plural = _("Archives de contacts")
+        ordering = ['-first_created_at']
+        indexes = [
+            models.Index(fields=['period']),
+        ]
+
+    def __str__(self):
+        return self.path
+
 class SiteSettings(models.Model):
     site_title = models.CharField(_("Titre du site"), max_length=100, default="Portfolio")
     site_description = models.TextField(_("Description du site"), blank=True)
     footer_text = models.CharField(_("Texte du footer"), max_length=200, blank=True)
     google_analytics_id = models.CharField(_("Google Analytics ID"), max_length=50, blank=True)
     maintenance_mode = models.BooleanField(_("Mode maintenance"), default=False)
+    updated_at = models.DateTimeField(_("Dernière modification"), auto_now=True)
     
     class Meta:
         verbose_name = _("Paramètres du site")
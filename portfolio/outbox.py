@@ -0,0 +1,164 @@
+"""Queued delivery of contact notifications.
+
+Requests only insert a ``ContactNotification`` row next to the ``Contact``.
+Delivery happens later, from a background thread (``OUTBOX_ASYNC_DELIVERY``)
+and/or the ``send_outbox`` management command, over a single SMTP connection
+per batch, with exponential backoff between attempts. The thread sends every
+due batch, then sleeps on a timer until the earliest retry is due, so failed
+notifications are retried without a new submission or a separate worker.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .models import ContactNotification
+
+logger = logging.getLogger(__name__)
+
+# Rows are leased for this long while a worker sends them, so the thread and
+# the management command never pick up the same notification.
+LEASE = timedelta(minutes=5)
+
+_executor = None
+# Wakes the thread up for the next retry: (due time, threading.Timer)
+_retry_timer = None
+_retry_lock = threading.Lock()
+
+
+def queue_contact_notification(contact):
+    """Record a pending notification for ``contact`` and schedule its delivery"""
+    notification = ContactNotification.objects.create(contact=contact)
+    # Robust: a failure to schedule must not look like a failed write to the caller
+    transaction.on_commit(schedule_delivery, robust=True)
+    return notification
+
+
+def queue_contact_notifications(contacts):
+    """Bulk version of :func:`queue_contact_notification` for saved contacts"""
+    notifications = ContactNotification.objects.bulk_create(
+        [ContactNotification(contact=contact) for contact in contacts]
+    )
+    transaction.on_commit(schedule_delivery, robust=True)
+    return notifications
+
+
+def schedule_delivery():
+    """Deliver pending notifications from the background thread, if enabled"""
+    global _executor
+    if not settings.OUTBOX_ASYNC_DELIVERY:
+        return
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='outbox')
+    _executor.submit(_deliver_in_thread)
+
+
+def _deliver_in_thread():
+    try:
+        while any(deliver_pending()):
+            pass
+        _schedule_retry()
+    except Exception:
+        logger.exception("Outbox delivery failed")
+    finally:
+        close_old_connections()
+
+
+def _schedule_retry():
+    """Run the thread again when the earliest pending notification is due"""
+    global _retry_timer
+    due = (
+        ContactNotification.objects.filter(status='pending')
+        .order_by('next_attempt_at').values_list('next_attempt_at', flat=True).first()
+    )
+    if due is None:
+        return
+    with _retry_lock:
+        if _retry_timer is not None and _retry_timer[1].is_alive():
+            if _retry_timer[0] <= due:
+                return
+            _retry_timer[1].cancel()
+        timer = threading.Timer(max(0, (due - timezone.now()).total_seconds()), schedule_delivery)
+        timer.daemon = True
+        timer.start()
+        _retry_timer = (due, timer)
+
+
+def build_message(contact):
+    return EmailMessage(
+        subject=f"Nouveau message de {contact.name}: {contact.subject}",
+        body=f"De: {contact.name} ({contact.email})\n\nMessage:\n{contact.message}",
+        from_email=settings.EMAIL_HOST_USER,
+        to=[settings.EMAIL_HOST_USER],
+        reply_to=[contact.email],
+    )
+
+
+def retry_delay(attempts):
+    """Backoff before the next attempt: OUTBOX_RETRY_DELAY * 2^(attempts - 1)"""
+    return timedelta(seconds=settings.OUTBOX_RETRY_DELAY * 2 ** (attempts - 1))
+
+
+def claim_batch(batch_size, now):
+    """Lease up to ``batch_size`` due notifications and return them"""
+    due = ContactNotification.objects.filter(status='pending', next_attempt_at__lte=now)
+    ids = list(due.order_by('next_attempt_at').values_list('pk', flat=True)[:batch_size])
+    if not ids:
+        return []
+    lease_until = now + LEASE
+    due.filter(pk__in=ids).update(next_attempt_at=lease_until)
+    # Rows another worker leased first keep their own lease timestamp
+    return list(
+        ContactNotification.objects.filter(pk__in=ids, next_attempt_at=lease_until)
+        .select_related('contact')
+    )
+
+
+def deliver_pending(batch_size=None):
+    """Send one batch of due notifications; return ``(sent, failed)``"""
+    now = timezone.now()
+    batch = claim_batch(batch_size or settings.OUTBOX_BATCH_SIZE, now)
+    if not batch:
+        return 0, 0
+
+    sent = failed = 0
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as e:
+        for notification in batch:
+            _record_failure(notification, e, now)
+        return 0, len(batch)
+
+    try:
+        for notification in batch:
+            try:
+                connection.send_messages([build_message(notification.contact)])
+            except Exception as e:
+                _record_failure(notification, e, now)
+                failed += 1
+            else:
+                notification.status = 'sent'
+                notification.sent_at = timezone.now()
+                notification.attempts += 1
+                notification.last_error = ''
+                notification.save(update_fields=['status', 'sent_at', 'attempts', 'last_error'])
+                sent += 1
+    finally:
+        connection.close()
+    return sent, failed
+
+
+def _record_failure(notification, error, now):
+    notification.attempts += 1
+    notification.last_error = str(error)
+    if notification.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+        notification.status = 'failed'
+    notification.next_attempt_at = now + retry_delay(notification.attempts)
+    notification.save(update_fields=['attempts', 'last_error', 'status', 'next_attempt_at'])
+    logger.warning("Notification %s failed (attempt %s): %s", notification.pk, notification.attempts, error)
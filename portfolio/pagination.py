@@ -0,0 +1,124 @@
+import base64
+import binascii
+from datetime import date
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from .metrics import record_cache
+
+COUNT_KEY = 'portfolio:count:{}'
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator whose COUNT(*) is cached under ``count_key``
+
+    The key is expected to embed the version stamps of the paginated models
+    (see ``portfolio.cache.page_cache_key``), so edits invalidate it; the
+    entries they leave behind expire with the pages (PAGE_CACHE_TIMEOUT).
+    """
+
+    def __init__(self, *args, count_key=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.count_key = count_key
+
+    @cached_property
+    def count(self):
+        if self.count_key is None:
+            return super().count
+        key = COUNT_KEY.format(self.count_key)
+        count = cache.get(key)
+        record_cache(hit=count is not None)
+        if count is None:
+            count = super().count
+            cache.set(key, count, settings.PAGE_CACHE_TIMEOUT)
+        return count
+
+
+def estimated_row_count(model, using='default'):
+    """Rows of the model's table, estimated without scanning it; None when unknown"""
+    connection = connections[using]
+    table = connection.ops.quote_name(model._meta.db_table)
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            # Kept up to date by autovacuum / ANALYZE
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [model._meta.db_table])
+            row = cursor.fetchone()
+            return row[0] if row and row[0] >= 0 else None
+        if connection.vendor == 'sqlite':
+            # Two lookups on the primary key; ids are allocated in order, so gaps
+            # left by deletions make it an upper bound
+            pk = connection.ops.quote_name(model._meta.pk.column)
+            cursor.execute(f"SELECT MAX({pk}) - MIN({pk}) + 1 FROM {table}")
+            return cursor.fetchone()[0] or 0
+    return None
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator that never counts more than ADMIN_EXACT_COUNT_LIMIT rows
+
+    Past that many rows an unfiltered table reports its estimated size, and a
+    filtered or searched list stops counting at the limit (its last pages
+    are then reached by narrowing the filters). Small tables keep exact counts.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        limit = settings.ADMIN_EXACT_COUNT_LIMIT
+        if not queryset.query.where:
+            estimate = estimated_row_count(queryset.model, queryset.db)
+            if estimate is not None and estimate > limit:
+                return estimate
+            return super().count
+        return queryset.order_by().values('pk')[:limit].count()
+
+
+def encode_cursor(start_date, pk):
+    raw = f'{start_date.isoformat()}|{pk}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return ``(start_date, pk)`` or None for a malformed cursor"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        start_date, pk = raw.split('|')
+        return date.fromisoformat(start_date), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+
+
+def encode_pk_cursor(pk):
+    return base64.urlsafe_b64encode(str(pk).encode()).decode().rstrip('=')
+
+
+def decode_pk_cursor(cursor):
+    """Return the primary key of a cursor, or None for a malformed one"""
+    try:
+        return int(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+
+
+def keyset_page(queryset, cursor, per_page):
+    """Rows after ``cursor`` in ``(-start_date, -id)`` order and the next cursor
+
+    Seeks on the (start_date, id) index instead of using OFFSET, so any page
+    costs the same as the first one, and no COUNT(*) is needed.
+    """
+    queryset = queryset.order_by('-start_date', '-id')
+    position = decode_cursor(cursor) if cursor else None
+    if position is not None:
+        start_date, pk = position
+        queryset = queryset.filter(Q(start_date__lt=start_date) | Q(start_date=start_date, id__lt=pk))
+    rows = list(queryset[:per_page + 1])
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        next_cursor = encode_cursor(rows[-1].start_date, rows[-1].pk)
+    return rows, next_cursor
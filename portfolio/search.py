@@ -0,0 +1,353 @@
+"""Full-text search over projects, experiences, education and certifications.
+
+On SQLite the documents live in an FTS5 table kept in sync by the signals of
+``portfolio.signals``. A document's rowid is derived from its source and
+primary key, so updates and deletes are rowid lookups. Results are ranked
+with bm25 (titles weigh more than bodies) and highlighted by FTS5 itself.
+
+Other backends, or an SQLite build without FTS5, fall back to ``icontains``
+filters over the same fields.
+
+The admin searches through the same index (``matching_pks``). Contacts, which
+are private, have an index of their own over name, email and subject: an
+external-content FTS5 table maintained by triggers, so the batched inserts of
+the contact buffer are indexed too.
+"""
+import re
+
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.urls import reverse
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Certification, Contact, Education, Experience, Project
+
+TABLE = 'portfolio_search'
+CONTACT_TABLE = 'portfolio_contact_search'
+# Relative weights of the title and body columns in bm25()
+TITLE_WEIGHT, BODY_WEIGHT = 10.0, 1.0
+# Private-use characters put around matches, turned into <mark> once the text is escaped
+MARK_START, MARK_END = '\ue000', '\ue001'
+SNIPPET_TOKENS = 24
+MAX_QUERY_TOKENS = 8
+FALLBACK_LIMIT = 100
+TOKEN_RE = re.compile(r'\w+')
+
+# Tables found per (connection alias, table), cleared after migrate
+_enabled = {}
+
+_CONTACT_COLUMNS = 'name, email, subject'
+_CONTACT_OLD = (
+    f"INSERT INTO {CONTACT_TABLE} ({CONTACT_TABLE}, rowid, {_CONTACT_COLUMNS}) "
+    "VALUES ('delete', old.id, old.name, old.email, old.subject);"
+)
+_CONTACT_NEW = (
+    f"INSERT INTO {CONTACT_TABLE} (rowid, {_CONTACT_COLUMNS}) VALUES (new.id, new.name, new.email, new.subject);"
+)
+# Triggers of the contact index: event -> (trigger condition, statements)
+CONTACT_TRIGGERS = {
+    'insert': ('INSERT', _CONTACT_NEW),
+    'delete': ('DELETE', _CONTACT_OLD),
+    'update': (f'UPDATE OF {_CONTACT_COLUMNS}', f'{_CONTACT_OLD} {_CONTACT_NEW}'),
+}
+
+
+class Source:
+    """A searchable model: the fields of its title and body, and its page"""
+
+    def __init__(self, model, title_fields, body_fields, url_name, anchor=True):
+        self.model = model
+        self.kind = model._meta.model_name
+        self.title_fields = title_fields
+        self.body_fields = body_fields
+        self.url_name = url_name
+        self.anchor = anchor
+
+    def value(self, instance, field):
+        if '__' in field:
+            # technologies__name: names of the related rows
+            relation, attribute = field.split('__')
+            return ' '.join(getattr(related, attribute) for related in getattr(instance, relation).all())
+        if instance._meta.get_field(field).choices:
+            return str(getattr(instance, f'get_{field}_display')())
+        return str(getattr(instance, field) or '')
+
+    def document(self, instance):
+        title = ' - '.join(filter(None, (self.value(instance, field) for field in self.title_fields)))
+        body = '\n'.join(filter(None, (self.value(instance, field) for field in self.body_fields)))
+        return title, body
+
+    def url(self, pk):
+        if not self.anchor:
+            return reverse(self.url_name, kwargs={'pk': pk})
+        return f'{reverse(self.url_name)}#{self.kind}-{pk}'
+
+
+SOURCES = (
+    Source(Project, ['title'], ['description', 'detailed_description', 'technologies__name'],
+           'portfolio:project_detail', anchor=False),
+    Source(Experience, ['title', 'company'], ['description', 'achievements', 'location', 'technologies__name'],
+           'portfolio:experience'),
+    Source(Education, ['degree', 'field_of_study'], ['institution', 'location', 'description', 'grade'],
+           'portfolio:academic'),
+    Source(Certification, ['name'], ['issuing_organization', 'credential_id'],
+           'portfolio:certifications'),
+)
+SEARCH_MODELS = tuple(source.model for source in SOURCES)
+
+
+def get_source(model):
+    for source in SOURCES:
+        if source.model is model:
+            return source
+    return None
+
+
+def document_rowid(model, pk):
+    return pk * len(SOURCES) + SEARCH_MODELS.index(model)
+
+
+def _table_exists(table):
+    if connection.vendor != 'sqlite':
+        return False
+    key = (connection.alias, table)
+    if key not in _enabled:
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM sqlite_master WHERE name = %s", [table])
+                _enabled[key] = cursor.fetchone() is not None
+        except DatabaseError:
+            return False
+    return _enabled[key]
+
+
+def search_enabled():
+    """True if the FTS5 index exists on the default database"""
+    return _table_exists(TABLE)
+
+
+def contact_triggers_exist():
+    """True if every trigger keeping the contact index in sync is in place"""
+    key = (connection.alias, f'{CONTACT_TABLE}:triggers')
+    if key not in _enabled:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT count(*) FROM sqlite_master WHERE type = 'trigger' AND name IN (%s, %s, %s)",
+                [f'{CONTACT_TABLE}_{event}' for event in CONTACT_TRIGGERS],
+            )
+            _enabled[key] = cursor.fetchone()[0] == len(CONTACT_TRIGGERS)
+    return _enabled[key]
+
+
+def contact_search_enabled():
+    """True if the contact index exists and is kept up to date
+
+    SQLite drops a table's triggers whenever a migration rebuilds it (most
+    ALTERs do); without them new contacts would be missing from the index,
+    so the admin falls back to its LIKE search until they are restored by
+    ``ensure_contact_triggers``.
+    """
+    return _table_exists(CONTACT_TABLE) and contact_triggers_exist()
+
+
+def ensure_contact_triggers():
+    """Re-create missing contact index triggers, and rebuild the index if any was missing; True if repaired"""
+    if not _table_exists(CONTACT_TABLE) or contact_triggers_exist():
+        return False
+    with connection.cursor() as cursor:
+        for event, body in CONTACT_TRIGGERS.items():
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {CONTACT_TABLE}_{event} AFTER {body[0]} ON portfolio_contact "
+                f"BEGIN {body[1]} END"
+            )
+        # Rows written while the triggers were gone
+        cursor.execute(f"INSERT INTO {CONTACT_TABLE} ({CONTACT_TABLE}) VALUES ('rebuild')")
+    _enabled.pop((connection.alias, f'{CONTACT_TABLE}:triggers'), None)
+    return True
+
+
+def reset_search_enabled():
+    _enabled.clear()
+
+
+def index_object(instance):
+    """Write (or rewrite) the document of ``instance``"""
+    if not search_enabled():
+        return
+    title, body = get_source(type(instance)).document(instance)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT OR REPLACE INTO {TABLE} (rowid, title, body) VALUES (%s, %s, %s)",
+            [document_rowid(type(instance), instance.pk), title, body],
+        )
+
+
+def remove_object(model, pk):
+    if not search_enabled():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLE} WHERE rowid = %s", [document_rowid(model, pk)])
+
+
+def rebuild_index():
+    """Reindex every searchable row; return how many documents were written"""
+    if not search_enabled():
+        return 0
+    rows = []
+    for source in SOURCES:
+        queryset = source.model.objects.all()
+        if any('__' in field for field in source.body_fields):
+            queryset = queryset.prefetch_related('technologies')
+        for instance in queryset.iterator(chunk_size=2000):
+            rows.append([document_rowid(source.model, instance.pk), *source.document(instance)])
+    # One transaction: in autocommit mode every INSERT would be synced to disk
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLE}")
+        cursor.executemany(f"INSERT INTO {TABLE} (rowid, title, body) VALUES (%s, %s, %s)", rows)
+        # Merge the b-trees written above into one segment
+        cursor.execute(f"INSERT INTO {TABLE} ({TABLE}) VALUES ('optimize')")
+    return len(rows)
+
+
+def rebuild_contact_index():
+    """Rebuild the contact index from the contact table; return how many contacts it holds"""
+    ensure_contact_triggers()
+    if not contact_search_enabled():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {CONTACT_TABLE} ({CONTACT_TABLE}) VALUES ('rebuild')")
+        cursor.execute(f"SELECT count(*) FROM {CONTACT_TABLE}")
+        return cursor.fetchone()[0]
+
+
+def index_is_empty():
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT NOT EXISTS (SELECT 1 FROM {TABLE})")
+        return bool(cursor.fetchone()[0])
+
+
+def _highlight(text):
+    """Escape ``text`` and turn the match markers into <mark> tags"""
+    html = escape(text).replace(MARK_START, '<mark>').replace(MARK_END, '</mark>')
+    return mark_safe(html)
+
+
+def _result(model, pk, title, snippet):
+    source = get_source(model)
+    return {
+        'kind': source.kind,
+        'label': source.model._meta.verbose_name,
+        'id': pk,
+        'title': _highlight(title),
+        'snippet': _highlight(snippet),
+        'url': source.url(pk),
+    }
+
+
+def match_expression(tokens):
+    """FTS5 query: every token must match, the last one as a prefix (search-as-you-type)"""
+    return ' '.join(f'"{token}"' for token in tokens[:-1]) + f' "{tokens[-1]}"*'
+
+
+class IndexResults:
+    """Ranked FTS5 matches; Paginator only fetches the slice it displays"""
+
+    def __init__(self, tokens):
+        self.match = match_expression(tokens)
+
+    def count(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT count(*) FROM {TABLE} WHERE {TABLE} MATCH %s", [self.match])
+            return cursor.fetchone()[0]
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start = index.start or 0
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid, highlight({TABLE}, 0, %s, %s), snippet({TABLE}, 1, %s, %s, '…', %s) "
+                f"FROM {TABLE} WHERE {TABLE} MATCH %s "
+                f"ORDER BY bm25({TABLE}, {TITLE_WEIGHT}, {BODY_WEIGHT}) LIMIT %s OFFSET %s",
+                [MARK_START, MARK_END, MARK_START, MARK_END, SNIPPET_TOKENS,
+                 self.match, index.stop - start, start],
+            )
+            rows = cursor.fetchall()
+        return [
+            _result(SEARCH_MODELS[rowid % len(SOURCES)], rowid // len(SOURCES), title, snippet)
+            for rowid, title, snippet in rows
+        ]
+
+
+def _mark(text, tokens, excerpt=None):
+    """Put match markers around ``tokens``; keep ``excerpt`` chars around the first one"""
+    pattern = re.compile('|'.join(re.escape(token) for token in tokens), re.IGNORECASE)
+    if excerpt is not None:
+        match = pattern.search(text)
+        start = max(0, match.start() - excerpt // 2) if match else 0
+        text = ('…' if start else '') + text[start:start + excerpt] + ('…' if start + excerpt < len(text) else '')
+    return pattern.sub(lambda match: MARK_START + match.group(0) + MARK_END, text)
+
+
+def _fallback_search(tokens):
+    """Unindexed LIKE scans, titles matches first; at most FALLBACK_LIMIT rows per model"""
+    ranked = []
+    for source in SOURCES:
+        fields = source.title_fields + source.body_fields
+        queryset = source.model.objects.all()
+        for token in tokens:
+            condition = Q()
+            for field in fields:
+                condition |= Q(**{f'{field}__icontains': token})
+            queryset = queryset.filter(condition)
+        if any('__' in field for field in fields):
+            queryset = queryset.distinct().prefetch_related('technologies')
+        for instance in queryset[:FALLBACK_LIMIT]:
+            title, body = source.document(instance)
+            title_hits = sum(token.lower() in title.lower() for token in tokens)
+            ranked.append((-title_hits, _result(
+                source.model, instance.pk, _mark(title, tokens), _mark(body, tokens, excerpt=200),
+            )))
+    ranked.sort(key=lambda item: item[0])
+    return [result for _rank, result in ranked]
+
+
+def query_tokens(text):
+    """The words of a query that are searched for"""
+    return TOKEN_RE.findall(text)[:MAX_QUERY_TOKENS]
+
+
+def search(text):
+    """Ranked, highlighted results for ``text``; a sliceable sequence of dicts"""
+    tokens = query_tokens(text)
+    if not tokens:
+        return []
+    if search_enabled():
+        return IndexResults(tokens)
+    return _fallback_search(tokens)
+
+
+def matching_pks(model, text):
+    """Subquery of the primary keys of ``model`` rows matching ``text``, for ``pk__in``
+
+    None when ``model`` has no index on this database: callers fall back to
+    their LIKE search.
+    """
+    tokens = query_tokens(text)
+    if not tokens:
+        return None
+    if model is Contact:
+        if not contact_search_enabled():
+            return None
+        return RawSQL(f"SELECT rowid FROM {CONTACT_TABLE} WHERE {CONTACT_TABLE} MATCH %s", [match_expression(tokens)])
+    if model not in SEARCH_MODELS or not search_enabled():
+        return None
+    return RawSQL(
+        f"SELECT rowid / %s FROM {TABLE} WHERE {TABLE} MATCH %s AND rowid %% %s = %s",
+        [len(SOURCES), match_expression(tokens), len(SOURCES), SEARCH_MODELS.index(model)],
+    )
@@ -0,0 +1,107 @@
+import logging
+
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .cache import bump_model_version
+from .models import (
+    Profile, Education, Experience, Skill,
+    Certification, Project, SiteSettings, Technology
+)
+from .images import IMAGE_FIELDS, delete_variants, refresh_variants, variants_field
+from .search import SEARCH_MODELS, index_object, remove_object
+
+logger = logging.getLogger(__name__)
+
+# Models whose cached copies (singletons, pages) must be dropped whenever a row changes
+VERSIONED_MODELS = (
+    Profile, Education, Experience, Skill,
+    Certification, Project, SiteSettings, Technology,
+)
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def invalidate_model_cache(sender, instance, **kwargs):
+    """Bump the version stamps of a versioned model and of the written row"""
+    if sender in VERSIONED_MODELS:
+        bump_model_version(sender, instance.pk)
+
+
+@receiver(m2m_changed, sender=Project.technologies.through)
+@receiver(m2m_changed, sender=Experience.technologies.through)
+def invalidate_technologies(sender, instance, action, reverse, model, pk_set, **kwargs):
+    """Treat a change of technologies as an edit of the projects/experiences concerned"""
+    if not action.startswith('post_'):
+        return
+    if reverse:
+        # technology.projects.add(...): ``model`` is Project/Experience
+        owner, pks = model, pk_set or ()
+    else:
+        owner, pks = type(instance), [instance.pk]
+    # Move updated_at so ETags (max timestamp + count) change as well
+    owner.objects.filter(pk__in=pks).update(updated_at=timezone.now())
+    for pk in pks:
+        bump_model_version(owner, pk)
+    if not pks:
+        bump_model_version(owner)
+
+
+@receiver(post_save)
+def update_search_index(sender, instance, raw=False, **kwargs):
+    """Reindex a searchable row, or the rows showing a renamed technology"""
+    if raw:
+        return
+    if sender in SEARCH_MODELS:
+        index_object(instance)
+    elif sender is Technology:
+        for owner in (*instance.projects.all(), *instance.experiences.all()):
+            index_object(owner)
+
+
+@receiver(post_delete)
+def remove_from_search_index(sender, instance, **kwargs):
+    if sender in SEARCH_MODELS:
+        remove_object(sender, instance.pk)
+    elif sender is Technology:
+        for owner in getattr(instance, '_search_owners', ()):
+            index_object(owner)
+
+
+@receiver(pre_delete, sender=Technology)
+def remember_technology_owners(sender, instance, **kwargs):
+    # The links are gone by post_delete: keep the owners to reindex them then
+    instance._search_owners = [*instance.projects.all(), *instance.experiences.all()]
+
+
+@receiver(m2m_changed, sender=Project.technologies.through)
+@receiver(m2m_changed, sender=Experience.technologies.through)
+def reindex_technologies(sender, instance, action, reverse, model, pk_set, **kwargs):
+    """Technology names are part of the indexed body of projects and experiences"""
+    if not action.startswith('post_'):
+        return
+    owners = model.objects.filter(pk__in=pk_set or ()) if reverse else [instance]
+    for owner in owners:
+        index_object(owner)
+
+
+@receiver(post_save)
+def update_image_variants(sender, instance, raw=False, **kwargs):
+    """Generate the responsive variants of a new or replaced image"""
+    if raw:
+        return
+    for model, field_name in IMAGE_FIELDS:
+        if sender is model:
+            try:
+                refresh_variants(instance, field_name)
+            except OSError:
+                # Unreadable image: served as uploaded until process_images succeeds
+                logger.exception("Could not generate variants of %s", getattr(instance, field_name).name)
+
+
+@receiver(post_delete)
+def delete_image_variants(sender, instance, **kwargs):
+    for model, field_name in IMAGE_FIELDS:
+        if sender is model:
+            delete_variants(getattr(instance, variants_field(field_name)))
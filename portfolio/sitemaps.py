@@ -1,34 +1,229 @@
-from django.contrib.sitemaps import Sitemap
-from django.urls import reverse
-from .models import Project
-from datetime import datetime
+"""Sitemaps streamed from the database.
 
-class StaticViewSitemap(Sitemap):
-    priority = 0.8
+A section (static pages, projects) yields ``({language: path}, lastmod)``
+entries, the projects straight from a ``values_list().iterator()`` so no model
+instance is built. /sitemap.xml is a single urlset while every URL fits under
+the protocol limit (SITEMAP_MAX_URLS) and a sitemap index of
+/sitemap-<section>-<page>.xml files beyond it. Each page is listed once per
+language, with the other translations as hreflang alternates.
+
+lastmod comes from the ``updated_at`` of the rows a page renders. Generated
+files are kept in the cache under the version stamps of their models, so
+crawlers are served from memory until one of those models is edited.
+"""
+import math
+from xml.sax.saxutils import escape, quoteattr
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import Http404, HttpResponse
+from django.urls import resolve, reverse
+from django.utils import translation
+
+from .cache import get_validators, page_cache_key
+from .metrics import record_cache
+from .models import Profile, Project, SiteSettings
+from .streaming import chunked, streaming_response
+
+XMLNS = 'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"'
+URLSET_START = (
+    f'<?xml version="1.0" encoding="UTF-8"?>\n'
+    f'<urlset {XMLNS} xmlns:xhtml="http://www.w3.org/1999/xhtml">\n'
+)
+URLSET_END = '</urlset>\n'
+INDEX_START = f'<?xml version="1.0" encoding="UTF-8"?>\n<sitemapindex {XMLNS}>\n'
+INDEX_END = '</sitemapindex>\n'
+# Stands for the primary key while reversing a URL pattern once per language
+PK_MARKER = 987654321
+
+
+def localized(name, kwargs=None):
+    """``{language: path}`` of a named URL"""
+    paths = {}
+    for code, _name in settings.LANGUAGES:
+        with translation.override(code):
+            paths[code] = reverse(name, kwargs=kwargs)
+    return paths
+
+
+def _lastmod(value):
+    return value.isoformat(timespec='seconds') if value is not None else None
+
+
+class Section:
+    """A group of sitemap entries, ``({language: path}, lastmod)``"""
+    name = None
+    changefreq = None
+    priority = None
+
+    def dependencies(self):
+        """Models whose edits change the entries"""
+        raise NotImplementedError
+
+    def count(self):
+        raise NotImplementedError
+
+    def entries(self, offset=0, limit=None):
+        raise NotImplementedError
+
+    def lastmod(self):
+        return get_validators(self.dependencies())[1]
+
+
+class StaticSection(Section):
+    name = 'static'
     changefreq = 'weekly'
-    
-    def items(self):
-        return [
-            'portfolio:home',
-            'portfolio:academic', 
-            'portfolio:experience',
-            'portfolio:certifications',
-            'portfolio:projects',
-            'portfolio:contact'
-        ]
-    
-    def location(self, item):
-        return reverse(item)
-    
-    def lastmod(self, item):
-        return datetime.now()
-
-class ProjectSitemap(Sitemap):
+    priority = 0.8
+    routes = (
+        'portfolio:home',
+        'portfolio:academic',
+        'portfolio:experience',
+        'portfolio:certifications',
+        'portfolio:projects',
+        'portfolio:contact',
+    )
+
+    def page_dependencies(self, route):
+        # The models the page renders, as its view declares them for the page cache
+        view_class = resolve(reverse(route)).func.view_class
+        return (Profile, SiteSettings) + tuple(getattr(view_class, 'cache_models', ()))
+
+    def dependencies(self):
+        models = {}
+        for route in self.routes:
+            models.update(dict.fromkeys(self.page_dependencies(route)))
+        return tuple(models)
+
+    def count(self):
+        return len(self.routes)
+
+    def entries(self, offset=0, limit=None):
+        for route in self.routes[offset:None if limit is None else offset + limit]:
+            yield localized(route), get_validators(self.page_dependencies(route))[1]
+
+
+class ProjectSection(Section):
+    name = 'projects'
     changefreq = 'monthly'
     priority = 0.6
-    
-    def items(self):
-        return Project.objects.all()
-    
-    def lastmod(self, obj):
-        return obj.start_date
\ No newline at end of file
+
+    def dependencies(self):
+        return (Project,)
+
+    def count(self):
+        return Project.objects.count()
+
+    def entries(self, offset=0, limit=None):
+        # reverse() once per language rather than once per project and language
+        templates = {
+            code: path.split(str(PK_MARKER))
+            for code, path in localized('portfolio:project_detail', {'pk': PK_MARKER}).items()
+        }
+        rows = Project.objects.order_by('pk').values_list('pk', 'updated_at')
+        rows = rows[offset:offset + limit] if limit is not None else rows[offset:]
+        for pk, updated_at in rows.iterator(chunk_size=2000):
+            yield {code: f'{prefix}{pk}{suffix}' for code, (prefix, suffix) in templates.items()}, updated_at
+
+
+SECTIONS = {section.name: section for section in (StaticSection(), ProjectSection())}
+
+
+def dependencies(sections=None):
+    models = {}
+    for section in sections or SECTIONS.values():
+        models.update(dict.fromkeys(section.dependencies()))
+    return tuple(models)
+
+
+def entries_per_file():
+    """Entries fitting in one file: each one is a <url> per language"""
+    return max(1, settings.SITEMAP_MAX_URLS // len(settings.LANGUAGES))
+
+
+def url_elements(origin, section, entries):
+    default = settings.LANGUAGE_CODE
+    details = ''.join(
+        f'<{tag}>{value}</{tag}>'
+        for tag, value in (('changefreq', section.changefreq), ('priority', section.priority))
+        if value is not None
+    )
+    for paths, lastmod in entries:
+        alternates = ''.join(
+            f'<xhtml:link rel="alternate" hreflang="{code}" href={quoteattr(origin + path)}/>'
+            for code, path in paths.items()
+        ) + f'<xhtml:link rel="alternate" hreflang="x-default" href={quoteattr(origin + paths[default])}/>'
+        lastmod = f'<lastmod>{_lastmod(lastmod)}</lastmod>' if lastmod is not None else ''
+        for path in paths.values():
+            yield f'<url><loc>{escape(origin + path)}</loc>{lastmod}{details}{alternates}</url>\n'
+
+
+def urlset(origin, parts):
+    """The lines of a urlset made of ``(section, offset, limit)`` parts"""
+    yield URLSET_START
+    for section, offset, limit in parts:
+        yield from url_elements(origin, section, section.entries(offset, limit))
+    yield URLSET_END
+
+
+def index(origin, counts):
+    per_file = entries_per_file()
+    yield INDEX_START
+    for name, count in counts.items():
+        lastmod = _lastmod(SECTIONS[name].lastmod())
+        for page in range(1, math.ceil(count / per_file) + 1):
+            location = escape(origin + reverse('sitemap_section', kwargs={'section': name, 'page': page}))
+            yield f'<sitemap><loc>{location}</loc>{f"<lastmod>{lastmod}</lastmod>" if lastmod else ""}</sitemap>\n'
+    yield INDEX_END
+
+
+def generate(origin, section=None, page=None):
+    """Lines of /sitemap.xml (no section) or of one of the files of its index"""
+    if section is None:
+        counts = {name: section.count() for name, section in SECTIONS.items()}
+        if sum(counts.values()) <= entries_per_file():
+            return urlset(origin, [(section, 0, None) for section in SECTIONS.values()])
+        return index(origin, counts)
+
+    per_file = entries_per_file()
+    # The first file always exists, even empty
+    if page < 1 or (page > 1 and (page - 1) * per_file >= section.count()):
+        raise Http404
+    return urlset(origin, [(section, (page - 1) * per_file, per_file)])
+
+
+def _store_while_streaming(key, chunks):
+    """Pass the chunks through, then cache their concatenation if small enough"""
+    kept, size = [], 0
+    for chunk in chunks:
+        yield chunk
+        if kept is not None:
+            size += len(chunk)
+            kept.append(chunk)
+            if size > settings.SITEMAP_CACHE_MAX_SIZE:
+                kept = None
+    if kept is not None:
+        cache.set(key, b''.join(kept), settings.PAGE_CACHE_TIMEOUT)
+
+
+def sitemap_response(request, section_name=None, page=None):
+    """The sitemap file, from the cache or streamed from the database"""
+    section = None
+    if section_name is not None:
+        section = SECTIONS.get(section_name)
+        if section is None:
+            raise Http404
+    # ALLOWED_HOSTS accepts any Host header: never let it into cached files
+    origin = settings.SITE_URL
+    content_type = 'application/xml; charset=utf-8'
+
+    if not settings.PAGE_CACHE_ENABLED:
+        return streaming_response(request, chunked(generate(origin, section, page)), content_type)
+
+    key = page_cache_key(['sitemap', origin, section_name or '', page or ''], dependencies([section] if section else None))
+    content = cache.get(key)
+    record_cache(hit=content is not None)
+    if content is not None:
+        return HttpResponse(content, content_type=content_type)
+    # Lines are generated lazily: check the page exists before streaming
+    lines = generate(origin, section, page)
+    return streaming_response(request, _store_while_streaming(key, chunked(lines)), content_type)
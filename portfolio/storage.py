@@ -0,0 +1,142 @@
+"""Static files storage: fingerprinted, minified and precompressed assets.
+
+``collectstatic`` minifies the project's own CSS and JS (STATICFILES_DIRS; app
+assets ship as their authors built them), then ManifestStaticFilesStorage
+renames every file to ``name.<md5[:12]>.ext`` and records the mapping in
+staticfiles.json. That mapping is what ``{% static %}`` and the service worker
+(``ServiceWorkerView``) read. Text assets get .gz siblings, and .br ones when
+the brotli package is installed. Servers that honour them (nginx gzip_static /
+brotli_static, or ``serve_static``) send them without compressing per request.
+
+rcssmin/rjsmin are used when installed. Otherwise the built-in minifiers below
+are deliberately conservative; JS is only stripped line by line.
+"""
+import gzip
+import os
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    from rcssmin import cssmin
+except ImportError:
+    cssmin = None
+
+try:
+    from rjsmin import jsmin
+except ImportError:
+    jsmin = None
+
+COMPRESSIBLE = ('.html', '.css', '.js', '.json', '.xml', '.svg', '.txt', '.map')
+# ManifestStaticFilesStorage appends the first 12 hex digits of the md5
+HASHED_NAME_RE = re.compile(r'\.[0-9a-f]{12}\.[^./]+$')
+
+CSS_STRING_OR_COMMENT_RE = re.compile(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')|/\*.*?\*/', re.S)
+CSS_SPACES_RE = re.compile(r'\s*([{};,>])\s*')
+
+
+def is_hashed(name):
+    return bool(HASHED_NAME_RE.search(name))
+
+
+def minify_css(css):
+    """Drop comments and the whitespace around punctuation, leaving strings alone"""
+    if cssmin is not None:
+        return cssmin(css)
+    parts = []
+    # split() alternates code and captured strings; comments capture None
+    for index, part in enumerate(CSS_STRING_OR_COMMENT_RE.split(css)):
+        if index % 2:
+            if part is not None:
+                parts.append(part)
+            continue
+        part = re.sub(r'\s+', ' ', part)
+        part = CSS_SPACES_RE.sub(r'\1', part)
+        parts.append(part.replace(': ', ':').replace(';}', '}'))
+    return ''.join(parts).strip()
+
+
+def minify_js(js):
+    """Drop indentation, blank lines and whole-line // comments outside template literals
+
+    Statements stay on their own lines, so automatic semicolon insertion is unaffected.
+    """
+    if jsmin is not None:
+        return jsmin(js)
+    lines = []
+    in_template = False
+    for line in js.splitlines():
+        if not in_template:
+            line = line.strip()
+            if not line or line.startswith('//'):
+                continue
+        lines.append(line)
+        if line.count('`') % 2:
+            in_template = not in_template
+    return '\n'.join(lines) + '\n'
+
+
+MINIFIERS = {'.css': minify_css, '.js': minify_js}
+
+
+def precompressed(content):
+    """``{suffix: bytes}`` of the precompressed siblings of ``content``"""
+    # mtime=0 keeps the .gz output identical between builds
+    siblings = {'.gz': gzip.compress(content, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        siblings['.br'] = brotli.compress(content)
+    return siblings
+
+
+class PortfolioStaticStorage(ManifestStaticFilesStorage):
+    # Templates still render when collectstatic hasn't run (development, tests)
+    manifest_strict = False
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            # Not collected: serve the unhashed name rather than failing the page
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        if not dry_run:
+            self.minify(paths)
+        yield from super().post_process(paths, dry_run, **options)
+        if not dry_run:
+            for name in set(self.hashed_files.values()):
+                self.compress(name)
+
+    def minify(self, paths):
+        project_dirs = {os.path.abspath(directory) for directory in settings.STATICFILES_DIRS}
+        for name, (storage, _path) in paths.items():
+            minifier = MINIFIERS.get(os.path.splitext(name)[1])
+            if minifier is None or '.min.' in name:
+                continue
+            if os.path.abspath(getattr(storage, 'location', '')) not in project_dirs:
+                continue
+            with self.open(name) as file:
+                content = minifier(file.read().decode())
+            self.delete(name)
+            self._save(name, ContentFile(content.encode()))
+            # HashedFilesMixin reads from the source storage: hash the minified copy instead
+            paths[name] = (self, name)
+
+    def compress(self, name):
+        if not name.endswith(COMPRESSIBLE):
+            return
+        with self.open(name) as file:
+            content = file.read()
+        for suffix, compressed in precompressed(content).items():
+            # Not worth a sibling when compression doesn't pay (tiny files)
+            if len(compressed) < len(content):
+                if self.exists(name + suffix):
+                    self.delete(name + suffix)
+                self._save(name + suffix, ContentFile(compressed))
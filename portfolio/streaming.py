@@ -0,0 +1,33 @@
+"""Streamed responses: sitemaps, NDJSON exports and the admin CSV export."""
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+
+# Lines joined into one chunk of a streamed response
+CHUNK_SIZE = 500
+
+
+def chunked(lines):
+    """Encoded chunks of CHUNK_SIZE lines"""
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) == CHUNK_SIZE:
+            yield ''.join(chunk).encode()
+            chunk = []
+    if chunk:
+        yield ''.join(chunk).encode()
+
+
+async def _in_thread(chunks):
+    """Async iterator over sync chunks, each computed in the request's sync thread"""
+    chunks = iter(chunks)
+    while (chunk := await sync_to_async(next)(chunks, None)) is not None:
+        yield chunk
+
+
+def streaming_response(request, chunks, content_type):
+    # ASGI would otherwise read a sync iterator whole before sending anything
+    if isinstance(request, ASGIRequest):
+        chunks = _in_thread(chunks)
+    return StreamingHttpResponse(chunks, content_type=content_type)
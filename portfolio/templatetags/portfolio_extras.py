@@ -1,6 +1,11 @@
 from django import template
+from django.apps import apps
+from django.core.files.storage import default_storage
+from django.utils.html import format_html, format_html_join
 from django.utils.safestring import mark_safe
-import re
+from portfolio.cache import cached_fragment
+from portfolio.images import variants_field
+from portfolio.markdown import render_markdown
 
 register = template.Library()
 
@@ -20,23 +25,43 @@ def trim(value):
 
 @register.filter
 def markdown_to_html(value):
-    """Convert basic markdown to HTML"""
-    if not value:
-        return value
-    
-    # Convert **bold** to <strong>
-    value = re.sub(r'\*\*(.*?)\*\*', r'<strong>\1</strong>', value)
-    
-    # Convert *italic* to <em>
-    value = re.sub(r'\*(.*?)\*', r'<em>\1</em>', value)
-    
-    # Convert [link](url) to <a>
-    value = re.sub(r'\[([^\]]+)\]\(([^)]+)\)', r'<a href="\2" target="_blank">\1</a>', value)
-    
-    # Convert line breaks
-    value = value.replace('\n', '<br>')
-    
-    return mark_safe(value)
+    """Convert basic markdown to HTML (escaped, cached per text)"""
+    return render_markdown(value)
+
+@register.simple_tag
+def responsive_image(image, sizes='100vw', loading='lazy', **attrs):
+    """Render an image field as <picture> with srcset variants and its intrinsic size"""
+    if not image:
+        return ''
+    variants = getattr(image.instance, variants_field(image.field.name), None) or {}
+    if variants.get('source') != image.name:
+        # Built for a previous upload (the new one could not be processed)
+        variants = {}
+    sources = variants.get('sources', {})
+    if variants.get('width'):
+        attrs.update(width=variants['width'], height=variants['height'])
+    attrs.update(loading=loading, decoding='async')
+
+    # The last format (JPEG/PNG) is the <img> fallback, the others are <source>s
+    types = list(sources)
+    fallback = sources[types.pop()] if types else None
+    if fallback:
+        attrs.update(src=default_storage.url(fallback[-1][1]), srcset=_srcset(fallback), sizes=sizes)
+    else:
+        attrs['src'] = image.url
+    img = format_html('<img {}>', format_html_join(' ', '{}="{}"', attrs.items()))
+    if not types:
+        return img
+    return format_html(
+        '<picture>{}{}</picture>',
+        format_html_join('', '<source type="{}" srcset="{}" sizes="{}">', (
+            (mime_type, _srcset(sources[mime_type]), sizes) for mime_type in types
+        )),
+        img,
+    )
+
+def _srcset(entries):
+    return ', '.join(f'{default_storage.url(name)} {width}w' for width, name in entries)
 
 @register.filter
 def duration(start_date, end_date=None):
@@ -87,4 +112,63 @@ def social_links(profile, size='normal'):
 @register.inclusion_tag('portfolio/includes/skill_badge.html')
 def skill_badge(skill):
     """Render skill badge with progress"""
-    return {'skill': skill}
\ No newline at end of file
+    return {'skill': skill}
+
+class CacheFragmentNode(template.Node):
+    def __init__(self, nodelist, name, vary_on, models, obj, timeout):
+        self.nodelist = nodelist
+        self.name = name
+        self.vary_on = vary_on
+        self.models = models
+        self.obj = obj
+        self.timeout = timeout
+
+    def render(self, context):
+        dependencies = list(self.models)
+        obj = self.obj.resolve(context) if self.obj is not None else None
+        if obj is not None:
+            dependencies.append((type(obj), obj.pk))
+        return mark_safe(cached_fragment(
+            self.name.resolve(context),
+            [value.resolve(context) for value in self.vary_on],
+            dependencies,
+            lambda: self.nodelist.render(context),
+            self.timeout.resolve(context) if self.timeout is not None else None,
+        ))
+
+@register.tag
+def cachefragment(parser, token):
+    """Cache a template fragment until one of the models it shows is edited
+
+        {% cachefragment "skills" [vary_on ...] models="Skill,Technology" [object=obj] [timeout=seconds] %}
+            ...
+        {% endcachefragment %}
+
+    The key holds the name, the active language, the vary_on values and the
+    version stamps of the models (and of the ``object`` row), so saving or
+    deleting a row evicts exactly the fragments that declare its model. Keep
+    per-visitor content ({% csrf_token %}, messages) outside the block.
+    """
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' tag requires a fragment name")
+    nodelist = parser.parse(('endcachefragment',))
+    parser.delete_first_token()
+
+    vary_on, models, obj, timeout = [], [], None, None
+    for bit in bits[2:]:
+        option, _equals, value = bit.partition('=')
+        if option == 'models' and value:
+            for label in value.strip('"\'').split(','):
+                label = label.strip()
+                try:
+                    models.append(apps.get_model(label if '.' in label else f'portfolio.{label}'))
+                except LookupError:
+                    raise template.TemplateSyntaxError(f"'{bits[0]}': unknown model {label!r}")
+        elif option == 'object' and value:
+            obj = parser.compile_filter(value)
+        elif option == 'timeout' and value:
+            timeout = parser.compile_filter(value)
+        else:
+            vary_on.append(parser.compile_filter(bit))
+    return CacheFragmentNode(nodelist, parser.compile_filter(bits[1]), vary_on, models, obj, timeout)
\ No newline at end of file
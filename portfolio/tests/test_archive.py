@@ -0,0 +1,67 @@
+"""Archiving and restoring contact messages (portfolio.archive)."""
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from portfolio import archive
+from portfolio.models import Contact, ContactArchive
+
+
+class ArchiveRoundTripTests(TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        settings_override = override_settings(CONTACT_ARCHIVE_ROOT=self.root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        created_at = timezone.now() - timedelta(days=400)
+        for email in ('x@example.com', 'y@example.com', 'y@example.com', 'y@example.com', 'x@example.com'):
+            contact = Contact.objects.create(name='Test', email=email, subject='Sujet', message='Message')
+            Contact.objects.filter(pk=contact.pk).update(created_at=created_at)
+
+    def archive_all(self):
+        return list(archive.archive_contacts(archive.retention_cutoff()))
+
+    def archived_emails(self):
+        return sorted(
+            row['email'] for segment in ContactArchive.objects.all() for row in archive.read_segment(segment.path)
+        )
+
+    def test_archive_then_restore_everything(self):
+        [segment] = self.archive_all()
+        self.assertFalse(Contact.objects.exists())
+        self.assertEqual(segment.message_count, 5)
+
+        self.assertEqual(archive.restore_segment(segment), 5)
+        self.assertEqual(Contact.objects.count(), 5)
+        self.assertFalse(ContactArchive.objects.exists())
+        self.assertFalse(os.path.exists(archive.full_path(segment.path)))
+
+    def test_partial_restore_then_rearchive_keeps_every_message(self):
+        [segment] = self.archive_all()
+        self.assertEqual(archive.restore_segment(segment, 'x@example.com'), 2)
+        self.assertEqual(self.archived_emails(), ['y@example.com'] * 3)
+
+        # The restored messages span the same ids as the remaining segment
+        [rearchived] = self.archive_all()
+        self.assertNotEqual(rearchived.path, segment.path)
+        self.assertFalse(Contact.objects.exists())
+        self.assertEqual(ContactArchive.objects.count(), 2)
+        self.assertEqual(self.archived_emails(), ['x@example.com'] * 2 + ['y@example.com'] * 3)
+
+    def test_orphaned_file_is_overwritten(self):
+        rows = list(archive.archivable(archive.retention_cutoff()).order_by('pk').values(*archive.FIELDS))
+        period = timezone.localtime(rows[0]['created_at']).date().replace(day=1)
+        # Left behind by a run interrupted before its transaction
+        orphan = archive.segment_path(period, rows)
+        archive.write_segment(orphan, rows[:1])
+
+        [segment] = self.archive_all()
+        self.assertEqual(segment.path, orphan)
+        self.assertEqual(len(list(archive.read_segment(segment.path))), 5)
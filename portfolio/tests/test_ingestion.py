@@ -0,0 +1,126 @@
+"""Ingestion of the contact API (portfolio.ingestion): rate limit, duplicates and the write buffer."""
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from portfolio.ingestion import ContactBuffer, is_duplicate, take_token
+from portfolio.models import Contact, ContactNotification
+
+NOW = 1_700_000_000.0
+
+
+def contact(number):
+    return Contact(name='Visitor', email=f'visitor{number}@example.com', subject='Question', message=f'Message {number}')
+
+
+@override_settings(CONTACT_API_BURST=5, CONTACT_API_RATE_PER_MINUTE=2)
+class RateLimitTests(TestCase):
+    # Windows of BURST / RATE = 150 seconds
+
+    def setUp(self):
+        cache.clear()
+
+    def test_burst_then_wait(self):
+        start = NOW - NOW % 150
+        waits = [take_token('192.0.2.1', start + offset) for offset in range(7)]
+        self.assertEqual(waits[:5], [0] * 5)
+        # Nothing counted yet in the previous window: wait for this one to end
+        self.assertEqual(waits[5], 145)
+        self.assertEqual(waits[6], 144)
+
+    def test_refused_requests_do_not_count(self):
+        start = NOW - NOW % 150
+        for offset in range(20):
+            take_token('192.0.2.1', start + offset)
+        # The previous window holds the 5 accepted requests, not the 20 attempts: they weigh
+        # fully as the next window starts, and 1 - 120 / 150 of themselves 120 seconds later
+        self.assertGreater(take_token('192.0.2.1', start + 150), 0)
+        self.assertEqual(take_token('192.0.2.1', start + 270), 0)
+
+    def test_average_rate(self):
+        accepted = sum(take_token('192.0.2.1', NOW + offset) == 0 for offset in range(0, 600, 5))
+        # 2 per minute over 10 minutes, give or take the burst
+        self.assertAlmostEqual(accepted, 20, delta=5)
+
+    def test_per_ip(self):
+        for _ in range(5):
+            take_token('192.0.2.1', NOW)
+        self.assertGreater(take_token('192.0.2.1', NOW), 0)
+        self.assertEqual(take_token('192.0.2.2', NOW), 0)
+
+
+class DuplicateTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_same_message_normalized(self):
+        data = {'email': 'visitor@example.com', 'subject': 'Question', 'message': 'Bonjour  à vous'}
+        self.assertFalse(is_duplicate(data))
+        self.assertTrue(is_duplicate({**data, 'email': 'Visitor@Example.com', 'message': 'bonjour à vous'}))
+        self.assertFalse(is_duplicate({**data, 'message': 'Autre message'}))
+
+    @override_settings(CONTACT_BUFFER_SIZE=10, CONTACT_BUFFER_MAX_DELAY=60)
+    def test_claim_is_released_when_the_batch_is_dropped(self):
+        buffer = ContactBuffer()
+        self.addCleanup(buffer.flush)
+        data = {'email': 'visitor1@example.com', 'subject': 'Question', 'message': 'Message 1'}
+        self.assertFalse(is_duplicate(data))
+        buffer.add(contact(1))
+        with mock.patch.object(Contact.objects, 'bulk_create', side_effect=RuntimeError('database down')):
+            with self.assertLogs('portfolio.ingestion', 'ERROR'):
+                buffer.close()
+        # Lost with its worker: the sender's retry is accepted
+        self.assertFalse(is_duplicate(data))
+
+
+@override_settings(CONTACT_BUFFER_SIZE=10, CONTACT_BUFFER_MAX_DELAY=60, OUTBOX_ASYNC_DELIVERY=False)
+class BufferTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.buffer = ContactBuffer()
+        self.addCleanup(self.buffer.flush)
+
+    def test_flush_writes_contacts_and_notifications(self):
+        spam = contact(3)
+        spam.is_spam = True
+        for item in (contact(1), contact(2), spam):
+            self.buffer.add(item)
+        self.assertEqual(Contact.objects.count(), 0)
+
+        self.assertEqual(self.buffer.flush(), 3)
+        self.assertEqual(Contact.objects.count(), 3)
+        # No notification for spam
+        self.assertEqual(ContactNotification.objects.count(), 2)
+
+    def test_full_buffer_flushes(self):
+        with self.settings(CONTACT_BUFFER_SIZE=2):
+            self.buffer.add(contact(1))
+            self.assertEqual(Contact.objects.count(), 0)
+            self.buffer.add(contact(2))
+        self.assertEqual(Contact.objects.count(), 2)
+
+    def test_failed_batch_is_kept_for_the_next_flush(self):
+        self.buffer.add(contact(1))
+        self.buffer.add(contact(2))
+        with mock.patch.object(Contact.objects, 'bulk_create', side_effect=RuntimeError('database down')):
+            with self.assertLogs('portfolio.ingestion', 'ERROR'):
+                self.assertEqual(self.buffer.flush(), 0)
+        self.assertEqual(len(self.buffer.pending), 2)
+        self.assertIsNotNone(self.buffer.timer)
+
+        self.buffer.add(contact(3))
+        self.assertEqual(self.buffer.flush(), 3)
+        self.assertEqual(
+            list(Contact.objects.order_by('pk').values_list('message', flat=True)),
+            ['Message 1', 'Message 2', 'Message 3'],
+        )
+
+    def test_written_messages_stay_duplicates_for_the_whole_window(self):
+        data = {'email': 'visitor1@example.com', 'subject': 'Question', 'message': 'Message 1'}
+        self.assertFalse(is_duplicate(data))
+        self.buffer.add(contact(1))
+        self.buffer.flush()
+        self.assertTrue(is_duplicate(data))
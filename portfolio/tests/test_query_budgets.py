@@ -0,0 +1,157 @@
+"""Query and response-time budgets of every public route.
+
+Each route is requested twice in every language: the first request warms the
+per-process caches (singletons, validators, page counts), the second one is
+measured with the page cache disabled, i.e. a full render on a warm worker.
+Budgets are maxima that must not depend on the size of the dataset: a
+relation that stops being prefetched shows up as hundreds of extra queries.
+
+Set QUERY_BUDGET_TIME_FACTOR to scale the time budgets on slow machines.
+"""
+import difflib
+import json
+import logging
+import os
+from collections import Counter
+from itertools import count
+from time import perf_counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, reverse
+from django.utils import translation
+
+from portfolio import spam, urls as portfolio_urls
+from portfolio.loaddata import generate
+from portfolio.models import Contact, Project
+
+TIME_FACTOR = float(os.environ.get('QUERY_BUDGET_TIME_FACTOR', 1))
+
+# route name -> (method, kwargs, query string / payload, max queries, max milliseconds)
+BUDGETS = {
+    'portfolio:home': ('get', None, '', 4, 300),
+    'portfolio:academic': ('get', None, '', 2, 500),
+    'portfolio:experience': ('get', None, '', 2, 500),
+    'portfolio:certifications': ('get', None, '', 1, 300),
+    'portfolio:projects': ('get', None, '', 2, 300),
+    'portfolio:project_detail': ('get', 'project', '', 2, 300),
+    'portfolio:search': ('get', None, '?q=plateforme', 2, 300),
+    'portfolio:contact': ('get', None, '', 0, 300),
+    'portfolio:contact_success': ('get', None, '', 0, 300),
+    'portfolio:search_api': ('get', None, '?q=projet', 2, 300),
+    'portfolio:contact_api': ('post', None, {
+        'name': 'Budget', 'email': 'budget@example.com', 'subject': 'Budget', 'message': 'Query budget test',
+    }, 4, 300),
+    'portfolio:content_api': ('get', {'resource': 'projects'}, '', 2, 300),
+    'sitemap': ('get', None, '', 2, 500),
+    'sitemap_section': ('get', {'section': 'projects', 'page': 1}, '', 1, 500),
+}
+
+# Variants of the project list: filters, deep pages and keyset pagination
+PROJECT_LIST_BUDGETS = {
+    '?page=40': (2, 300),
+    '?status=completed&page=10': (2, 300),
+    '?tech=tech-3': (3, 300),
+    '?featured=1': (2, 300),
+    '?cursor=': (2, 300),
+}
+
+
+def sql_report(queries, budget):
+    """Numbered SQL, then a diff against each statement run once: '+' lines are repeats"""
+    statements = [query['sql'] for query in queries]
+    numbered = '\n'.join(f'{number:4}. {sql}' for number, sql in enumerate(statements, 1))
+    distinct = list(dict.fromkeys(statements))
+    diff = '\n'.join(difflib.unified_diff(
+        distinct, statements, 'each statement once', 'executed', lineterm='', n=0,
+    ))
+    repeated = ', '.join(f'{count}x' for count in Counter(statements).values() if count > 1)
+    return (
+        f'{len(statements)} queries, budget {budget}'
+        f'{" (repeated statements: " + repeated + ")" if repeated else ""}\n'
+        f'{numbered}\n\n{diff or "no repeated statement: new queries were added"}'
+    )
+
+
+@override_settings(PAGE_CACHE_ENABLED=False, CONTACT_BUFFER_SIZE=1, CONTACT_API_BURST=100, N_PLUS_ONE_THRESHOLD=3)
+class QueryBudgetTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        # 500 projects, 200 experiences, 300 skills... far beyond create_sample_data
+        generate(scale=5, technologies=60, contacts=0)
+        cls.project = Project.objects.order_by('pk')[250]
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # One INFO line per request otherwise; N+1 warnings still go through
+        cls.performance_logger = logging.getLogger('portfolio.performance')
+        cls.previous_level = cls.performance_logger.level
+        cls.performance_logger.setLevel(logging.WARNING)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.performance_logger.setLevel(cls.previous_level)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        spam.recent_senders.clear()
+        spam.fingerprint_index().clear()
+        self.senders = count(1)
+
+    def request(self, method, url, data):
+        if method == 'post':
+            # A new sender and message each time: duplicates are rejected with a 409,
+            # and repeats would be quarantined, which skips the notification outbox
+            sender = next(self.senders)
+            data = {
+                **data, 'email': f'budget{sender}@example.com',
+                'message': f'{data["message"]} {sender} {url} {perf_counter()}',
+            }
+            ip = f'10.0.{sender // 256}.{sender % 256}'
+            return self.client.post(url, json.dumps(data), content_type='application/json', REMOTE_ADDR=ip)
+        response = self.client.get(url + data)
+        if response.streaming:
+            # Streamed bodies are generated while they are read: count those queries too
+            response.getvalue()
+        return response
+
+    def assert_within_budget(self, method, url, data, max_queries, max_ms):
+        self.request(method, url, data)  # warm-up
+        with self.assertNoLogs('portfolio.performance', level='WARNING'):
+            with CaptureQueriesContext(connection) as context:
+                start = perf_counter()
+                response = self.request(method, url, data)
+                elapsed = (perf_counter() - start) * 1000
+        self.assertLess(response.status_code, 300, f'{url} returned {response.status_code}')
+        self.assertFalse(Contact.objects.filter(is_spam=True).exists(), 'The budget must measure normal ingestion')
+        self.assertLessEqual(len(context.captured_queries), max_queries, sql_report(context.captured_queries, max_queries))
+        self.assertLessEqual(elapsed, max_ms * TIME_FACTOR, f'{url} took {elapsed:.0f} ms, budget {max_ms} ms')
+
+    def test_every_route_has_a_budget(self):
+        names = {
+            f'{portfolio_urls.app_name}:{pattern.name}' for pattern in portfolio_urls.urlpatterns
+            if isinstance(pattern, URLPattern)
+        }
+        self.assertEqual(names - BUDGETS.keys(), set(), 'Add the new routes to BUDGETS')
+
+    def test_routes(self):
+        for language, _name in settings.LANGUAGES:
+            with translation.override(language):
+                for name, (method, kwargs, data, max_queries, max_ms) in BUDGETS.items():
+                    url = reverse(name, kwargs={'pk': self.project.pk} if kwargs == 'project' else kwargs)
+                    with self.subTest(language=language, url=url):
+                        self.assert_within_budget(method, url, data, max_queries, max_ms)
+
+    def test_project_list_variants(self):
+        for language, _name in settings.LANGUAGES:
+            with translation.override(language):
+                url = reverse('portfolio:projects')
+                for query, (max_queries, max_ms) in PROJECT_LIST_BUDGETS.items():
+                    with self.subTest(language=language, url=url + query):
+                        self.assert_within_budget('get', url, query, max_queries, max_ms)
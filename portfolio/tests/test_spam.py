@@ -0,0 +1,119 @@
+"""Spam scoring of contact messages (portfolio.spam) and its admin actions."""
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from portfolio import spam
+from portfolio.models import Contact, ContactNotification
+
+NOW = 1_700_000_000.0
+
+PITCH = (
+    'Hello, we noticed your website could rank much higher on search engines. Our team builds quality '
+    'content for small businesses like yours and we would be happy to send you a free audit this week.'
+)
+
+
+def message(email='visitor@example.com', text='Bonjour, je souhaiterais discuter de votre dernier projet.', **extra):
+    return {'name': 'Visitor', 'email': email, 'subject': 'Question', 'message': text, **extra}
+
+
+class SpamCheckTests(SimpleTestCase):
+
+    def setUp(self):
+        spam.recent_senders.clear()
+        spam.fingerprint_index().clear()
+
+    def check(self, data, ip='192.0.2.1', from_form=False, now=NOW):
+        return spam.check_message(data, ip, from_form=from_form, now=now)
+
+    def test_legitimate_message(self):
+        verdict = self.check(message(rendered_at=spam.rendered_at_token(NOW - 30)), from_form=True)
+        self.assertFalse(verdict.is_spam)
+        self.assertEqual(verdict.reasons, [])
+
+    def test_honeypot(self):
+        verdict = self.check(message(website='http://example.com'))
+        self.assertTrue(verdict.is_spam)
+        self.assertIn('honeypot', verdict.reasons)
+
+    def test_timing_token(self):
+        fast = self.check(message(rendered_at=spam.rendered_at_token(NOW - 1)), from_form=True)
+        self.assertTrue(fast.is_spam)
+        self.assertEqual(fast.reasons, ['sent 1.0s after display'])
+
+        forged = self.check(message('other@example.com', 'Une autre question.', rendered_at='1.0:forged'))
+        self.assertEqual(forged.reasons, ['forged render time'])
+
+        missing = self.check(message('third@example.com', 'Encore une question.'), ip='192.0.2.3', from_form=True)
+        self.assertEqual(missing.reasons, ['no render time'])
+        self.assertFalse(missing.is_spam)
+
+        # API clients have no form to render
+        api = self.check(message('fourth@example.com', 'Une question par API.'), ip='192.0.2.4')
+        self.assertEqual(api.reasons, [])
+
+    @override_settings(CONTACT_SPAM_RATE_LIMIT=3, CONTACT_SPAM_RATE_WINDOW=600)
+    def test_rate_window(self):
+        texts = ['Première question', 'Deuxième question', 'Troisième question', 'Quatrième question']
+        verdicts = [self.check(message(text=text), now=NOW + offset) for offset, text in enumerate(texts)]
+        self.assertEqual([verdict.is_spam for verdict in verdicts], [False, False, False, True])
+        self.assertEqual(verdicts[-1].reasons, ['4 messages in 600s'])
+
+        # Counted per sender, and only over the window
+        self.assertFalse(self.check(message('new@example.com', 'Autre sujet'), ip='192.0.2.9').is_spam)
+        self.assertFalse(self.check(message(text='Cinquième question'), now=NOW + 601).is_spam)
+
+    def test_near_duplicate(self):
+        first = self.check(message('a@example.com', PITCH), ip='192.0.2.10')
+        self.assertFalse(first.is_spam)
+
+        variant = self.check(message('b@example.com', PITCH.replace('this week', 'today')), ip='192.0.2.11')
+        self.assertEqual(len(variant.reasons), 1)
+        self.assertTrue(variant.reasons[0].startswith('near duplicate'))
+
+        other = self.check(message('c@example.com', 'Pouvez-vous me dire quelles technologies vous utilisez ?'))
+        self.assertEqual(other.reasons, [])
+
+    def test_similarity_estimate(self):
+        words = PITCH.lower().split()
+        self.assertEqual(spam.similarity(spam.sketch(words), spam.sketch(words)), 1)
+        self.assertLess(spam.similarity(spam.sketch(words), spam.sketch(words[::-1])), spam.MIN_SIMILARITY)
+
+    @override_settings(CONTACT_SPAM_FILTER=False)
+    def test_disabled(self):
+        self.assertEqual(self.check(message(website='http://example.com')).reasons, [])
+
+
+@override_settings(OUTBOX_ASYNC_DELIVERY=False)
+class SpamAdminTests(TestCase):
+
+    def setUp(self):
+        user = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(user)
+
+    def run_action(self, action, contacts):
+        return self.client.post(reverse('admin:portfolio_contact_changelist'), {
+            'action': action, '_selected_action': [contact.pk for contact in contacts],
+        })
+
+    def test_mark_as_not_spam_queues_notifications(self):
+        quarantined = Contact.objects.create(
+            name='Visitor', email='visitor@example.com', subject='Question', message='Bonjour', is_spam=True,
+        )
+        self.run_action('mark_as_not_spam', [quarantined])
+
+        quarantined.refresh_from_db()
+        self.assertFalse(quarantined.is_spam)
+        self.assertEqual(
+            list(ContactNotification.objects.filter(contact=quarantined).values_list('status', flat=True)), ['pending'],
+        )
+
+    def test_mark_as_spam_cancels_pending_notifications(self):
+        contact = Contact.objects.create(name='Visitor', email='visitor@example.com', subject='Offre', message='Bonjour')
+        ContactNotification.objects.create(contact=contact)
+        self.run_action('mark_as_spam', [contact])
+
+        contact.refresh_from_db()
+        self.assertTrue(contact.is_spam)
+        self.assertFalse(ContactNotification.objects.filter(contact=contact).exists())
@@ -1,16 +1,29 @@
+from django.conf import settings
 from django.urls import path
 from . import views
+from .async_views import VARIANTS
+
+
+def view(view_class):
+    """The view, or its async variant when ASYNC_VIEWS is on (ASGI)"""
+    if settings.ASYNC_VIEWS:
+        view_class = VARIANTS.get(view_class, view_class)
+    return view_class.as_view()
+
 
 app_name = 'portfolio'
 
 urlpatterns = [
-    path('', views.HomeView.as_view(), name='home'),
-    path('academic/', views.AcademicView.as_view(), name='academic'),
-    path('experience/', views.ExperienceView.as_view(), name='experience'),
-    path('certifications/', views.CertificationView.as_view(), name='certifications'),
-    path('projects/', views.ProjectListView.as_view(), name='projects'),
-    path('projects/<int:pk>/', views.ProjectDetailView.as_view(), name='project_detail'),
-    path('contact/', views.ContactView.as_view(), name='contact'),
-    path('contact/success/', views.ContactSuccessView.as_view(), name='contact_success'),
-    path('api/contact/', views.ContactAPIView.as_view(), name='contact_api'),
+    path('', view(views.HomeView), name='home'),
+    path('academic/', view(views.AcademicView), name='academic'),
+    path('experience/', view(views.ExperienceView), name='experience'),
+    path('certifications/', view(views.CertificationView), name='certifications'),
+    path('projects/', view(views.ProjectListView), name='projects'),
+    path('projects/<int:pk>/', view(views.ProjectDetailView), name='project_detail'),
+    path('search/', view(views.SearchView), name='search'),
+    path('contact/', view(views.ContactView), name='contact'),
+    path('contact/success/', view(views.ContactSuccessView), name='contact_success'),
+    path('api/search/', view(views.SearchAPIView), name='search_api'),
+    path('api/contact/', view(views.ContactAPIView), name='contact_api'),
+    path('api/<slug:resource>/', view(views.ContentAPIView), name='content_api'),
 ]
\ No newline at end of file
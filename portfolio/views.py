@@ -1,96 +1,443 @@
 from django.shortcuts import render, get_object_or_404, redirect
-from django.views.generic import TemplateView, ListView, DetailView, FormView
+from django.views.generic import TemplateView, ListView, DetailView, FormView, View
+from django.views.generic.base import ContextMixin
 from django.contrib import messages
-from django.core.mail import send_mail
 from django.conf import settings
-from django.http import JsonResponse
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.http import Http404, HttpResponse, JsonResponse
+from django.middleware.csrf import get_token
+from django.templatetags.static import static
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, urlencode
 from django.views.decorators.csrf import csrf_exempt
+from django.views.static import serve
 from django.utils.decorators import method_decorator
-from django.utils.translation import gettext_lazy as _
+from django.utils.translation import get_language, gettext_lazy as _
 from .models import (
-    Profile, Education, Experience, Skill, 
-    Certification, Project, Contact, SiteSettings
+    Profile, Education, Experience, Skill,
+    Certification, Project, SiteSettings, Technology
 )
 from .forms import ContactForm
+from .outbox import queue_contact_notification
+from .ingestion import client_ip, contact_buffer, is_duplicate, take_token
+from .spam import check_message
+from .metrics import record_cache, registry
+from .compression import cached_body, compress_entry, negotiate
+from .cache import get_profile, get_site_settings, get_validators, page_cache_key, versions_digest
+from .pagination import CachedCountPaginator, keyset_page
+from .search import query_tokens, search
+from . import api, sitemaps
+from .streaming import chunked, streaming_response
+from .storage import is_hashed
+from pathlib import Path
+import hashlib
 import json
+import math
+import re
 
-class BaseView(TemplateView):
+# CSRF tokens are per visitor: they are swapped for a placeholder before a page
+# is cached and a token for the current visitor is put back when it is served.
+CSRF_TOKEN_RE = re.compile(rb'(name="csrfmiddlewaretoken" value=")[^"]*(")')
+CSRF_PLACEHOLDER = b'__csrf_token__'
+
+def not_modified_response(request, etag, last_modified):
+    """The 304 (or 412) answering a conditional GET, if any"""
+    return get_conditional_response(
+        request, etag=etag, last_modified=last_modified and int(last_modified.timestamp()),
+    )
+
+def set_validators(response, etag, last_modified):
+    """Add ETag and Last-Modified to a 200 or 304; returns whether it did"""
+    if response.status_code not in (200, 304):
+        return False
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    return True
+
+class BaseContextMixin(ContextMixin):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        try:
-            context['profile'] = Profile.objects.first()
-            context['site_settings'] = SiteSettings.objects.first()
-        except:
-            context['profile'] = None
-            context['site_settings'] = None
+        context['profile'] = get_profile()
+        context['site_settings'] = get_site_settings()
         return context
 
-class HomeView(BaseView):
+class BaseView(BaseContextMixin, TemplateView):
+    pass
+
+class CachedPageMixin:
+    """Serve the rendered page from the cache until one of its models is edited
+
+    Also answers conditional GETs (If-None-Match / If-Modified-Since) with a 304
+    before anything is rendered.
+    """
+    # Models rendered by the page, on top of the Profile/SiteSettings shown on every page
+    cache_models = ()
+    # Query parameters that change the content (others are ignored by the key)
+    cache_query_params = ()
+    # Seconds, defaults to settings.PAGE_CACHE_TIMEOUT
+    cache_timeout = None
+
+    def get_cache_dependencies(self):
+        return (Profile, SiteSettings) + tuple(self.cache_models)
+
+    def get_cache_timeout(self):
+        if self.cache_timeout is not None:
+            return self.cache_timeout
+        return settings.PAGE_CACHE_TIMEOUT
+
+    def get_cache_param(self, name):
+        """Value of a ``cache_query_params`` parameter in the cache key"""
+        return self.request.GET.get(name, '')
+
+    def get_page_cache_key(self):
+        params = [self.get_cache_param(name) for name in self.cache_query_params]
+        parts = [self.request.resolver_match.view_name, get_language(), *params, self.kwargs.get('pk', '')]
+        return page_cache_key(parts, self.get_cache_dependencies())
+
+    def has_pending_messages(self):
+        # Never replay (or 304) a page while someone's flash messages are queued
+        return bool(len(messages.get_messages(self.request)))
+
+    def get_page_validators(self):
+        """Weak ETag and Last-Modified of the page, from its models' timestamps"""
+        etag, last_modified = get_validators(self.get_cache_dependencies())
+        if etag is None:
+            return None, None
+        return f'W/"{etag}-{get_language()}"', last_modified
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD') or self.has_pending_messages():
+            return super().dispatch(request, *args, **kwargs)
+
+        etag, last_modified = self.get_page_validators()
+        response = self.get_not_modified_response(etag, last_modified)
+        if response is None:
+            response = self.get_cached_response(request, *args, **kwargs)
+        return self.add_validators(response, etag, last_modified)
+
+    def get_not_modified_response(self, etag, last_modified):
+        if etag is None:
+            return None
+        return not_modified_response(self.request, etag, last_modified)
+
+    def add_validators(self, response, etag, last_modified):
+        if etag is not None and set_validators(response, etag, last_modified):
+            # Pages embed per-visitor CSRF tokens: browsers revalidate, proxies don't store
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def get_cached_response(self, request, *args, **kwargs):
+        if not settings.PAGE_CACHE_ENABLED:
+            return super().dispatch(request, *args, **kwargs)
+
+        key = self.get_page_cache_key()
+        entry = cache.get(key)
+        record_cache(hit=entry is not None)
+        if entry is not None:
+            return self.response_from_cache(entry)
+        return self.cache_after_render(key, super().dispatch(request, *args, **kwargs))
+
+    def cache_after_render(self, key, response):
+        if response.status_code == 200 and hasattr(response, 'add_post_render_callback'):
+            response.add_post_render_callback(lambda response: self.store_response(key, response))
+        return response
+
+    def store_response(self, key, response):
+        entry = {
+            'content': CSRF_TOKEN_RE.sub(rb'\1' + CSRF_PLACEHOLDER + rb'\2', response.content),
+            'headers': {
+                name: response[name] for name in ('Content-Type', 'Content-Language')
+                if response.has_header(name)
+            },
+        }
+        if settings.COMPRESSION_ENABLED:
+            # Compressed once here rather than on every hit
+            entry['encoded'] = compress_entry(entry['content'], CSRF_PLACEHOLDER)
+        cache.set(key, entry, self.get_cache_timeout())
+
+    def response_from_cache(self, entry):
+        content = entry['content']
+        token = None
+        if CSRF_PLACEHOLDER in content:
+            token = get_token(self.request).encode()
+            content = content.replace(CSRF_PLACEHOLDER, token)
+        encoding = None
+        if settings.COMPRESSION_ENABLED and entry.get('encoded'):
+            content, encoding = cached_body(
+                entry['encoded'], content, token, self.request.headers.get('Accept-Encoding', ''),
+            )
+        response = HttpResponse(content, headers=entry['headers'])
+        if encoding is not None:
+            response['Content-Encoding'] = encoding
+            patch_vary_headers(response, ['Accept-Encoding'])
+        response['X-Page-Cache'] = 'hit'
+        return response
+
+class HomeView(CachedPageMixin, BaseView):
     template_name = 'portfolio/home.html'
+    cache_models = (Project, Skill, Experience, Technology)
     
+    def get_page_querysets(self):
+        """Querysets of the page, evaluated by the template or by the async variant"""
+        return {
+            'featured_projects': Project.objects.filter(is_featured=True).prefetch_related('technologies')[:3],
+            'featured_skills': Skill.objects.filter(is_featured=True),
+            'recent_experiences': Experience.objects.all()[:3],
+        }
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['featured_projects'] = Project.objects.filter(is_featured=True)[:3]
-        context['featured_skills'] = Skill.objects.filter(is_featured=True)
-        context['recent_experiences'] = Experience.objects.all()[:3]
+        context.update(self.get_page_querysets())
         return context
 
-class AcademicView(BaseView):
+class AcademicView(CachedPageMixin, BaseView):
     template_name = 'portfolio/academic.html'
+    cache_models = (Education, Skill)
     
+    def get_page_querysets(self):
+        return {'educations': Education.objects.all(), 'skills': Skill.objects.all()}
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['educations'] = Education.objects.all()
-        context['skills'] = Skill.objects.all()
+        context.update(self.get_page_querysets())
         return context
 
-class ExperienceView(BaseView):
+class ExperienceView(CachedPageMixin, BaseView):
     template_name = 'portfolio/experience.html'
+    cache_models = (Experience, Technology)
     
+    def get_page_querysets(self):
+        return {'experiences': Experience.objects.prefetch_related('technologies')}
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['experiences'] = Experience.objects.all()
+        context.update(self.get_page_querysets())
         return context
 
-class CertificationView(BaseView):
+class CertificationView(CachedPageMixin, BaseView):
     template_name = 'portfolio/certifications.html'
+    cache_models = (Certification,)
     
+    def get_page_querysets(self):
+        return {'certifications': Certification.objects.all()}
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['certifications'] = Certification.objects.all()
+        context.update(self.get_page_querysets())
         return context
 
-class ProjectListView(BaseView, ListView):
+class ProjectListView(CachedPageMixin, BaseContextMixin, ListView):
     model = Project
     template_name = 'portfolio/projects.html'
     context_object_name = 'projects'
     paginate_by = 6
+    paginator_class = CachedCountPaginator
+    cache_models = (Project, Technology)
+    cache_query_params = ('page', 'cursor', 'tech', 'status', 'featured', 'year')
+
+    def get_filters(self):
+        """Valid filters of the query string, as ``{param: value}``"""
+        params = self.request.GET
+        filters = {}
+        if params.get('tech'):
+            filters['tech'] = params['tech']
+        if params.get('status') in dict(Project.PROJECT_STATUS):
+            filters['status'] = params['status']
+        if params.get('featured') == '1':
+            filters['featured'] = '1'
+        if params.get('year', '').isdigit():
+            filters['year'] = params['year']
+        return filters
+
+    def get_queryset(self):
+        queryset = super().get_queryset().prefetch_related('technologies')
+        filters = self.get_filters()
+        # ?tech=<slug>: join on the technologies table instead of matching strings
+        if 'tech' in filters:
+            queryset = queryset.filter(technologies__slug=filters['tech'])
+        if 'status' in filters:
+            queryset = queryset.filter(status=filters['status'])
+        if 'featured' in filters:
+            queryset = queryset.filter(is_featured=True)
+        if 'year' in filters:
+            queryset = queryset.filter(start_date__year=int(filters['year']))
+        return queryset
+
+    def get_paginator(self, queryset, per_page, orphans=0, allow_empty_first_page=True, **kwargs):
+        # COUNT(*) per filter combination, cached until a project changes
+        count_key = '{}:{}'.format(urlencode(sorted(self.get_filters().items())), versions_digest(self.cache_models))
+        return self.paginator_class(
+            queryset, per_page, orphans=orphans,
+            allow_empty_first_page=allow_empty_first_page, count_key=count_key, **kwargs
+        )
+
+    def paginate_queryset(self, queryset, page_size):
+        # ?cursor= opts into keyset pagination (no page numbers, no COUNT)
+        cursor = self.request.GET.get('cursor')
+        if cursor is None:
+            return super().paginate_queryset(queryset, page_size)
+        rows, self.next_cursor = keyset_page(queryset, cursor, page_size)
+        return None, None, rows, False
 
-class ProjectDetailView(BaseView, DetailView):
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        filters = self.get_filters()
+        context['filters'] = filters
+        if filters:
+            context['filter_query'] = '&' + urlencode(filters)
+        if 'tech' in filters:
+            context['current_technology'] = Technology.objects.filter(slug=filters['tech']).first()
+        if 'cursor' in self.request.GET:
+            context['next_cursor'] = self.next_cursor
+        return context
+
+class ProjectDetailView(CachedPageMixin, BaseContextMixin, DetailView):
     model = Project
     template_name = 'portfolio/project_detail.html'
     context_object_name = 'project'
+    queryset = Project.objects.prefetch_related('technologies')
+
+    def get_cache_dependencies(self):
+        # Only this project: editing another one leaves the page cached
+        return (Profile, SiteSettings, Technology, (Project, self.kwargs['pk']))
 
-class ContactView(BaseView, FormView):
+class SearchView(CachedPageMixin, BaseView):
+    template_name = 'portfolio/search.html'
+    cache_models = (Project, Experience, Education, Certification, Technology)
+    cache_query_params = ('q', 'page')
+    paginate_by = 10
+    # Set while rendering: only pages with results, at their canonical page number, are cached
+    cacheable = False
+
+    def get_query(self):
+        """The query reduced to the lowercase tokens searched for, so spellings of the same search share a page"""
+        return ' '.join(query_tokens(self.request.GET.get('q', '')[:200].lower()))
+
+    def get_cache_param(self, name):
+        if name == 'q':
+            return self.get_query()
+        return super().get_cache_param(name)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        query = self.get_query()
+        context['query'] = query
+        if query:
+            requested = self.request.GET.get('page', '')
+            page = Paginator(search(query), self.paginate_by).get_page(requested)
+            context['page_obj'] = page
+            context['results'] = page.object_list
+            context['filter_query'] = '&' + urlencode({'q': query})
+            # Anyone can make up queries and page numbers: only real result pages are cached
+            self.cacheable = bool(page.object_list) and (requested or '1') == str(page.number)
+        return context
+
+    def store_response(self, key, response):
+        if self.cacheable:
+            super().store_response(key, response)
+
+class SearchAPIView(View):
+    http_method_names = ['get']
+    paginate_by = 10
+
+    def get(self, request, *args, **kwargs):
+        query = request.GET.get('q', '').strip()[:200]
+        if not query:
+            return JsonResponse({'success': False, 'message': _("Paramètre q manquant.")}, status=400)
+        page = Paginator(search(query), self.paginate_by).get_page(request.GET.get('page'))
+        return JsonResponse({
+            'success': True,
+            'query': query,
+            'count': page.paginator.count,
+            'page': page.number,
+            'num_pages': page.paginator.num_pages,
+            'results': [
+                {**result, 'label': str(result['label'])} for result in page.object_list
+            ],
+        })
+
+class ContentAPIView(View):
+    """/api/<resource>/: read-only JSON pages or NDJSON export of a content model, see portfolio.api"""
+    http_method_names = ['get', 'head']
+
+    def get(self, request, resource):
+        resource = api.RESOURCES.get(resource)
+        if resource is None:
+            raise Http404
+        try:
+            fields = resource.parse_fields(request.GET.get('fields', ''))
+        except ValueError as error:
+            return JsonResponse({'success': False, 'message': _("Champs inconnus : %s") % error}, status=400)
+        limit = request.GET.get('limit', str(settings.API_PAGE_SIZE))
+        if not limit.isdigit() or not 1 <= int(limit) <= settings.API_MAX_PAGE_SIZE:
+            return JsonResponse({'success': False, 'message': _("Paramètre limit invalide.")}, status=400)
+        limit = int(limit)
+        cursor = request.GET.get('cursor', '')
+        ndjson = request.GET.get('format') == 'ndjson' or 'application/x-ndjson' in request.headers.get('Accept', '')
+
+        # One ETag per representation of the same content
+        etag, last_modified = get_validators(resource.dependencies())
+        variant = hashlib.md5(f'{",".join(fields)}|{cursor}|{limit}|{ndjson}'.encode()).hexdigest()[:8]
+        etag = f'W/"{etag}-{variant}"'
+        response = not_modified_response(request, etag, last_modified)
+        if response is None:
+            if ndjson:
+                lines = chunked(api.ndjson_lines(resource, fields))
+                response = streaming_response(request, lines, 'application/x-ndjson; charset=utf-8')
+            else:
+                response = self.page_response(request, resource, fields, cursor, limit)
+        if set_validators(response, etag, last_modified):
+            # Public content: any site may read it, caches revalidate against the ETag
+            patch_cache_control(response, public=True, no_cache=True)
+            patch_vary_headers(response, ['Accept'])
+            response['Access-Control-Allow-Origin'] = '*'
+        return response
+
+    def page_response(self, request, resource, fields, cursor, limit):
+        if not settings.PAGE_CACHE_ENABLED:
+            return self.render_page(request, resource, fields, cursor, limit)
+
+        key = page_cache_key(['api', request.path, ','.join(fields), cursor, limit], resource.dependencies())
+        content = cache.get(key)
+        record_cache(hit=content is not None)
+        if content is not None:
+            return HttpResponse(content, content_type='application/json')
+        response = self.render_page(request, resource, fields, cursor, limit)
+        if response.status_code == 200:
+            cache.set(key, response.content, settings.PAGE_CACHE_TIMEOUT)
+        return response
+
+    def render_page(self, request, resource, fields, cursor, limit):
+        try:
+            rows, next_cursor = api.page(resource, fields, cursor, limit)
+        except ValueError:
+            return JsonResponse({'success': False, 'message': _("Curseur invalide.")}, status=400)
+        params = request.GET.copy()
+        params['cursor'] = next_cursor
+        content = api.dumps({
+            'success': True,
+            'results': rows,
+            'next_cursor': next_cursor,
+            'next': f'{request.path}?{params.urlencode()}' if next_cursor else None,
+        })
+        return HttpResponse(content, content_type='application/json')
+
+class ContactView(BaseContextMixin, FormView):
     template_name = 'portfolio/contact.html'
     form_class = ContactForm
     success_url = '/contact/success/'
     
     def form_valid(self, form):
-        # Sauvegarder le message
-        contact = form.save()
-        
-        # Envoyer l'email
-        try:
-            send_mail(
-                subject=f"Nouveau message de {contact.name}: {contact.subject}",
-                message=f"De: {contact.name} ({contact.email})\n\nMessage:\n{contact.message}",
-                from_email=settings.EMAIL_HOST_USER,
-                recipient_list=[settings.EMAIL_HOST_USER],
-                fail_silently=False,
-            )
-        except Exception as e:
-            messages.error(self.request, _("Erreur lors de l'envoi de l'email."))
+        verdict = check_message(form.cleaned_data, client_ip(self.request), from_form=True)
+        contact = verdict.apply(form.save(commit=False))
+        # Sauvegarder le message, l'email part en arrière-plan (portfolio.outbox), sauf pour le spam
+        with transaction.atomic():
+            contact.save()
+            if not contact.is_spam:
+                queue_contact_notification(contact)
         
         messages.success(self.request, _("Votre message a été envoyé avec succès!"))
         return super().form_valid(form)
@@ -99,29 +446,128 @@ class ContactSuccessView(BaseView):
     template_name = 'portfolio/contact_success.html'
 
 @method_decorator(csrf_exempt, name='dispatch')
-class ContactAPIView(TemplateView):
-    def post(self, request, *args, **kwargs):
+class ContactAPIView(View):
+    http_method_names = ['post', 'options']
+
+    def accept(self, request):
+        """Rate-limit, parse, validate, dedupe and score a submission
+
+        Returns ``(contact, None)`` with the unsaved contact to buffer, or
+        ``(None, response)`` when it is refused. Shared with the async variant,
+        which runs it in a worker thread.
+        """
+        retry_after = take_token(client_ip(request))
+        if retry_after:
+            response = JsonResponse(
+                {'success': False, 'message': _("Trop de messages, réessayez plus tard.")}, status=429
+            )
+            response['Retry-After'] = str(math.ceil(retry_after))
+            return None, response
+
         try:
             data = json.loads(request.body)
-            contact = Contact.objects.create(
-                name=data.get('name'),
-                email=data.get('email'),
-                subject=data.get('subject'),
-                message=data.get('message')
-            )
-            
-            # Envoyer l'email
-            try:
-                send_mail(
-                    subject=f"Nouveau message de {contact.name}: {contact.subject}",
-                    message=f"De: {contact.name} ({contact.email})\n\nMessage:\n{contact.message}",
-                    from_email=settings.EMAIL_HOST_USER,
-                    recipient_list=[settings.EMAIL_HOST_USER],
-                    fail_silently=False,
-                )
-            except:
-                pass
-            
-            return JsonResponse({'success': True, 'message': 'Message envoyé avec succès!'})
-        except Exception as e:
-            return JsonResponse({'success': False, 'message': str(e)})
\ No newline at end of file
+        except ValueError:
+            return None, JsonResponse({'success': False, 'message': _("JSON invalide.")}, status=400)
+        if not isinstance(data, dict):
+            return None, JsonResponse({'success': False, 'message': _("JSON invalide.")}, status=400)
+
+        form = ContactForm(data)
+        if not form.is_valid():
+            return None, JsonResponse({'success': False, 'errors': form.errors}, status=400)
+        if is_duplicate(form.cleaned_data):
+            return None, JsonResponse({'success': False, 'message': _("Message déjà reçu.")}, status=409)
+
+        verdict = check_message(form.cleaned_data, client_ip(request))
+        return verdict.apply(form.save(commit=False)), None
+
+    def accepted(self):
+        return JsonResponse({'success': True, 'message': _('Message envoyé avec succès!')}, status=202)
+
+    def post(self, request, *args, **kwargs):
+        contact, response = self.accept(request)
+        if contact is None:
+            return response
+        # Written in batches by the buffer, the notification is queued with it
+        contact_buffer.add(contact)
+        return self.accepted()
+
+class ServiceWorkerView(TemplateView):
+    """/sw.js, precaching the current build of the assets
+
+    Served from the root so its scope covers the whole site. The cache name is
+    derived from the hashed asset URLs, so each collectstatic run installs a new
+    worker that drops the previous cache.
+    """
+    template_name = 'sw.js'
+    content_type = 'application/javascript'
+    precache_assets = ('css/style.css', 'js/main.js', 'manifest.json')
+    precache_urls = (
+        '/',
+        'https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css',
+        'https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/all.min.css',
+        'https://fonts.googleapis.com/css2?family=Montserrat:wght@400;600;700&family=Open+Sans:wght@400;600&display=swap',
+    )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        urls = [static(name) for name in self.precache_assets] + list(self.precache_urls)
+        context['cache_name'] = 'portfolio-' + hashlib.md5('|'.join(urls).encode()).hexdigest()[:12]
+        context['precache_urls'] = json.dumps(urls, indent=4)
+        return context
+
+    def render_to_response(self, context, **response_kwargs):
+        response = super().render_to_response(context, **response_kwargs)
+        # Browsers must see a new build right away
+        patch_cache_control(response, no_cache=True)
+        return response
+
+class SitemapView(View):
+    """/sitemap.xml and the files of its index, see portfolio.sitemaps"""
+    http_method_names = ['get', 'head']
+
+    def get(self, request, section=None, page=None):
+        if section is not None and section not in sitemaps.SECTIONS:
+            raise Http404
+        etag, last_modified = get_validators(sitemaps.dependencies([sitemaps.SECTIONS[section]] if section else None))
+        etag = f'W/"{etag}"'
+        response = not_modified_response(request, etag, last_modified)
+        if response is None:
+            response = sitemaps.sitemap_response(request, section, page)
+        set_validators(response, etag, last_modified)
+        # Public, but crawlers revalidate: the ETag changes with the content
+        patch_cache_control(response, public=True, no_cache=True)
+        return response
+
+class MetricsView(View):
+    """Prometheus scrape target: per-view latency, SQL and template summaries of this worker"""
+    http_method_names = ['get']
+
+    def get(self, request, *args, **kwargs):
+        allowed = client_ip(request) in settings.METRICS_ALLOWED_IPS or request.user.is_staff
+        if not settings.METRICS_ENABLED or not allowed:
+            raise Http404
+        return HttpResponse(registry.export(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+def serve_static(request, path):
+    """Serve a collected static file, preferring its precompressed .br/.gz sibling
+
+    Hashed names never change content, so they are cached for a year as immutable.
+    """
+    root = Path(settings.STATIC_ROOT)
+    # Precompressed siblings, preferred in this order when the client accepts both equally
+    suffixes = {
+        encoding: suffix for encoding, suffix in (('br', '.br'), ('gzip', '.gz'))
+        if (root / (path + suffix)).is_file()
+    }
+    # negotiate() honours q-values: "br;q=0" refuses brotli
+    encoding = negotiate(request.headers.get('Accept-Encoding'), list(suffixes)) if suffixes else None
+    name = path + suffixes[encoding] if encoding else path
+    # serve() sets Content-Type from the original extension and Content-Encoding from the suffix
+    response = serve(request, name, document_root=root)
+    del response['Content-Disposition']
+    patch_vary_headers(response, ['Accept-Encoding'])
+    if is_hashed(path):
+        patch_cache_control(response, public=True, max_age=settings.STATIC_MAX_AGE, immutable=True)
+    else:
+        patch_cache_control(response, public=True, no_cache=True)
+    return response
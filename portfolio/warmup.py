@@ -0,0 +1,114 @@
+"""Worker warm-up and startup timing.
+
+Templates are parsed once per process by the cached loader (TEMPLATE_CACHE),
+but lazily: without warm-up, the first visitors of every page on a new worker
+pay for parsing its template, the templates it extends and includes, and the
+tag libraries they load. ``boot()``, called by portfolio_project/wsgi.py and
+asgi.py once the application is loaded, compiles every template up front when
+TEMPLATE_PRECOMPILE is on, loads the URL resolver and the translation
+catalogs, then logs how long the worker took to boot and, once served, how
+long its first request took.
+
+``manage.py precompile_templates`` runs the same compilation outside a worker:
+it fails on templates with syntax errors, which makes it a deploy check.
+"""
+import logging
+import os
+import threading
+from time import perf_counter
+
+from django.conf import settings
+from django.core.signals import request_finished, request_started
+from django.template import TemplateSyntaxError, engines
+from django.template.utils import get_app_template_dirs
+from django.urls import get_resolver
+from django.utils import translation
+
+logger = logging.getLogger(__name__)
+
+
+def template_names(engine):
+    """Names of every template of the engine's directories, app directories included"""
+    dirs = list(engine.dirs)
+    if engine.app_dirs or any('app_directories' in str(loader) for loader in engine.loaders):
+        dirs += get_app_template_dirs('templates')
+    names = {}
+    for directory in dirs:
+        for root, _dirs, files in os.walk(directory):
+            for filename in files:
+                name = os.path.relpath(os.path.join(root, filename), directory).replace(os.sep, '/')
+                # The first directory wins, as for the loaders
+                names.setdefault(name, directory)
+    return sorted(names)
+
+
+def precompile_templates():
+    """Compile every template into the cached loader; ``(compiled names, {name: error})``"""
+    engine = engines['django'].engine
+    compiled, errors = [], {}
+    for name in template_names(engine):
+        try:
+            engine.get_template(name)
+        except UnicodeDecodeError:
+            # Binary files shipped next to templates
+            continue
+        except TemplateSyntaxError as error:
+            errors[name] = str(error)
+        else:
+            compiled.append(name)
+    return compiled, errors
+
+
+def warm_up():
+    """Load what the first request would otherwise load; returns the compiled template count"""
+    count = 0
+    if settings.TEMPLATE_PRECOMPILE:
+        compiled, errors = precompile_templates()
+        count = len(compiled)
+        for name, error in errors.items():
+            logger.error('Template %s does not compile: %s', name, error)
+    for code, _name in settings.LANGUAGES:
+        with translation.override(code):
+            # The catalog of the language, and the resolver's reverse lookups (built per language)
+            translation.gettext('')
+            get_resolver().reverse_dict
+    return count
+
+
+class FirstRequestTimer:
+    """Log the duration of the first request a worker serves"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = None
+
+    def start(self, **kwargs):
+        with self.lock:
+            if self.started is None:
+                self.started = perf_counter()
+
+    def finish(self, **kwargs):
+        with self.lock:
+            if self.started is None:
+                return
+            elapsed = perf_counter() - self.started
+            request_started.disconnect(self.start)
+            request_finished.disconnect(self.finish)
+        logger.info('Worker %s served its first request in %.1f ms', os.getpid(), elapsed * 1000)
+
+
+first_request_timer = FirstRequestTimer()
+
+
+def boot(started):
+    """Warm the worker up, then log its boot time (``started``: perf_counter() before loading Django)"""
+    warm_started = perf_counter()
+    count = warm_up()
+    finished = perf_counter()
+    logger.info(
+        'Worker %s booted in %.1f ms (application %.1f ms, warm-up %.1f ms, %d templates compiled)',
+        os.getpid(), (finished - started) * 1000, (warm_started - started) * 1000,
+        (finished - warm_started) * 1000, count,
+    )
+    request_started.connect(first_request_timer.start)
+    request_finished.connect(first_request_timer.finish)
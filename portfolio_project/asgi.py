@@ -0,0 +1,23 @@
+"""
+ASGI config for portfolio_project project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Served this way, the public pages use their async variants
+(portfolio.async_views) unless ASYNC_VIEWS says otherwise.
+"""
+import os
+from time import perf_counter
+
+# Boot time includes importing Django
+started = perf_counter()
+
+from django.core.asgi import get_asgi_application  # noqa: E402
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'portfolio_project.settings')
+os.environ.setdefault('ASYNC_VIEWS', 'True')
+
+application = get_asgi_application()
+
+from portfolio.warmup import boot  # noqa: E402 (needs the apps loaded)
+
+boot(started)
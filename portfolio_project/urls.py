@@ -1,20 +1,17 @@
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from django.conf.urls.i18n import i18n_patterns
-from django.contrib.sitemaps.views import sitemap
-from portfolio.sitemaps import StaticViewSitemap, ProjectSitemap
-
-sitemaps = {
-    'static': StaticViewSitemap,
-    'projects': ProjectSitemap,
-}
+from portfolio.views import MetricsView, ServiceWorkerView, SitemapView, serve_static
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('i18n/', include('django.conf.urls.i18n')),
-    path('sitemap.xml', sitemap, {'sitemaps': sitemaps}, name='django.contrib.sitemaps.views.sitemap'),
+    path('sw.js', ServiceWorkerView.as_view(), name='service_worker'),
+    path('metrics', MetricsView.as_view(), name='metrics'),
+    path('sitemap.xml', SitemapView.as_view(), name='sitemap'),
+    path('sitemap-<slug:section>-<int:page>.xml', SitemapView.as_view(), name='sitemap_section'),
 ]
 
 urlpatterns += i18n_patterns(
@@ -24,4 +21,8 @@ urlpatterns += i18n_patterns(
 
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
-    urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
\ No newline at end of file
+
+if settings.SERVE_STATIC:
+    urlpatterns += [
+        re_path(r'^{}(?P<path>.*)$'.format(settings.STATIC_URL.lstrip('/')), serve_static),
+    ]
\ No newline at end of file
@@ -0,0 +1,20 @@
+"""
+WSGI config for portfolio_project project.
+
+It exposes the WSGI callable as a module-level variable named ``application``.
+"""
+import os
+from time import perf_counter
+
+# Boot time includes importing Django
+started = perf_counter()
+
+from django.core.wsgi import get_wsgi_application  # noqa: E402
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'portfolio_project.settings')
+
+application = get_wsgi_application()
+
+from portfolio.warmup import boot  # noqa: E402 (needs the apps loaded)
+
+boot(started)
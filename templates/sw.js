@@ -0,0 +1,57 @@
+// Service Worker for PWA functionality
+// Generated by ServiceWorkerView: the cache name changes with every build of the assets
+const CACHE_NAME = '{{ cache_name }}';
+const urlsToCache = {{ precache_urls|safe }};
+
+self.addEventListener('install', function(event) {
+    event.waitUntil(
+        caches.open(CACHE_NAME)
+            .then(function(cache) {
+                return cache.addAll(urlsToCache);
+            })
+            .then(function() {
+                return self.skipWaiting();
+            })
+    );
+});
+
+self.addEventListener('activate', function(event) {
+    // Drop the caches of previous builds
+    event.waitUntil(
+        caches.keys()
+            .then(function(names) {
+                return Promise.all(names.filter(function(name) {
+                    return name !== CACHE_NAME;
+                }).map(function(name) {
+                    return caches.delete(name);
+                }));
+            })
+            .then(function() {
+                return self.clients.claim();
+            })
+    );
+});
+
+self.addEventListener('fetch', function(event) {
+    if (event.request.method !== 'GET') {
+        return;
+    }
+    if (event.request.mode === 'navigate') {
+        // Pages: network first so edits show up, the cached home page when offline
+        event.respondWith(
+            fetch(event.request).catch(function() {
+                return caches.match(event.request).then(function(response) {
+                    return response || caches.match('/');
+                });
+            })
+        );
+        return;
+    }
+    event.respondWith(
+        caches.match(event.request)
+            .then(function(response) {
+                // Hashed assets never change under the same URL: the cached copy is always good
+                return response || fetch(event.request);
+            })
+    );
+});